@@ -2,8 +2,9 @@ from fastapi import Depends, HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.db import data_model as models
+from app.db import statements
 from app.core.config import settings
 
 # ---- Config ----
@@ -22,7 +23,7 @@ def get_password_hash(password):
 
 # ---- Authentication ----
 def get_user_by_username(db: Session, username: str):
-    return db.query(models.User).filter(models.User.username == username).first()
+    return db.execute(statements.user_by_username(username)).scalars().first()
 
 
 def authenticate_user(db: Session, username: str, password: str):
@@ -35,9 +36,7 @@ def authenticate_user(db: Session, username: str, password: str):
 
 
 # ---- Dependency to get current user ----
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(settings.oauth2_scheme)
-):
+def _user_from_token(db: Session, token: str):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -59,11 +58,37 @@ def get_current_user(
     return user
 
 
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(settings.oauth2_scheme)
+):
+    return _user_from_token(db, token)
+
+
+def get_current_user_read(
+    db: Session = Depends(get_read_db), token: str = Depends(settings.oauth2_scheme)
+):
+    """
+    `get_current_user` for routes on `get_read_db`: the lookup shares the
+    route's read session, so a read never also holds a primary connection.
+    """
+    return _user_from_token(db, token)
+
+
 # ---- Optional dependency for admin-only routes ----
-def get_current_admin(current_user: models.User = Depends(get_current_user)):
-    if current_user.role != "admin":
+def _require_admin(user: models.User) -> models.User:
+    if user.role != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
-    return current_user
+    return user
+
+
+def get_current_admin(current_user: models.User = Depends(get_current_user)):
+    return _require_admin(current_user)
+
+
+def get_current_admin_read(
+    current_user: models.User = Depends(get_current_user_read),
+):
+    return _require_admin(current_user)
 
 
 def verify_token(token: str) -> int:
@@ -0,0 +1,293 @@
+# app/core/auction.py
+import threading
+import time
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.db import data_model as models
+from app.core import wallet_service
+from app.core.book import load_resting, write_back
+from app.core.order_matching import MatchResult, order_state
+from app.db.statements import RESTING_COLUMNS
+from app.core.ticker import ticker
+
+BUY, SELL = models.OrderType.buy, models.OrderType.sell
+
+
+class Clearing(NamedTuple):
+    price: Optional[float]  # None: the book does not cross
+    volume: float
+    imbalance: float  # demand - supply at the price; > 0 means buyers are left
+
+
+def clearing_price(
+    bid_prices,
+    bid_qty,
+    ask_prices,
+    ask_qty,
+    market_bid: float = 0.0,
+    market_ask: float = 0.0,
+    reference: Optional[float] = None,
+) -> Clearing:
+    """
+    The single price that executes the most volume.
+
+    Every distinct limit price is a candidate level. Demand at a level is
+    all bids priced at or above it, supply all asks at or below it: one
+    `bincount` per side puts the quantities on the levels and a cumulative
+    sum (from the top for bids, from the bottom for asks) turns them into
+    the two curves. Executable volume is their minimum. Ties go to the
+    smallest imbalance, then the level nearest `reference`, then the lowest.
+    Market orders count towards every level.
+    """
+    bid_prices = np.asarray(bid_prices, dtype=float)
+    ask_prices = np.asarray(ask_prices, dtype=float)
+    levels = np.unique(np.concatenate([bid_prices, ask_prices]))
+    if not levels.size:
+        return Clearing(None, 0.0, 0.0)
+    n = levels.size
+    bids = np.bincount(
+        np.searchsorted(levels, bid_prices), weights=bid_qty, minlength=n
+    )
+    asks = np.bincount(
+        np.searchsorted(levels, ask_prices), weights=ask_qty, minlength=n
+    )
+    demand = np.cumsum(bids[::-1])[::-1] + market_bid
+    supply = np.cumsum(asks) + market_ask
+
+    # Rounded so float noise in the sums can't break ties
+    volume = np.round(np.minimum(demand, supply), 9)
+    imbalance = np.round(demand - supply, 9)
+    distance = np.abs(levels - reference) if reference else np.zeros(n)
+    best = np.lexsort((levels, distance, np.abs(imbalance), -volume))[0]
+    if volume[best] <= 0:
+        return Clearing(None, 0.0, 0.0)
+    return Clearing(float(levels[best]), float(volume[best]), float(imbalance[best]))
+
+
+def _curves_input(buys, sells) -> dict:
+    def split(orders):
+        limits = [o for o in orders if o.price is not None]
+        return (
+            np.fromiter((o.price for o in limits), float, len(limits)),
+            np.fromiter((o.remaining_quantity for o in limits), float, len(limits)),
+            sum(o.remaining_quantity for o in orders if o.price is None),
+        )
+
+    bid_prices, bid_qty, market_bid = split(buys)
+    ask_prices, ask_qty, market_ask = split(sells)
+    return dict(
+        bid_prices=bid_prices,
+        bid_qty=bid_qty,
+        ask_prices=ask_prices,
+        ask_qty=ask_qty,
+        market_bid=market_bid,
+        market_ask=market_ask,
+        reference=ticker.last_price,
+    )
+
+
+def _priority(order, side):
+    """Price-time priority key: market orders first, then best price, FIFO."""
+    if order.price is None:
+        price = float("-inf")
+    else:
+        price = -order.price if side == BUY else order.price
+    return (price, order.queued_at or order.created_at)
+
+
+def allocate(buys, sells, price: float, volume: float) -> List[tuple]:
+    """
+    Pair buys and sells in price-time priority until `volume` is filled at
+    `price`. Only orders willing to trade at `price` take part; the last
+    one on each side can be partly filled. Self-trades are skipped, like
+    in continuous matching. Returns (buy, sell, quantity) fills.
+    """
+    buys = sorted(
+        (o for o in buys if o.price is None or o.price >= price),
+        key=lambda o: _priority(o, BUY),
+    )
+    sells = sorted(
+        (o for o in sells if o.price is None or o.price <= price),
+        key=lambda o: _priority(o, SELL),
+    )
+    left = Decimal(str(volume))
+    sell_left = [Decimal(str(o.remaining_quantity)) for o in sells]
+    head = 0  # sells before this are used up
+    fills = []
+    for buy in buys:
+        need = min(Decimal(str(buy.remaining_quantity)), left)
+        index = head
+        while need > 0 and index < len(sells):
+            sell = sells[index]
+            if sell_left[index] > 0 and sell.user_id != buy.user_id:
+                quantity = min(need, sell_left[index])
+                fills.append((buy, sell, quantity))
+                need -= quantity
+                left -= quantity
+                sell_left[index] -= quantity
+            if sell_left[index] <= 0 and index == head:
+                head += 1
+            index += 1
+        if left <= 0:
+            break
+    return fills
+
+
+def _short_users(db: Session, fills, price: Decimal) -> set:
+    """Users whose reservations can't cover their side of the fills."""
+    cash = defaultdict(Decimal)
+    assets = defaultdict(Decimal)
+    for buy, sell, quantity in fills:
+        cash[buy.user_id] += price * quantity
+        assets[sell.user_id] += quantity
+    states = wallet_service.get_wallet_states(db, set(cash) | set(assets))
+    short = set()
+    for needs, field in ((cash, "reserved_balance"), (assets, "reserved_holdings")):
+        for user_id, need in needs.items():
+            state = states.get(user_id)
+            if state is None or state[field] < float(need):
+                short.add(user_id)
+    return short
+
+
+def uncross(db: Session) -> Tuple[Clearing, MatchResult]:
+    """
+    Clear the whole book at one price in a single pass.
+
+    Locks every pending order (loaded as light records, see
+    app/core/book.py), finds the clearing price, allocates the
+    fills, then settles them with one ledger INSERT and releases the
+    price improvement of buys that reserved above the clearing price. If a
+    user's reservation is short, their orders sit the auction out and the
+    price is found again without them. The caller commits.
+    """
+    orders = load_resting(
+        db,
+        select(*RESTING_COLUMNS)
+        .where(models.Order.status == models.StatusType.pending)
+        .with_for_update(),
+    )
+    result = MatchResult()
+    excluded = set()
+    while True:
+        book = [o for o in orders if o.user_id not in excluded]
+        buys = [o for o in book if o.type == BUY]
+        sells = [o for o in book if o.type == SELL]
+        clearing = clearing_price(**_curves_input(buys, sells))
+        if clearing.price is None:
+            return clearing, result
+        fills = allocate(buys, sells, clearing.price, clearing.volume)
+        price = Decimal(str(clearing.price))
+        short = _short_users(db, fills, price)
+        if not short:
+            break
+        excluded |= short
+
+    settlements = []
+    improvements = defaultdict(Decimal)
+    for buy, sell, quantity in fills:
+        cost = price * quantity
+        trade = models.Trade(
+            id=str(uuid.uuid4()),
+            buy_order_id=buy.id,
+            sell_order_id=sell.id,
+            buyer_user_id=buy.user_id,
+            seller_user_id=sell.user_id,
+            side=None,  # no aggressor in an auction
+            price=clearing.price,
+            quantity=float(quantity),
+            notional=float(cost),
+        )
+        result.append(trade)
+        settlements.append(
+            (buy.user_id, sell.user_id, float(cost), float(quantity), trade.id)
+        )
+        if buy.price is not None and buy.price > clearing.price:
+            improvements[buy] += (Decimal(str(buy.price)) - price) * quantity
+        for order in (buy, sell):
+            order.remaining_quantity = float(
+                Decimal(str(order.remaining_quantity)) - quantity
+            )
+            if order.remaining_quantity <= 0:
+                order.status = models.StatusType.executed
+            if order.display_quantity is not None:
+                order.visible_quantity = min(
+                    order.display_quantity, order.remaining_quantity
+                )
+
+    touched = {o.id: o for fill in fills for o in fill[:2]}
+    write_back(db, list(touched.values()))
+    db.add_all(result)
+    wallet_service.settle_fills(db, settlements)
+    wallet_service.release_orders(
+        db,
+        [(o.user_id, BUY, float(amount), o.id) for o, amount in improvements.items()],
+    )
+    db.flush()
+
+    for order in touched.values():
+        result.order_updates[order.id] = (order.user_id, order_state(order))
+    result.wallet_updates = wallet_service.get_wallet_states(
+        db, {o.user_id for o in touched.values()}
+    )
+    return clearing, result
+
+
+def indicative(db: Session) -> Clearing:
+    """Clearing price and volume if the book were uncrossed now (no locks)."""
+    rows = db.execute(
+        select(
+            models.Order.type, models.Order.price, models.Order.remaining_quantity
+        ).where(models.Order.status == models.StatusType.pending)
+    ).all()
+    buys = [r for r in rows if r.type == BUY]
+    sells = [r for r in rows if r.type == SELL]
+    return clearing_price(**_curves_input(buys, sells))
+
+
+class CallAuction:
+    """
+    Market phase: continuous matching, or a call auction in which orders
+    only accumulate until an admin uncrosses the book. Process-local, like
+    the matching worker it pauses.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.started_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.stats = {"auctions": 0, "uncrosses": 0, "last": None}
+
+    def start(self) -> bool:
+        with self._lock:
+            if self.active:
+                return False
+            self.active = True
+            self.started_at = time.time()
+            self.stats["auctions"] += 1
+            return True
+
+    def end(self, clearing: Clearing, trades: int):
+        with self._lock:
+            self.active = False
+            self.started_at = None
+            self.stats["uncrosses"] += 1
+            self.stats["last"] = {**clearing._asdict(), "trades": trades}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "phase": "auction" if self.active else "continuous",
+                "started_at": self.started_at,
+                **self.stats,
+            }
+
+
+auction = CallAuction()
@@ -1,50 +1,96 @@
+import json
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
 from app.core.ws_manager import manager
+from app.core.event_bridge import bridge
+from app.core.ticker import ticker
+from app.core.book import load_resting
+from app.core.order_matching import MatchResult, displayed_quantity, order_state
 from app.db import data_model as models
+from app.db import statements
 
 
-async def broadcast_trade_book(trade_book: dict):
-    await manager.broadcast(f"Top Trades: {trade_book}")
+# ---- Market-wide topics ----
+async def broadcast_trade_book(trade_book: list):
+    await manager.publish("trades", f"Trade Book Update: {json.dumps(trade_book)}")
 
 
 async def broadcast_order_book(order_book: dict):
-    await manager.broadcast(f"Top Orders: {order_book}")
+    await manager.publish("book", f"Order Book Update: {json.dumps(order_book)}")
+
+
+async def broadcast_candles(candles: list):
+    await manager.publish("candles", f"Candle Update: {json.dumps(candles)}")
+
+
+async def broadcast_ticker(stats: dict):
+    await manager.publish("ticker", f"Ticker Update: {json.dumps(stats)}")
+
+
+# ---- Per-user topics ----
+# These are plain functions so matching code on any thread can call them: they
+# queue onto the event bridge and return at once. The owner's sockets may live
+# in another worker, so the bridge hands them to the bus. Only the latest
+# queued update per wallet / per order is kept.
+def broadcast_order(order: models.Order):
+    send_order_update(order.user_id, order_state(order))
+
+
+def send_wallet_update(user_id: str, state: dict):
+    bridge.publish(
+        {
+            "type": "user",
+            "user_id": user_id,
+            "topic": "wallet",
+            "message": f"Wallet Update: {json.dumps(state)}",
+        },
+        key=("wallet", user_id),
+    )
+
+
+def send_order_update(user_id: str, state: dict):
+    bridge.publish(
+        {
+            "type": "user",
+            "user_id": user_id,
+            "topic": "orders",
+            "message": f"Order Update: {json.dumps(state)}",
+        },
+        key=("order", state["id"]),
+    )
+
+
+def broadcast_match_updates(result: MatchResult):
+    """Push fills and balance changes only to the users they belong to."""
+    for user_id, state in result.order_updates.values():
+        send_order_update(user_id, state)
+    for user_id, state in result.wallet_updates.items():
+        send_wallet_update(user_id, state)
 
 
 def get_order_book_snapshot(db: Session):
     """
-    Returns current pending buy/sell orders (best price first).
+    Returns current pending buy/sell orders (best price first). Icebergs
+    show only their current slice.
     """
-    buy_orders = (
-        db.query(models.Order)
-        .filter(
-            models.Order.type == models.OrderType.buy,
-            models.Order.status == models.StatusType.pending,
-        )
-        .order_by(models.Order.price.desc(), models.Order.created_at.asc())
-        .limit(3)
-        .all()
-    )
-    sell_orders = (
-        db.query(models.Order)
-        .filter(
-            models.Order.type == models.OrderType.sell,
-            models.Order.status == models.StatusType.pending,
-        )
-        .order_by(models.Order.price.asc(), models.Order.created_at.asc())
-        .limit(3)
-        .all()
-    )
+    buy_stmt = statements.top_of_book(models.OrderType.buy, 3)
+    sell_stmt = statements.top_of_book(models.OrderType.sell, 3)
+    buy_orders = load_resting(db, buy_stmt)
+    sell_orders = load_resting(db, sell_stmt)
 
     def to_row(o):
         return {
             "price": o.price,
-            "remaining_quantity": o.remaining_quantity,
+            "remaining_quantity": displayed_quantity(o),  # iceberg reserve hidden
             "created_at": o.created_at.isoformat(),
-            "order_kind": getattr(o, "order_kind", "limit"),
+            "order_kind": o.order_kind or "limit",
         }
 
+    # Keep the ticker's top of book in step with every snapshot
+    ticker.update_quotes(
+        buy_orders[0].price if buy_orders else None,
+        sell_orders[0].price if sell_orders else None,
+    )
+
     return {
         "buy_orders": [to_row(o) for o in buy_orders],
         "sell_orders": [to_row(o) for o in sell_orders],
@@ -55,17 +101,7 @@ def get_trade_snapshot(db: Session, limit=5):
     """
     Returns top trades globally sorted by total trade amount (price * quantity) using SQL.
     """
-    trades = (
-        db.query(
-            models.Trade.price,
-            models.Trade.quantity,
-            (models.Trade.price * models.Trade.quantity).label("total_amount"),
-            models.Trade.created_at,
-        )
-        .order_by(desc("total_amount"))
-        .limit(limit)
-        .all()
-    )
+    trades = db.execute(statements.largest_trades(limit)).all()
 
     # Convert to list of dicts
     return [
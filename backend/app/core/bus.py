@@ -0,0 +1,222 @@
+# app/core/bus.py
+import asyncio
+import importlib
+import json
+import os
+import socket
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, List, Optional
+
+from app.core.config import settings
+from app.core.logs import logger
+
+Handler = Callable[[dict], Awaitable[None]]
+
+# Largest event we try to fit in one Unix datagram
+MAX_DATAGRAM = 256 * 1024
+
+
+class BroadcastBus(ABC):
+    """
+    Pub/sub backplane for WebSocket events.
+
+    Every event published by any worker is delivered to the handlers of every
+    worker (including the publisher), so each process can serve the sockets
+    it holds. Events are plain JSON-serialisable dicts.
+    """
+
+    def __init__(self):
+        self._handlers: List[Handler] = []
+        self.stats = {"published": 0, "delivered": 0, "errors": 0}
+
+    def subscribe(self, handler: Handler):
+        self._handlers.append(handler)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def publish(self, event: dict):
+        ...
+
+    async def _deliver(self, event: dict):
+        self.stats["delivered"] += 1
+        for handler in self._handlers:
+            try:
+                await handler(event)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Error handling bus event: {e}", exc_info=True)
+
+
+# ---- Single process ----
+class InProcessBus(BroadcastBus):
+    """Delivers straight to local handlers; the default for a single worker."""
+
+    async def publish(self, event: dict):
+        self.stats["published"] += 1
+        await self._deliver(event)
+
+
+# ---- Several workers on one host ----
+class UnixSocketBus(BroadcastBus):
+    """
+    Fan-out between worker processes on the same host.
+
+    Each worker binds a Unix datagram socket in a shared directory; publishing
+    sends one datagram to every socket found there. No extra service needed.
+    Received events are queued and delivered one at a time, in arrival order.
+    """
+
+    def __init__(self, directory: str, name: Optional[str] = None):
+        super().__init__()
+        self.directory = directory
+        self.name = name or f"worker-{os.getpid()}"
+        self.path: Optional[str] = None
+        self._sock: Optional[socket.socket] = None
+        self._inbox: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+        # Peer socket paths, re-listed when the directory changes or a send fails
+        self._peers: Optional[List[str]] = None
+        self._peers_mtime = 0
+        self.stats["dropped"] = 0
+
+    async def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{self.name}.sock")
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(self.path)
+        self._sock.setblocking(False)
+        self._inbox = asyncio.Queue()
+        self._consumer = asyncio.create_task(self._consume())
+        asyncio.get_running_loop().add_reader(self._sock.fileno(), self._on_readable)
+
+    async def stop(self):
+        if self._sock is None:
+            return
+        asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        self._consumer.cancel()
+        try:
+            await self._consumer
+        except asyncio.CancelledError:
+            pass
+        self._consumer = None
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _on_readable(self):
+        while True:
+            try:
+                data = self._sock.recv(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                event = json.loads(data)
+            except ValueError:
+                self.stats["errors"] += 1
+                continue
+            self._inbox.put_nowait(event)
+
+    async def _consume(self):
+        while True:
+            event = await self._inbox.get()
+            await self._deliver(event)
+
+    def _peer_paths(self) -> List[str]:
+        mtime = os.stat(self.directory).st_mtime_ns
+        if self._peers is None or mtime != self._peers_mtime:
+            self._peers_mtime = mtime
+            self._peers = [
+                os.path.join(self.directory, name)
+                for name in os.listdir(self.directory)
+                if name.endswith(".sock")
+            ]
+        return self._peers
+
+    async def publish(self, event: dict):
+        data = json.dumps(event).encode()
+        if len(data) > MAX_DATAGRAM:
+            self.stats["dropped"] += 1
+            logger.error(f"❌ Bus event too large ({len(data)} bytes), dropped")
+            return
+        self.stats["published"] += 1
+        for peer in self._peer_paths():
+            try:
+                self._sock.sendto(data, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker went away without cleaning up
+                self._peers = None
+                if peer != self.path:
+                    try:
+                        os.unlink(peer)
+                    except FileNotFoundError:
+                        pass
+            except BlockingIOError:
+                # Peer's receive buffer is full; it will catch up on the next tick
+                self.stats["dropped"] += 1
+
+
+# ---- External broker ----
+class BrokerAdapter(ABC):
+    """
+    Interface for an external pub/sub broker (Redis, NATS, ...).
+
+    Implementations publish raw payloads to one shared channel and call
+    `on_message` for every payload received on it, including their own.
+    """
+
+    @abstractmethod
+    async def connect(self, on_message: Callable[[bytes], Awaitable[None]]):
+        ...
+
+    @abstractmethod
+    async def publish(self, payload: bytes):
+        ...
+
+    @abstractmethod
+    async def close(self):
+        ...
+
+
+class BrokerBus(BroadcastBus):
+    def __init__(self, adapter: BrokerAdapter):
+        super().__init__()
+        self.adapter = adapter
+
+    async def start(self):
+        await self.adapter.connect(self._on_message)
+
+    async def stop(self):
+        await self.adapter.close()
+
+    async def _on_message(self, payload: bytes):
+        await self._deliver(json.loads(payload))
+
+    async def publish(self, event: dict):
+        self.stats["published"] += 1
+        await self.adapter.publish(json.dumps(event).encode())
+
+
+def create_bus() -> BroadcastBus:
+    """Build the backplane selected by BROADCAST_BUS."""
+    kind = settings.BROADCAST_BUS
+    if kind == "inprocess":
+        return InProcessBus()
+    if kind == "unix":
+        return UnixSocketBus(settings.BROADCAST_BUS_DIR)
+    if kind == "broker":
+        # "package.module:ClassName", constructed without arguments
+        module_name, _, class_name = settings.BROADCAST_BROKER_ADAPTER.partition(":")
+        adapter_cls = getattr(importlib.import_module(module_name), class_name)
+        return BrokerBus(adapter_cls())
+    raise ValueError(f"Unknown BROADCAST_BUS: {kind}")
+
+
+bus = create_bus()
@@ -0,0 +1,338 @@
+# app/core/candles.py
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.db import data_model as models
+
+
+# ---- Resolutions (finest first; each one rolls up from the previous) ----
+INTERVALS: Dict[str, int] = {
+    "1s": 1,
+    "1m": 60,
+    "5m": 300,
+    "1h": 3600,
+    "1d": 86400,
+}
+
+# Closed bars kept in memory per resolution (older bars live in `candles`)
+RING_SIZES: Dict[str, int] = {
+    "1s": 3600,  # 1 hour
+    "1m": 1440,  # 1 day
+    "5m": 2016,  # 1 week
+    "1h": 720,  # 30 days
+    "1d": 365,  # 1 year
+}
+
+
+def to_epoch(dt: datetime) -> float:
+    """Naive datetimes from the DB are treated as UTC."""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def from_epoch(ts: float) -> datetime:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).replace(tzinfo=None)
+
+
+def now_epoch() -> float:
+    return datetime.now(timezone.utc).timestamp()
+
+
+class Bar:
+    __slots__ = ("start", "open", "high", "low", "close", "volume", "trade_count")
+
+    def __init__(self, start, open_, high, low, close, volume, trade_count):
+        self.start = start
+        self.open = open_
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.trade_count = trade_count
+
+    @classmethod
+    def from_trade(cls, start: int, price: float, quantity: float) -> "Bar":
+        return cls(start, price, price, price, price, quantity, 1)
+
+    def add_trade(self, price: float, quantity: float):
+        if price > self.high:
+            self.high = price
+        if price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += quantity
+        self.trade_count += 1
+
+    def merge(self, finer: "Bar"):
+        """Fold a later, finer bar into this one."""
+        if finer.high > self.high:
+            self.high = finer.high
+        if finer.low < self.low:
+            self.low = finer.low
+        self.close = finer.close
+        self.volume += finer.volume
+        self.trade_count += finer.trade_count
+
+    def rebased(self, start: int) -> "Bar":
+        return Bar(
+            start,
+            self.open,
+            self.high,
+            self.low,
+            self.close,
+            self.volume,
+            self.trade_count,
+        )
+
+    def to_dict(self, interval: str) -> dict:
+        return {
+            "interval": interval,
+            "start": self.start,
+            "open": self.open,
+            "high": self.high,
+            "low": self.low,
+            "close": self.close,
+            "volume": self.volume,
+            "trade_count": self.trade_count,
+        }
+
+
+class _Level:
+    __slots__ = ("interval", "seconds", "closed", "current")
+
+    def __init__(self, interval: str, seconds: int, maxlen: int):
+        self.interval = interval
+        self.seconds = seconds
+        self.closed: Deque[Bar] = deque(maxlen=maxlen)
+        self.current: Optional[Bar] = None
+
+    def bucket(self, ts: float) -> int:
+        ts = int(ts)
+        return ts - ts % self.seconds
+
+
+class CandleAggregator:
+    """
+    Incremental OHLCV bars at every resolution in INTERVALS.
+
+    Fills only ever touch the 1s bar. When a bar closes it is folded into the
+    next coarser level, so each resolution is built from the one below it and
+    nothing is recomputed from raw trades.
+
+    A fill for a bar that has already closed (recorded after `advance`) is
+    folded into that closed bar, which is queued for upsert again, and
+    carried up to the coarser bars containing it. A bar is never reopened
+    at a start that has closed.
+    """
+
+    def __init__(self):
+        self._levels: List[_Level] = [
+            _Level(name, seconds, RING_SIZES[name])
+            for name, seconds in INTERVALS.items()
+        ]
+        self._by_name = {level.interval: i for i, level in enumerate(self._levels)}
+        self._unpersisted: List[Tuple[str, Bar]] = []
+        self._lock = threading.Lock()
+        self.stats = {"late_fills": 0, "late_dropped": 0}
+
+    # ---- Feeding ----
+    def add_trade(self, price: float, quantity: float, ts: float):
+        with self._lock:
+            self._add(price, quantity, ts)
+
+    def add_fills(self, fills: Iterable[Tuple[float, float, float]]) -> List[dict]:
+        """Record (price, quantity, ts) fills and return every live bar."""
+        with self._lock:
+            for price, quantity, ts in fills:
+                self._add(price, quantity, ts)
+            return self._live_bars()
+
+    def _add(self, price: float, quantity: float, ts: float):
+        base = self._levels[0]
+        start = base.bucket(ts)
+        if self._closed_at(base, start):
+            self._fold_late(0, Bar.from_trade(start, price, quantity))
+            return
+        if base.current is not None and start > base.current.start:
+            self._close(0)
+        if base.current is None:
+            base.current = Bar.from_trade(start, price, quantity)
+        else:
+            # Late fills (start < current) are folded into the open bar
+            base.current.add_trade(price, quantity)
+
+    def _close(self, idx: int):
+        level = self._levels[idx]
+        bar = level.current
+        level.current = None
+        level.closed.append(bar)
+        self._unpersisted.append((level.interval, bar))
+        if idx + 1 < len(self._levels):
+            self._roll_into(idx + 1, bar)
+
+    @staticmethod
+    def _closed_at(level: _Level, start: int) -> bool:
+        """Whether a bar starting at `start` would land in closed history."""
+        return (
+            level.current is None
+            and bool(level.closed)
+            and start <= level.closed[-1].start
+        )
+
+    def _fold_late(self, idx: int, late: Bar):
+        """
+        Merge `late` into the closed bar of level `idx` that covers it and
+        queue that bar for upsert again, then carry it to the next level. A
+        level with no bar at that start (a gap, or older than the ring) is
+        skipped; if no level takes it, the fill is dropped and counted.
+        """
+        self.stats["late_fills"] += 1
+        taken = False
+        while idx < len(self._levels):
+            level = self._levels[idx]
+            start = level.bucket(late.start)
+            if not self._closed_at(level, start):
+                # The covering bar is still open here: a normal roll-up
+                self._roll_into(idx, late)
+                return
+            for bar in reversed(level.closed):
+                if bar.start <= start:
+                    break
+            if bar.start == start:
+                bar.merge(late)
+                self._unpersisted.append((level.interval, bar))
+                taken = True
+            idx += 1
+        if not taken:
+            self.stats["late_dropped"] += 1
+
+    def _roll_into(self, idx: int, bar: Bar):
+        level = self._levels[idx]
+        start = level.bucket(bar.start)
+        if self._closed_at(level, start):
+            self._fold_late(idx, bar)
+            return
+        if level.current is not None and start > level.current.start:
+            self._close(idx)
+        if level.current is None:
+            level.current = bar.rebased(start)
+        else:
+            level.current.merge(bar)
+
+    def advance(self, now: Optional[float] = None):
+        """Close every bar whose period has fully elapsed."""
+        now = now_epoch() if now is None else now
+        with self._lock:
+            for idx, level in enumerate(self._levels):
+                if level.current is not None and level.current.start + level.seconds <= now:
+                    self._close(idx)
+
+    # ---- Reading ----
+    def _pending(self, idx: int) -> List[Bar]:
+        """Bars of level `idx` that are still open, including finer live data."""
+        level = self._levels[idx]
+        bars = [level.current.rebased(level.current.start)] if level.current else []
+        if idx == 0:
+            return bars
+        for finer in self._pending(idx - 1):
+            start = level.bucket(finer.start)
+            if bars and bars[-1].start == start:
+                bars[-1].merge(finer)
+            else:
+                bars.append(finer.rebased(start))
+        return bars
+
+    def _live_bars(self) -> List[dict]:
+        live = []
+        for idx, level in enumerate(self._levels):
+            pending = self._pending(idx)
+            if pending:
+                live.append(pending[-1].to_dict(level.interval))
+        return live
+
+    def get_candles(
+        self,
+        interval: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        limit: int = 500,
+    ) -> List[dict]:
+        idx = self._by_name[interval]
+        with self._lock:
+            bars = list(self._levels[idx].closed) + self._pending(idx)
+        return [
+            b.to_dict(interval)
+            for b in bars
+            if (start is None or b.start >= start) and (end is None or b.start <= end)
+        ][-limit:]
+
+    def oldest(self, interval: str) -> Optional[int]:
+        """Start of the oldest bar still held in memory for `interval`."""
+        level = self._levels[self._by_name[interval]]
+        with self._lock:
+            if level.closed:
+                return level.closed[0].start
+            pending = self._pending(self._by_name[interval])
+        return pending[0].start if pending else None
+
+    # ---- Persistence ----
+    def drain_closed(self) -> List[Tuple[str, Bar]]:
+        with self._lock:
+            bars, self._unpersisted = self._unpersisted, []
+        return bars
+
+    def load(self, db: Session):
+        """Warm the ring buffers from the `candles` table on startup."""
+        with self._lock:
+            for level in self._levels:
+                rows = (
+                    db.query(models.Candle)
+                    .filter(models.Candle.interval == level.interval)
+                    .order_by(models.Candle.bucket_start.desc())
+                    .limit(level.closed.maxlen)
+                    .all()
+                )
+                level.closed.clear()
+                for row in reversed(rows):
+                    level.closed.append(candle_to_bar(row))
+
+
+def candle_to_bar(row: models.Candle) -> Bar:
+    return Bar(
+        int(to_epoch(row.bucket_start)),
+        row.open,
+        row.high,
+        row.low,
+        row.close,
+        row.volume,
+        row.trade_count,
+    )
+
+
+def persist_closed_candles(db: Session, aggregator: "CandleAggregator") -> int:
+    """Upsert closed bars into `candles`; returns the number written."""
+    aggregator.advance()
+    bars = aggregator.drain_closed()
+    for interval, bar in bars:
+        db.merge(
+            models.Candle(
+                interval=interval,
+                bucket_start=from_epoch(bar.start),
+                open=bar.open,
+                high=bar.high,
+                low=bar.low,
+                close=bar.close,
+                volume=bar.volume,
+                trade_count=bar.trade_count,
+            )
+        )
+    db.commit()
+    return len(bars)
+
+
+candle_aggregator = CandleAggregator()
@@ -12,6 +12,117 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = Field(60, env="ACCESS_TOKEN_EXPIRE_MINUTES")
     REFRESH_TOKEN_EXPIRE_DAYS: int = Field(7, env="REFRESH_TOKEN_EXPIRE_DAYS")
 
+    # Connection pools (URLs stay in DATABASE_URL / READ_DATABASE_URL)
+    DB_POOL_SIZE: int = Field(10, env="DB_POOL_SIZE")  # request handlers
+    DB_MAX_OVERFLOW: int = Field(20, env="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: int = Field(50, env="DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE: int = Field(1800, env="DB_POOL_RECYCLE")  # seconds; -1 = never
+    DB_POOL_PRE_PING: bool = Field(
+        False, env="DB_POOL_PRE_PING"
+    )  # costs a round trip per checkout
+    WORKER_DB_POOL_SIZE: int = Field(2, env="WORKER_DB_POOL_SIZE")  # background jobs
+    READ_DB_POOL_SIZE: int = Field(10, env="READ_DB_POOL_SIZE")  # read-only endpoints
+    READ_DB_MAX_OVERFLOW: int = Field(10, env="READ_DB_MAX_OVERFLOW")
+    READ_DB_POOL_TIMEOUT: int = Field(5, env="READ_DB_POOL_TIMEOUT")
+
+    # Market data
+    MARKET_DATA_FLUSH_INTERVAL_MS: int = Field(
+        50, env="MARKET_DATA_FLUSH_INTERVAL_MS"
+    )  # book/trade/ticker feeds are published at most once per interval
+
+    # Cross-worker broadcast bus: "inprocess" (one worker), "unix" (workers on
+    # one host) or "broker" (external pub/sub via BROADCAST_BROKER_ADAPTER)
+    BROADCAST_BUS: str = Field("inprocess", env="BROADCAST_BUS")
+    BROADCAST_BUS_DIR: str = Field("/tmp/trading_bus", env="BROADCAST_BUS_DIR")
+    BROADCAST_BROKER_ADAPTER: str = Field(
+        "", env="BROADCAST_BROKER_ADAPTER"
+    )  # "package.module:AdapterClass"
+
+    # Wallet ledger: unapplied entries are folded into `wallets` this often
+    LEDGER_COMPACTION_INTERVAL_S: int = Field(5, env="LEDGER_COMPACTION_INTERVAL_S")
+    LEDGER_COMPACTION_BATCH: int = Field(5000, env="LEDGER_COMPACTION_BATCH")
+
+    # Reservation reconciliation: report drift, or also fix it when REPAIR is on
+    RECONCILE_INTERVAL_S: int = Field(60, env="RECONCILE_INTERVAL_S")
+    RECONCILE_REPAIR: bool = Field(False, env="RECONCILE_REPAIR")
+
+    # Order expiry (GTT/GTD/day): a timer wheel ticked by a background job
+    EXPIRY_TICK_S: float = Field(1.0, env="EXPIRY_TICK_S")  # wheel resolution
+    EXPIRY_BATCH: int = Field(500, env="EXPIRY_BATCH")  # orders per transaction
+    DAY_ORDER_CUTOFF_UTC: str = Field(
+        "00:00", env="DAY_ORDER_CUTOFF_UTC"
+    )  # HH:MM session close; day and GTD orders expire here
+
+    # Idempotent order entry: recent (user, client_order_id) results kept in memory
+    ORDER_DEDUPE_CACHE_SIZE: int = Field(100_000, env="ORDER_DEDUPE_CACHE_SIZE")
+    ORDER_DEDUPE_TTL_S: int = Field(
+        600, env="ORDER_DEDUPE_TTL_S"
+    )  # older retries fall through to the DB unique constraint
+
+    # Pre-trade risk: checked in memory before any reservation hits the DB
+    RISK_MAX_OPEN_ORDERS: int = Field(500, env="RISK_MAX_OPEN_ORDERS")  # per user
+    RISK_MAX_ORDER_NOTIONAL: float = Field(
+        1_000_000.0, env="RISK_MAX_ORDER_NOTIONAL"
+    )  # price * quantity of one limit order; 0 disables
+    RISK_PRICE_BAND_PCT: float = Field(
+        0.2, env="RISK_PRICE_BAND_PCT"
+    )  # max distance from the last trade price; 0 disables
+    RISK_CACHE_SIZE: int = Field(100_000, env="RISK_CACHE_SIZE")  # users kept
+    RISK_CACHE_TTL_S: float = Field(
+        30.0, env="RISK_CACHE_TTL_S"
+    )  # entries older than this are reloaded before use
+    RISK_REFRESH_S: float = Field(
+        1.0, env="RISK_REFRESH_S"
+    )  # a reject reloads the entry first if it is at least this old
+
+    # Admission control: token buckets per (endpoint class, user or client IP)
+    RATE_LIMIT_ENABLED: bool = Field(True, env="RATE_LIMIT_ENABLED")
+    RATE_LIMITS: str = Field(
+        "orders=10/20,cancels=20/40,reads=20/60,auth=1/10", env="RATE_LIMITS"
+    )  # class=tokens per second/burst
+    RATE_LIMIT_IDLE_S: int = Field(
+        300, env="RATE_LIMIT_IDLE_S"
+    )  # buckets untouched this long are dropped
+    RATE_LIMIT_MAX_BUCKETS: int = Field(100_000, env="RATE_LIMIT_MAX_BUCKETS")
+    TRUSTED_PROXIES: str = Field(
+        "", env="TRUSTED_PROXIES"
+    )  # IPs/CIDRs whose X-Real-IP / X-Forwarded-For name the client
+
+    # Shared-memory rings between API workers and a matching process
+    ENGINE_RING_PREFIX: str = Field("exchange", env="ENGINE_RING_PREFIX")
+    ENGINE_RING_CAPACITY: int = Field(
+        4096, env="ENGINE_RING_CAPACITY"
+    )  # records per ring; a power of two
+
+    # Garbage collection, tuned once startup has loaded long-lived state
+    GC_TUNING: bool = Field(True, env="GC_TUNING")
+    GC_THRESHOLDS: str = Field(
+        "50000,20,100", env="GC_THRESHOLDS"
+    )  # gen0,gen1,gen2; CPython's default is 700,10,10
+    GC_FREEZE: bool = Field(True, env="GC_FREEZE")  # startup objects never rescanned
+
+    # Logging: records are queued and written as JSON lines by a listener thread
+    LOG_FORMAT: str = Field("json", env="LOG_FORMAT")  # "json" or "text"
+    LOG_LEVEL: str = Field("DEBUG", env="LOG_LEVEL")  # the `backend` logger
+    LOG_LEVELS: str = Field(
+        "", env="LOG_LEVELS"
+    )  # per-logger overrides: "backend.sql=INFO,apscheduler=WARNING"
+    LOG_QUEUE_SIZE: int = Field(10_000, env="LOG_QUEUE_SIZE")  # full -> dropped
+    LOG_SAMPLE_LIMIT: int = Field(
+        20, env="LOG_SAMPLE_LIMIT"
+    )  # records per call site per window; 0 disables sampling
+    LOG_SAMPLE_WINDOW_S: float = Field(10.0, env="LOG_SAMPLE_WINDOW_S")
+    SQL_COMPILED_CACHE_SIZE: int = Field(
+        1200, env="SQL_COMPILED_CACHE_SIZE"
+    )  # per engine; SQLAlchemy's default is 500
+    SQL_PREPARE_THRESHOLD: int = Field(
+        2, env="SQL_PREPARE_THRESHOLD"
+    )  # psycopg 3 only: prepare server-side after N executions
+    SQL_ECHO: bool = Field(False, env="SQL_ECHO")  # log every statement
+    SQL_SLOW_QUERY_MS: int = Field(
+        0, env="SQL_SLOW_QUERY_MS"
+    )  # log statements slower than this; 0 disables
+
     # OAuth2 scheme (this can stay hardcoded)
     oauth2_scheme: ClassVar[OAuth2PasswordBearer] = OAuth2PasswordBearer(
         tokenUrl="/auth/login"
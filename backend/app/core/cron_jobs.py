@@ -1,40 +1,234 @@
-from app.db.session import SessionLocal
-from sqlalchemy.orm import Session
+import threading
+import time
+from typing import Optional
+
+from app.db.session import WorkerSessionLocal
 from app.db import data_model as models
-from app.core.order_matching import match_orders
+from app.core.stops import match_with_stops, stop_book
+from app.core.candles import candle_aggregator, persist_closed_candles
+from app.core.market_data import trade_fills
+from app.core.publisher import publisher
 from app.core.broadcasts import (
-    get_order_book_snapshot,
-    broadcast_order_book,
-    get_trade_snapshot,
-    broadcast_trade_book,
+    broadcast_match_updates,
+    send_order_update,
+    send_wallet_update,
 )
+from app.core.expiry import expire_orders, expiry_wheel
+from app.core.risk import risk
+from app.core.auction import auction
+from app.core.wallet_service import compact_ledger
+from app.core.reconciliation import reconciler
+from app.core.config import settings
+from app.core.logs import logger
+
+
+class JobProgress:
+    """
+    Overlap guard and progress counters for one background job.
+
+    `begin` never blocks: if the previous run is still going, the new one is
+    skipped and counted instead of queueing behind it.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._running = threading.Lock()
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.total = 0  # items in the current/last sweep
+        self.processed = 0
+        self.trades = 0
+        self.started_at: Optional[float] = None
+        self.last_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    def begin(self) -> bool:
+        if not self._running.acquire(blocking=False):
+            self.skipped += 1
+            logger.warning(f"⏭️ {self.name} still running; skipping this run")
+            return False
+        self.runs += 1
+        self.total = self.processed = self.trades = 0
+        self.started_at = time.time()
+        return True
+
+    def end(self, error: Exception = None):
+        self.last_duration = time.time() - self.started_at
+        if error is not None:
+            self.failures += 1
+            self.last_error = str(error)
+        self._running.release()
+
+    @property
+    def running(self) -> bool:
+        return self._running.locked()
+
+    def as_dict(self) -> dict:
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "total": self.total,
+            "processed": self.processed,
+            "trades": self.trades,
+            "started_at": self.started_at,
+            "last_duration": self.last_duration,
+            "last_error": self.last_error,
+        }
+
+
+matching_progress = JobProgress("process_pending_orders_job")
+candles_progress = JobProgress("persist_candles_job")
+ledger_progress = JobProgress("compact_ledger_job")
+reconcile_progress = JobProgress("reconcile_reservations_job")
+expiry_progress = JobProgress("expire_orders_job")
 
 
 def process_pending_orders_job():
     """Background cron job to process pending orders."""
-    db = SessionLocal()
+    if auction.active:
+        return  # orders accumulate until the auction is uncrossed
+    if not matching_progress.begin():
+        return
+    error = None
+    db = WorkerSessionLocal()
     try:
-        pending_orders = (
-            db.query(models.Order)
+        # Picks up stops placed or cancelled by other processes
+        stop_book.load(db)
+        pending_ids = [
+            row.id
+            for row in db.query(models.Order.id)
             .filter(models.Order.status == "pending")
             .order_by(models.Order.created_at.asc())
-            .all()
-        )
+        ]
+        matching_progress.total = len(pending_ids)
+
+        for order_id in pending_ids:
+            # match_orders locks and reloads the row itself; stops the
+            # fills trigger are activated and matched in the same transaction
+            trades = match_with_stops(db, order_id)
+            fills = trade_fills(trades)  # created_at came back with the INSERT
+            db.commit()
+            if trades:
+                publisher.add_fills(fills)
+                broadcast_match_updates(trades)
+            matching_progress.processed += 1
+            matching_progress.trades += len(trades)
+
+        if matching_progress.trades > 0:
+            # Published by the conflating publisher on its next tick
+            publisher.mark_book_dirty()
+    except Exception as e:
+        error = e
+        db.rollback()
+        logger.error(f"❌ Error processing pending orders: {e}", exc_info=True)
+    finally:
+        db.close()
+        matching_progress.end(error)
+
 
-        total_trades = 0
-        for order in pending_orders:
-            trades = match_orders(db, order)
+def expire_orders_job():
+    """Background job to tick the expiry wheel and expire what came due."""
+    due = expiry_wheel.advance()
+    if not due:
+        return  # idle ticks cost one empty bucket and no DB session
+    if not expiry_progress.begin():
+        for order_id in due:
+            expiry_wheel.schedule(order_id, 0)
+        return
+    error = None
+    db = WorkerSessionLocal()
+    try:
+        expiry_progress.total = len(due)
+        batch_size = settings.EXPIRY_BATCH
+        for start in range(0, len(due), batch_size):
+            batch = due[start : start + batch_size]
+            order_updates, wallets = expire_orders(db, batch)
             db.commit()
-            db.refresh(order)
-            for t in trades:
-                db.refresh(t)
-            total_trades += len(trades)
-
-        if total_trades > 0:
-            # Broadcast after batch
-            order_book = get_order_book_snapshot(db)
-            broadcast_order_book(order_book)
-            trade_book = get_trade_snapshot(db)
-            broadcast_trade_book(trade_book)
+            for user_id, states in order_updates.items():
+                for state in states:
+                    stop_book.discard(state["id"])
+                    risk.on_released(user_id, wallets[user_id])
+                    send_order_update(user_id, state)
+                send_wallet_update(user_id, wallets[user_id])
+            expiry_progress.processed += len(batch)
+        # Expired orders leave the book; published on the next tick
+        publisher.mark_book_dirty()
+    except Exception as e:
+        error = e
+        db.rollback()
+        # The wheel already gave these up; retry them on the next tick
+        for order_id in due[expiry_progress.processed :]:
+            expiry_wheel.schedule(order_id, 0)
+        logger.error(f"❌ Error expiring orders: {e}", exc_info=True)
+    finally:
+        db.close()
+        expiry_progress.end(error)
+
+
+def persist_candles_job():
+    """Background cron job to flush closed candles into the `candles` table."""
+    if not candles_progress.begin():
+        return
+    error = None
+    db = WorkerSessionLocal()
+    try:
+        candles_progress.processed = persist_closed_candles(db, candle_aggregator)
+    except Exception as e:
+        error = e
+        db.rollback()
+        logger.error(f"❌ Error persisting candles: {e}", exc_info=True)
+    finally:
+        db.close()
+        candles_progress.end(error)
+
+
+def compact_ledger_job():
+    """Background cron job to fold unapplied ledger entries into `wallets`."""
+    if not ledger_progress.begin():
+        return
+    error = None
+    db = WorkerSessionLocal()
+    try:
+        # Drain in batches so one transaction never holds many wallet rows
+        while True:
+            folded = compact_ledger(db, settings.LEDGER_COMPACTION_BATCH)
+            db.commit()
+            ledger_progress.processed += folded
+            if folded < settings.LEDGER_COMPACTION_BATCH:
+                break
+    except Exception as e:
+        error = e
+        db.rollback()
+        logger.error(f"❌ Error compacting wallet ledger: {e}", exc_info=True)
+    finally:
+        db.close()
+        ledger_progress.end(error)
+
+
+def reconcile_reservations_job():
+    """Background cron job to check reservations against pending orders."""
+    if not reconcile_progress.begin():
+        return
+    error = None
+    db = WorkerSessionLocal()
+    try:
+        report = reconciler.run(db, repair=settings.RECONCILE_REPAIR)
+        db.commit()
+        reconcile_progress.total = report["checked"]
+        reconcile_progress.processed = report["checked"]
+        if report["mismatched"]:
+            action = "repaired" if settings.RECONCILE_REPAIR else "found"
+            logger.warning(
+                f"⚠️ Reservation drift {action} for {report['mismatched']} users, "
+                f"e.g. {report['mismatches'][:3]}"
+            )
+    except Exception as e:
+        error = e
+        db.rollback()
+        logger.error(f"❌ Error reconciling reservations: {e}", exc_info=True)
     finally:
         db.close()
+        reconcile_progress.end(error)
@@ -0,0 +1,118 @@
+# app/core/event_bridge.py
+import asyncio
+import itertools
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Hashable, List, Optional
+
+from app.core.logs import logger
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+class EventBridge:
+    """
+    Non-blocking hand-off from synchronous code to the event loop.
+
+    `publish` can be called from request handlers, the scheduler or any worker
+    thread: it only appends to a bounded queue and, if the loop is idle, wakes
+    it with `call_soon_threadsafe`. The loop drains the queue in batches into
+    the handler (the broadcast bus), so matching never waits on sockets.
+
+    Events published with a `key` are conflated: while one with the same key is
+    still queued, a newer event replaces it in place.
+    """
+
+    def __init__(self, max_pending: int = 10_000, batch_size: int = 256):
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._handler: Optional[Handler] = None
+        self._lock = threading.Lock()
+        self._queue: Deque[list] = deque()  # [key, event] entries
+        self._by_key: Dict[Hashable, list] = {}
+        self._scheduled = False
+        self._ids = itertools.count()
+        self.stats = {
+            "published": 0,
+            "delivered": 0,
+            "batches": 0,
+            "conflated": 0,
+            "dropped": 0,
+            "errors": 0,
+        }
+
+    def bind(self, loop: asyncio.AbstractEventLoop, handler: Handler):
+        """Attach to the loop that owns the sockets (called once at startup)."""
+        self._loop = loop
+        self._handler = handler
+
+    def unbind(self):
+        self._loop = None
+        self._handler = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    # ---- Any thread ----
+    def publish(self, event: dict, key: Optional[Hashable] = None) -> bool:
+        """Queue an event; returns False if it was dropped."""
+        loop = self._loop
+        with self._lock:
+            self.stats["published"] += 1
+            if loop is None or loop.is_closed():
+                self.stats["dropped"] += 1
+                return False
+            if key is not None and key in self._by_key:
+                self._by_key[key][1] = event
+                self.stats["conflated"] += 1
+                return True
+            if len(self._queue) >= self.max_pending:
+                self.stats["dropped"] += 1
+                return False
+
+            entry = [key if key is not None else next(self._ids), event]
+            self._queue.append(entry)
+            if key is not None:
+                self._by_key[key] = entry
+            wake = not self._scheduled
+            self._scheduled = True
+
+        if wake:
+            loop.call_soon_threadsafe(self._schedule_drain)
+        return True
+
+    # ---- Event loop ----
+    def _schedule_drain(self):
+        asyncio.ensure_future(self._drain())
+
+    def _take_batch(self) -> List[dict]:
+        with self._lock:
+            batch = []
+            while self._queue and len(batch) < self.batch_size:
+                key, event = self._queue.popleft()
+                self._by_key.pop(key, None)
+                batch.append(event)
+            if not batch:
+                self._scheduled = False
+            return batch
+
+    async def _drain(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            self.stats["batches"] += 1
+            for event in batch:
+                try:
+                    await self._handler(event)
+                    self.stats["delivered"] += 1
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logger.error(f"❌ Error delivering event: {e}", exc_info=True)
+            # Let request handlers run between batches
+            await asyncio.sleep(0)
+
+
+bridge = EventBridge()
@@ -0,0 +1,204 @@
+# app/core/expiry.py
+import math
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, time as dtime, timedelta, timezone
+from typing import Hashable, List, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.db import data_model as models
+from app.core import wallet_service
+from app.core.config import settings
+from app.core.order_matching import order_state
+
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel: `levels` wheels of `slots` buckets each,
+    level l covering slots**(l+1) ticks.
+
+    A timer goes in the coarsest bucket its distance needs; when the wheel
+    below wraps, that bucket is cascaded down a level. Scheduling and
+    cancelling are O(1), each timer is cascaded at most `levels - 1` times,
+    and a tick with nothing due only looks at one empty bucket. Timers
+    beyond the top wheel's range park in its last bucket and are re-filed
+    when it cascades.
+
+    Deadlines are rounded up to whole ticks, so nothing fires early.
+    """
+
+    def __init__(
+        self,
+        tick: float = 1.0,
+        slots: int = 64,
+        levels: int = 4,
+        start: Optional[float] = None,
+    ):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self._spans = [slots**level for level in range(levels + 1)]
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._where = {}  # key -> bucket holding it
+        self._now = math.floor((time.time() if start is None else start) / tick)
+        self._lock = threading.Lock()
+        self.stats = {"scheduled": 0, "cancelled": 0, "fired": 0, "cascaded": 0}
+
+    def _file(self, key: Hashable, due: int):
+        delta = due - self._now
+        for level in range(self.levels):
+            if delta < self._spans[level + 1]:
+                break
+        else:
+            level, delta = self.levels - 1, self._spans[self.levels] - 1
+        index = ((self._now + delta) // self._spans[level]) % self.slots
+        bucket = self._wheels[level][index]
+        bucket[key] = due
+        self._where[key] = bucket
+
+    def schedule(self, key: Hashable, deadline: float):
+        """Fire `key` at `deadline` (same clock as `advance`); replaces any timer."""
+        with self._lock:
+            self._pop(key)
+            due = max(math.ceil(deadline / self.tick), self._now + 1)
+            self._file(key, due)
+            self.stats["scheduled"] += 1
+
+    def _pop(self, key: Hashable) -> bool:
+        bucket = self._where.pop(key, None)
+        if bucket is None:
+            return False
+        del bucket[key]
+        return True
+
+    def cancel(self, key: Hashable):
+        with self._lock:
+            if self._pop(key):
+                self.stats["cancelled"] += 1
+
+    def advance(self, now: Optional[float] = None) -> List[Hashable]:
+        """Move the wheel up to `now` and return the keys that came due."""
+        target = math.floor((time.time() if now is None else now) / self.tick)
+        fired = []
+        with self._lock:
+            while self._now < target:
+                self._now += 1
+                # Cascade the coarser wheels that just wrapped, top down
+                for level in range(self.levels - 1, 0, -1):
+                    if self._now % self._spans[level] == 0:
+                        index = (self._now // self._spans[level]) % self.slots
+                        bucket = self._wheels[level][index]
+                        self._wheels[level][index] = {}
+                        for key, due in bucket.items():
+                            self._file(key, due)
+                        self.stats["cascaded"] += len(bucket)
+                index = self._now % self.slots
+                bucket = self._wheels[0][index]
+                if bucket:
+                    self._wheels[0][index] = {}
+                    for key in bucket:
+                        del self._where[key]
+                    fired.extend(bucket)
+            self.stats["fired"] += len(fired)
+        return fired
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+
+expiry_wheel = TimerWheel(tick=settings.EXPIRY_TICK_S)
+
+
+# ---- Deadlines ----
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _next_close(after: datetime) -> datetime:
+    """The first session close strictly after `after`."""
+    hour, _, minute = settings.DAY_ORDER_CUTOFF_UTC.partition(":")
+    close = datetime.combine(after.date(), dtime(int(hour), int(minute or 0)))
+    return close if close > after else close + timedelta(days=1)
+
+
+def resolve_expiry(
+    time_in_force: str, expires_at: Optional[datetime], now: Optional[datetime] = None
+) -> Optional[datetime]:
+    """
+    When an order expires, as naive UTC like the other timestamps:
+    gtc never, gtt at `expires_at`, gtd at the first session close after
+    its date begins (the end of that date with a midnight cutoff), day at
+    the next session close.
+    """
+    now = now or utcnow()
+    if expires_at is not None and expires_at.tzinfo is not None:
+        expires_at = expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+    if time_in_force == "gtt":
+        return expires_at
+    if time_in_force == "gtd":
+        return _next_close(datetime.combine(expires_at.date(), dtime()))
+    if time_in_force == "day":
+        return _next_close(now)
+    return None
+
+
+def schedule(order_id: str, expires_at: Optional[datetime], wheel=expiry_wheel):
+    if expires_at is not None:
+        wheel.schedule(order_id, expires_at.replace(tzinfo=timezone.utc).timestamp())
+
+
+def load(db: Session, wheel=expiry_wheel) -> int:
+    """Schedule every open order with a deadline (startup)."""
+    rows = db.query(models.Order.id, models.Order.expires_at).filter(
+        models.Order.status.in_(models.OPEN_STATUSES),
+        models.Order.expires_at.isnot(None),
+    )
+    count = 0
+    for row in rows:
+        schedule(row.id, row.expires_at, wheel)
+        count += 1
+    return count
+
+
+# ---- Expiry ----
+def expire_orders(db: Session, order_ids: List[str]):
+    """
+    Expire the given orders if they are still open and release what they
+    reserve: one conditional UPDATE claims the rows and one INSERT writes
+    all the release entries. Orders filled or cancelled since they were
+    scheduled are skipped. Returns (order updates, wallet states); the
+    caller commits.
+    """
+    Order = models.Order
+    rows = db.execute(
+        update(Order)
+        .where(Order.id.in_(order_ids), Order.status.in_(models.OPEN_STATUSES))
+        .values(status=models.StatusType.expired)
+        .returning(
+            Order.id,
+            Order.user_id,
+            Order.type,
+            Order.price,
+            Order.quantity,
+            Order.remaining_quantity,
+            Order.status,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    releases = []
+    order_updates = defaultdict(list)
+    for row in rows:
+        if row.type == models.OrderType.buy:
+            amount = (row.price or 0.0) * row.remaining_quantity
+        else:
+            amount = row.remaining_quantity
+        releases.append((row.user_id, row.type, amount, row.id))
+        order_updates[row.user_id].append(order_state(row))
+    wallet_service.release_orders(db, releases)
+    if not rows:
+        return order_updates, {}
+    return order_updates, wallet_service.get_wallet_states(db, list(order_updates))
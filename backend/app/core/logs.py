@@ -1,9 +1,21 @@
+import atexit
+import copy
+import json
 import logging
-from logging.handlers import RotatingFileHandler
 import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from app.core.config import settings
 
 
 # ---- Logging setup ----
+# Callers only pay for a dict copy and a queue put: a listener thread does the
+# JSON encoding and file/console I/O. Repeated messages from one call site are
+# sampled so a hot loop can't flood the queue.
 LOG_DIR = "logs"
 os.makedirs(LOG_DIR, exist_ok=True)
 
@@ -11,7 +23,110 @@ os.makedirs(LOG_DIR, exist_ok=True)
 info_log_file = os.path.join(LOG_DIR, "app_info.log")
 error_log_file = os.path.join(LOG_DIR, "app_error.log")
 
-# Create handlers
+# Attributes every LogRecord has; anything else came in via `extra=`
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through at most `limit` records per call site per `window` seconds.
+    The first record after a suppressed stretch carries `suppressed=<n>`.
+    """
+
+    def __init__(self, limit: int, window: float):
+        super().__init__()
+        self.limit = limit
+        self.window = window
+        self._lock = threading.Lock()
+        self._sites = {}  # (logger, level, file, line) -> [window_start, seen, dropped]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.limit <= 0:
+            return True
+        key = (record.name, record.levelno, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                dropped = site[2] if site else 0
+                self._sites[key] = [now, 1, 0]
+                if dropped:
+                    record.suppressed = dropped
+                return True
+            site[1] += 1
+            if site[1] <= self.limit:
+                return True
+            site[2] += 1
+            return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve message and traceback now, but leave JSON encoding to the
+        # listener thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _parse_levels(spec: str) -> dict:
+    """Parse "sqlalchemy.engine=WARNING,apscheduler=INFO" into {name: level}."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+formatter = (
+    JsonFormatter()
+    if settings.LOG_FORMAT == "json"
+    else logging.Formatter(
+        "%(asctime)s [%(levelname)s] %(name)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+)
+
+# Create handlers (run on the listener thread)
 info_handler = RotatingFileHandler(info_log_file, maxBytes=5*1024*1024, backupCount=5)
 info_handler.setLevel(logging.DEBUG)   # will include DEBUG + INFO + WARNING
 
@@ -21,19 +136,44 @@ error_handler.setLevel(logging.ERROR)  # only ERROR + CRITICAL
 console_handler = logging.StreamHandler()  # keep showing in terminal
 console_handler.setLevel(logging.INFO)
 
-# Formatter
-formatter = logging.Formatter(
-    "%(asctime)s [%(levelname)s] %(name)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
+for handler in (info_handler, error_handler, console_handler):
+    handler.setFormatter(formatter)
+
+log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+queue_handler = NonBlockingQueueHandler(log_queue)
+queue_handler.addFilter(
+    SamplingFilter(settings.LOG_SAMPLE_LIMIT, settings.LOG_SAMPLE_WINDOW_S)
+)
+listener = QueueListener(
+    log_queue, info_handler, error_handler, console_handler, respect_handler_level=True
 )
-info_handler.setFormatter(formatter)
-error_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
+listener.start()
+atexit.register(listener.stop)
 
 # Root logger
 logger = logging.getLogger("backend")
-logger.setLevel(logging.DEBUG)  # capture everything
-logger.addHandler(info_handler)
-logger.addHandler(error_handler)
-logger.addHandler(console_handler)
+logger.setLevel(settings.LOG_LEVEL.upper())
+logger.addHandler(queue_handler)
+logger.propagate = False
+
+# Slow-query log; sampled like any other call site
+sql_logger = logging.getLogger("backend.sql")
+
+# SQLAlchemy echo and scheduler output share the queue, unsampled
+sql_queue_handler = NonBlockingQueueHandler(log_queue)
+for name in ("sqlalchemy.engine", "apscheduler"):
+    logging.getLogger(name).addHandler(sql_queue_handler)
+    logging.getLogger(name).propagate = False
+if settings.SQL_ECHO:
+    # Same output as create_engine(echo=True), minus its synchronous handler
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+for name, level in _parse_levels(settings.LOG_LEVELS).items():
+    logging.getLogger(name).setLevel(level)
+
 
+def log_stats() -> dict:
+    return {
+        "queued": log_queue.qsize(),
+        "dropped": queue_handler.dropped + sql_queue_handler.dropped,
+    }
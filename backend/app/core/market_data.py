@@ -0,0 +1,32 @@
+# app/core/market_data.py
+from typing import Iterable, List, Tuple
+
+from app.db import data_model as models
+from app.core.candles import candle_aggregator, now_epoch, to_epoch
+from app.core.ticker import ticker
+
+Fill = Tuple[float, float, float]  # (price, quantity, epoch seconds)
+
+
+def trade_fills(trades: Iterable[models.Trade]) -> List[Fill]:
+    """Flatten committed trades into plain fills that can cross process lines."""
+    return [
+        (
+            float(t.price),
+            float(t.quantity),
+            to_epoch(t.created_at) if t.created_at else now_epoch(),
+        )
+        for t in trades
+    ]
+
+
+def record_fills(fills: Iterable[Fill]) -> dict:
+    """
+    Feed fills from `match_orders` into the market-data views.
+    Returns the updated live candles and ticker for broadcasting.
+    """
+    fills = list(fills)
+    for price, quantity, ts in fills:
+        ticker.add_trade(price, quantity, ts)
+    candles = candle_aggregator.add_fills(fills)
+    return {"candles": candles, "ticker": ticker.snapshot()}
@@ -0,0 +1,55 @@
+# app/core/order_dedupe.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.core.config import settings
+
+
+class DedupeCache:
+    """
+    Bounded LRU of recent results, keyed by (user_id, client_order_id).
+
+    A retried submission is answered from here without touching the
+    database. Entries expire after `ttl` seconds and the least recently
+    used ones are evicted past `maxsize`; anything that falls out is still
+    caught by the (user_id, client_order_id) unique constraint on orders.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "backstop_hits": 0, "evicted": 0}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._clock() - entry[0] > self.ttl:
+                if entry is not None:
+                    del self._entries[key]
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any, backstop: bool = False):
+        """Remember `value`; `backstop` marks one recovered from the DB."""
+        with self._lock:
+            if backstop:
+                self.stats["backstop_hits"] += 1
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evicted"] += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+order_dedupe = DedupeCache(settings.ORDER_DEDUPE_CACHE_SIZE, settings.ORDER_DEDUPE_TTL_S)
@@ -1,35 +1,11 @@
 # app/core/order_matching.py
 from sqlalchemy.orm import Session
-from sqlalchemy import asc, desc
 from app.db import data_model as models
+from app.db import statements
+from app.core import wallet_service
+from app.core.book import load_resting, write_back
 from decimal import Decimal
-
-
-def _best_opposite_query(db: Session, side, order_kind_field="order_kind"):
-    """
-    Returns a query for the best opposite pending order with FOR UPDATE SKIP LOCKED.
-    We fetch only ONE row (the best) each loop.
-    """
-
-    base_query = (
-        db.query(models.Order)
-        .filter(
-            models.Order.status == models.StatusType.pending
-        )  # ✅ only pending orders
-        .with_for_update(skip_locked=True)
-    )
-
-    if side == models.OrderType.buy:
-        # new is BUY -> we need best SELL (lowest price first, FIFO on tie)
-        q = base_query.filter(models.Order.type == models.OrderType.sell).order_by(
-            asc(models.Order.price), asc(models.Order.created_at)
-        )
-    else:
-        # new is SELL -> we need best BUY (highest price first, FIFO on tie)
-        q = base_query.filter(models.Order.type == models.OrderType.buy).order_by(
-            desc(models.Order.price), asc(models.Order.created_at)
-        )
-    return q
+import uuid
 
 
 def _compatible_prices(new_order: models.Order, opp: models.Order) -> bool:
@@ -69,28 +45,77 @@ def _execution_price(new_order: models.Order, opp: models.Order) -> Decimal:
     raise ValueError("Both orders are market; no execution price defined.")
 
 
-def match_orders(db: Session, new_order: models.Order):
+class MatchResult(list):
     """
-    Scan the whole opposite order book once for this new_order.
-    Match as much as possible in price-time priority.
+    Executed trades, plus the latest wallet and order state of everyone
+    involved so callers can push private updates once the session commits.
     """
 
-    wallet_broadcasts = []
-    trade_broadcasts = []
-    executed_trades = []
+    def __init__(self):
+        super().__init__()
+        self.wallet_updates = {}  # user_id -> wallet state
+        self.order_updates = {}  # order_id -> (user_id, order state)
 
-    # Lock the new order row
-    new_order = (
-        db.query(models.Order)
-        .filter(models.Order.id == new_order.id)
-        .with_for_update()
-        .one()
-    )
 
-    # Fetch ALL opposite orders in priority order
-    opposite_orders = _best_opposite_query(db, new_order.type).all()
+def displayed_quantity(order: models.Order) -> float:
+    """What the book shows of a resting order: an iceberg's current slice."""
+    if order.display_quantity is None:
+        return order.remaining_quantity
+    if order.visible_quantity is None:
+        return min(order.display_quantity, order.remaining_quantity)
+    return order.visible_quantity
 
-    for opp in opposite_orders:
+
+def _replenish(book: list, index: int, order):
+    """
+    Show the next iceberg slice and send it to the back of its price level:
+    a fresh queue time in the DB (the clock at write-back, see
+    `book.wall_clock`), and moved behind the rest of the level in the
+    `book` being matched.
+    """
+    order.visible_quantity = min(order.display_quantity, order.remaining_quantity)
+    order.requeued = True
+    end = index + 1
+    while end < len(book) and book[end].price == order.price:
+        end += 1
+    book.insert(end, order)
+    del book[index]
+
+
+def order_state(order: models.Order) -> dict:
+    return {
+        "id": order.id,
+        "type": getattr(order.type, "value", order.type),
+        "price": order.price,
+        "quantity": order.quantity,
+        "remaining_quantity": order.remaining_quantity,
+        "status": getattr(order.status, "value", order.status),
+    }
+
+
+def match_orders(db: Session, order_id: str) -> MatchResult:
+    """
+    Lock order `order_id` and scan the whole opposite order book once for it.
+    Match as much as possible in price-time priority. Resting icebergs
+    trade one slice at a time, each refill queueing at the back of its level.
+    """
+
+    executed_trades = MatchResult()
+    touched_users = set()
+
+    # Lock the new order row
+    new_order = db.execute(statements.lock_order(order_id)).scalar_one()
+
+    # Fetch ALL opposite pending orders in priority order (FOR UPDATE SKIP
+    # LOCKED) as light records; only the ones that trade are written back
+    opposite_stmt = statements.opposite_orders(new_order.type)
+    opposite_orders = load_resting(db, opposite_stmt)
+    filled = {}
+
+    index = 0
+    while index < len(opposite_orders):
+        opp = opposite_orders[index]
+        index += 1
         if (
             new_order.status != models.StatusType.pending
             or new_order.remaining_quantity <= 0
@@ -105,10 +130,9 @@ def match_orders(db: Session, new_order: models.Order):
         if new_order.user_id == opp.user_id:
             continue
 
-        trade_qty = min(
-            Decimal(str(new_order.remaining_quantity)),
-            Decimal(str(opp.remaining_quantity)),
-        )
+        # A resting iceberg only trades its visible slice at a time
+        opp_visible = Decimal(str(displayed_quantity(opp)))
+        trade_qty = min(Decimal(str(new_order.remaining_quantity)), opp_visible)
         if trade_qty <= 0:
             continue
 
@@ -119,35 +143,27 @@ def match_orders(db: Session, new_order: models.Order):
         buy_order = new_order if new_order.type == models.OrderType.buy else opp
         sell_order = new_order if new_order.type == models.OrderType.sell else opp
 
-        # Lock wallets
-        buyer_wallet = (
-            db.query(models.Wallet)
-            .filter(models.Wallet.user_id == buy_order.user_id)
-            .with_for_update()
-            .one_or_none()
-        )
-        seller_wallet = (
-            db.query(models.Wallet)
-            .filter(models.Wallet.user_id == sell_order.user_id)
-            .with_for_update()
-            .one_or_none()
-        )
-        if not buyer_wallet or not seller_wallet:
-            continue
-
-        # Sanity checks
-        if Decimal(str(buyer_wallet.reserved_balance)) < total_cost:
-            continue
-        if Decimal(str(seller_wallet.reserved_holdings)) < trade_qty:
-            continue
-
-        # --- Create trade ---
+        # --- Create trade; settle it by appending ledger entries ---
         trade = models.Trade(
+            id=str(uuid.uuid4()),
             buy_order_id=buy_order.id,
             sell_order_id=sell_order.id,
+            buyer_user_id=buy_order.user_id,
+            seller_user_id=sell_order.user_id,
+            side=new_order.type,
             price=float(trade_price),
             quantity=float(trade_qty),
+            notional=float(total_cost),
         )
+        if not wallet_service.settle_fill(
+            db,
+            buy_order.user_id,
+            sell_order.user_id,
+            float(total_cost),
+            float(trade_qty),
+            ref_id=trade.id,
+        ):
+            continue  # a reservation is short
         executed_trades.append(trade)
         db.add(trade)
         db.flush()
@@ -161,38 +177,30 @@ def match_orders(db: Session, new_order: models.Order):
             new_order.status = models.StatusType.executed
         if opp.remaining_quantity <= 0:
             opp.status = models.StatusType.executed
-
-        # --- Wallet updates ---
-        buyer_wallet.reserved_balance = float(
-            Decimal(str(buyer_wallet.reserved_balance)) - total_cost
-        )
-        buyer_wallet.holdings = float(Decimal(str(buyer_wallet.holdings)) + trade_qty)
-        seller_wallet.reserved_holdings = float(
-            Decimal(str(seller_wallet.reserved_holdings)) - trade_qty
-        )
-        seller_wallet.balance = float(Decimal(str(seller_wallet.balance)) + total_cost)
-
-        db.flush()
-
-        # Queue broadcasts
-        trade_broadcasts.append((trade.id, float(trade_price), float(trade_qty)))
-        wallet_broadcasts.extend(
-            [
-                (
-                    buyer_wallet.user_id,
-                    buyer_wallet.balance,
-                    buyer_wallet.reserved_balance,
-                    buyer_wallet.holdings,
-                    buyer_wallet.reserved_holdings,
-                ),
-                (
-                    seller_wallet.user_id,
-                    seller_wallet.balance,
-                    seller_wallet.reserved_balance,
-                    seller_wallet.holdings,
-                    seller_wallet.reserved_holdings,
-                ),
-            ]
+        if new_order.display_quantity is not None:
+            new_order.visible_quantity = min(
+                displayed_quantity(new_order), new_order.remaining_quantity
+            )
+        if opp.display_quantity is not None:
+            opp.visible_quantity = float(opp_visible - trade_qty)
+            if opp.visible_quantity <= 0 and opp.remaining_quantity > 0:
+                index -= 1
+                _replenish(opposite_orders, index, opp)
+
+        filled[opp.id] = opp
+
+        # Queue private updates (latest state per user/order wins)
+        touched_users.update((buy_order.user_id, sell_order.user_id))
+        for order in (buy_order, sell_order):
+            executed_trades.order_updates[order.id] = (
+                order.user_id,
+                order_state(order),
+            )
+
+    write_back(db, list(filled.values()))
+    if touched_users:
+        # One projection query for everyone the fills touched
+        executed_trades.wallet_updates = wallet_service.get_wallet_states(
+            db, touched_users
         )
-
     return executed_trades
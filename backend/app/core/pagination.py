@@ -0,0 +1,102 @@
+# app/core/pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Callable, Iterator, Optional
+
+from fastapi import HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, tuple_
+
+from app.db.session import ReadSessionLocal
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# ---- Cursors ----
+def encode_cursor(created_at: datetime, row_id: str) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), str(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+class PageParams:
+    """`?cursor=&limit=` query parameters for keyset-paginated lists."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+        limit: int = Query(100, gt=0, le=1000),
+    ):
+        self.after = decode_cursor(cursor) if cursor else None
+        self.limit = limit
+
+
+def keyset_filter(model, page: PageParams):
+    """WHERE clause for rows after the cursor in (created_at, id) DESC order."""
+    created_at, row_id = page.after
+    return tuple_(model.created_at, model.id) < tuple_(created_at, row_id)
+
+
+def trim_page(rows: list, page: PageParams, response: Response) -> list:
+    """
+    Cut a `limit + 1` fetch down to `limit` rows; when the extra row was
+    there, put the next-page cursor in the X-Next-Cursor header.
+    """
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
+
+
+def keyset_page(query, model, page: PageParams, response: Response) -> list:
+    """
+    Newest-first page of `query` ordered by (created_at, id). The body stays a
+    plain list; the cursor for the next page goes in the X-Next-Cursor header
+    (absent on the last page). Each page is an index range scan, however deep.
+    """
+    if page.after is not None:
+        query = query.filter(keyset_filter(model, page))
+    rows = (
+        query.order_by(model.created_at.desc(), model.id.desc())
+        .limit(page.limit + 1)
+        .all()
+    )
+    return trim_page(rows, page, response)
+
+
+# ---- NDJSON export ----
+def ndjson_export(
+    statement: Select,
+    dump: Callable[[object], str],
+    batch_size: int = 1000,
+) -> StreamingResponse:
+    """
+    Stream every row of a `select()` as newline-delimited JSON.
+
+    Rows are read through a server-side cursor (`yield_per`) and written out a
+    batch at a time, so memory stays flat whatever the result size. The
+    session is opened inside the generator because request-scoped ones are
+    closed before a streaming body is sent; Starlette runs the sync generator
+    in its threadpool.
+    """
+
+    def lines() -> Iterator[str]:
+        db = ReadSessionLocal()
+        try:
+            rows = db.scalars(statement.execution_options(yield_per=batch_size))
+            for batch in rows.partitions():
+                yield "".join(dump(row) + "\n" for row in batch)
+        finally:
+            db.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,148 @@
+# app/core/publisher.py
+import asyncio
+import threading
+from typing import Callable, Iterable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logs import logger
+from app.core.ticker import ticker
+from app.core.bus import BroadcastBus, bus
+from app.core.market_data import Fill, record_fills
+from app.core.ws_manager import manager
+from app.core.broadcasts import (
+    broadcast_candles,
+    broadcast_order_book,
+    broadcast_ticker,
+    broadcast_trade_book,
+    get_order_book_snapshot,
+    get_trade_snapshot,
+)
+from app.db.session import ReadSessionLocal
+
+
+def load_snapshots(book: bool, trades: bool) -> Tuple[Optional[dict], Optional[list]]:
+    """Run the snapshot queries for whichever feeds changed."""
+    db = ReadSessionLocal()
+    try:
+        order_book = get_order_book_snapshot(db) if book else None
+        trade_book = get_trade_snapshot(db) if trades else None
+        return order_book, trade_book
+    finally:
+        db.close()
+
+
+def _empty_batch() -> dict:
+    return {"book": False, "trades": False, "fills": []}
+
+
+class MarketDataPublisher:
+    """
+    Conflates market-data updates and publishes them on a fixed tick.
+
+    Writers only mark the book/trades dirty or hand over fills. Once per
+    interval the local changes go out as one event on the broadcast bus, and
+    every worker renders what it received since its last tick: one snapshot
+    query per dirty feed and one fan-out to its own sockets, however many
+    orders arrived in between.
+    """
+
+    def __init__(
+        self,
+        interval_ms: int,
+        bus: BroadcastBus,
+        loader: Callable[[bool, bool], Tuple[Optional[dict], Optional[list]]] = load_snapshots,
+    ):
+        self.interval = interval_ms / 1000
+        self.bus = bus
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._outbox = _empty_batch()  # local changes, written from any thread
+        self._inbox = _empty_batch()  # changes from every worker, event loop only
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"marks": 0, "flushes": 0, "renders": 0, "snapshot_queries": 0}
+        bus.subscribe(self.receive)
+
+    # ---- Writers (any thread) ----
+    def mark_book_dirty(self):
+        with self._lock:
+            self._outbox["book"] = True
+            self.stats["marks"] += 1
+
+    def mark_trades_dirty(self):
+        with self._lock:
+            self._outbox["trades"] = True
+            self.stats["marks"] += 1
+
+    def add_fills(self, fills: Iterable[Fill]):
+        with self._lock:
+            self._outbox["fills"].extend(fills)
+            self._outbox["trades"] = True
+            self.stats["marks"] += 1
+
+    # ---- Bus ----
+    async def receive(self, event: dict):
+        if event["type"] == "market":
+            self._inbox["book"] |= event["book"]
+            self._inbox["trades"] |= event["trades"]
+            self._inbox["fills"].extend(tuple(f) for f in event["fills"])
+        elif event["type"] == "user":
+            await manager.send_user_message(
+                event["user_id"], event["message"], topic=event["topic"]
+            )
+
+    # ---- Tick (event loop) ----
+    async def flush(self):
+        with self._lock:
+            outbox, self._outbox = self._outbox, _empty_batch()
+        if outbox["book"] or outbox["trades"] or outbox["fills"]:
+            await self.bus.publish({"type": "market", **outbox})
+            self.stats["flushes"] += 1
+        await self.render()
+
+    async def render(self):
+        inbox, self._inbox = self._inbox, _empty_batch()
+        book, trades, fills = inbox["book"], inbox["trades"], inbox["fills"]
+        if not (book or trades or fills):
+            return
+
+        market = record_fills(fills) if fills else None
+        order_book = trade_book = None
+        if book or trades:
+            # Snapshot queries are blocking; keep them off the event loop
+            order_book, trade_book = await asyncio.to_thread(self._loader, book, trades)
+            self.stats["snapshot_queries"] += int(book) + int(trades)
+
+        if order_book is not None:
+            await broadcast_order_book(order_book)
+        if trade_book is not None:
+            await broadcast_trade_book(trade_book)
+        if market or book:
+            # New fills moved the stats; a new book snapshot moved best bid/ask
+            await broadcast_ticker(ticker.snapshot())
+        if market and market["candles"]:
+            await broadcast_candles(market["candles"])
+        self.stats["renders"] += 1
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Error publishing market data: {e}", exc_info=True)
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+publisher = MarketDataPublisher(settings.MARKET_DATA_FLUSH_INTERVAL_MS, bus)
@@ -0,0 +1,181 @@
+# app/core/rate_limit.py
+import ipaddress
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Tuple, Union
+
+from fastapi import HTTPException, Request, status
+from jose import JWTError, jwt
+
+from app.core.config import settings
+
+Limit = Tuple[float, float]  # (tokens per second, burst)
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+
+def parse_limits(spec: str) -> Dict[str, Limit]:
+    """Parse "orders=10/20,auth=1/10" into {class: (rate, burst)}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, limit = item.partition("=")
+        rate, _, burst = limit.partition("/")
+        limits[name.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by (endpoint class, subject).
+
+    Buckets live in an OrderedDict in least-recently-used order: every hit
+    moves its bucket to the end, so idle ones collect at the front and are
+    dropped from there, O(1) each, as later requests come in. `max_buckets`
+    caps memory when many distinct subjects show up at once.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, Limit],
+        idle_ttl: float = 300,
+        max_buckets: int = 100_000,
+        clock=time.monotonic,
+    ):
+        self.limits = limits
+        self.idle_ttl = idle_ttl
+        self.max_buckets = max_buckets
+        self._clock = clock
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()  # [tokens, last]
+        self._lock = threading.Lock()
+        self.stats = {
+            "allowed": {name: 0 for name in limits},
+            "limited": {name: 0 for name in limits},
+            "evicted": 0,
+        }
+
+    def acquire(self, endpoint_class: str, subject: Hashable) -> float:
+        """Take one token. Returns 0 when allowed, else seconds until one is free."""
+        limit = self.limits.get(endpoint_class)
+        if limit is None:
+            return 0.0
+        rate, burst = limit
+        key = (endpoint_class, subject)
+        with self._lock:
+            now = self._clock()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [burst, now]
+            else:
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                self._buckets.move_to_end(key)
+            self._evict(now)
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self.stats["allowed"][endpoint_class] += 1
+                return 0.0
+            self.stats["limited"][endpoint_class] += 1
+            return (1 - bucket[0]) / rate
+
+    def _evict(self, now: float):
+        buckets = self._buckets
+        while buckets:
+            _, oldest = next(iter(buckets.items()))
+            if len(buckets) <= self.max_buckets and now - oldest[1] < self.idle_ttl:
+                break
+            buckets.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "allowed": dict(self.stats["allowed"]),
+                "limited": dict(self.stats["limited"]),
+                "evicted": self.stats["evicted"],
+                "buckets": len(self._buckets),
+            }
+
+
+limiter = RateLimiter(
+    parse_limits(settings.RATE_LIMITS),
+    idle_ttl=settings.RATE_LIMIT_IDLE_S,
+    max_buckets=settings.RATE_LIMIT_MAX_BUCKETS,
+)
+
+
+def parse_proxies(spec: str) -> List[Network]:
+    """Parse "10.0.0.5,172.16.0.0/12" into networks."""
+    return [
+        ipaddress.ip_network(part.strip(), strict=False)
+        for part in spec.split(",")
+        if part.strip()
+    ]
+
+
+TRUSTED_PROXIES = parse_proxies(settings.TRUSTED_PROXIES)
+
+
+def _trusted(address: str, proxies) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in proxies)
+
+
+def client_address(request: Request, proxies=None) -> str:
+    """
+    The caller's address. Behind a trusted proxy (the direct peer is in
+    TRUSTED_PROXIES) that is its `X-Real-IP`, else the nearest untrusted hop
+    in `X-Forwarded-For`; anyone else could forge those headers, so they
+    are ignored unless the peer is trusted.
+    """
+    proxies = TRUSTED_PROXIES if proxies is None else proxies
+    peer = request.client.host if request.client else "unknown"
+    if not _trusted(peer, proxies):
+        return peer
+    real_ip = request.headers.get("x-real-ip", "").strip()
+    if real_ip:
+        return real_ip
+    hops = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",")]
+    for hop in reversed([h for h in hops if h]):
+        if not _trusted(hop, proxies):
+            return hop
+    return peer
+
+
+def _subject(request: Request) -> str:
+    """
+    The user from the bearer token's claims (no DB lookup, so floods are
+    shed before they cost a query), else the client address.
+    """
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            if payload.get("username"):
+                return f"user:{payload['username']}"
+        except JWTError:
+            pass
+    return f"ip:{client_address(request)}"
+
+
+def rate_limit(endpoint_class: str):
+    """Route dependency: `dependencies=[Depends(rate_limit("orders"))]`."""
+
+    async def check(request: Request):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        retry_after = limiter.acquire(endpoint_class, _subject(request))
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit exceeded for {endpoint_class}",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return check
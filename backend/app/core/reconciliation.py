@@ -0,0 +1,180 @@
+# app/core/reconciliation.py
+from itertools import islice
+from typing import Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db import data_model as models
+from app.core import wallet_service
+
+# Ledger ids are handed out before commit, so an entry below the watermark can
+# become visible after a run; re-read this many ids below it to catch those.
+WATERMARK_OVERLAP = 1000
+MAX_REPORTED = 100
+
+
+class ReservationReconciler:
+    """
+    Checks that every wallet's reservations match its open orders:
+
+        reserved_balance  == sum(price * remaining) over open buys
+        reserved_holdings == sum(remaining)         over open sells
+
+    (open = pending, or an untriggered stop).
+
+    Users are processed in chunks. For each chunk the open orders are
+    streamed into arrays and aggregated per user with `np.bincount`, then
+    compared against the ledger projection in one vectorised step.
+
+    After a first full pass only users with ledger entries since the last
+    run are checked: every reservation change goes through the ledger.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        tolerance: float = 1e-6,
+        overlap: int = WATERMARK_OVERLAP,
+    ):
+        self.chunk_size = chunk_size
+        self.tolerance = tolerance
+        self.overlap = overlap
+        self.last_ledger_id: Optional[int] = None  # None -> full pass
+        self.last_mismatches: List[dict] = []
+        self.stats = {
+            "runs": 0,
+            "users_checked": 0,
+            "mismatches": 0,
+            "repaired": 0,
+            "last_ledger_id": None,
+        }
+
+    # ---- Which users to check ----
+    def _users(self, db: Session, upto: int) -> Iterator[str]:
+        if self.last_ledger_id is None:
+            q = db.query(models.Wallet.user_id)
+        else:
+            q = (
+                db.query(models.LedgerEntry.user_id)
+                .filter(
+                    models.LedgerEntry.id > self.last_ledger_id - self.overlap,
+                    models.LedgerEntry.id <= upto,
+                )
+                .distinct()
+            )
+        for row in q.yield_per(self.chunk_size):
+            yield row.user_id
+
+    # ---- One chunk ----
+    def _expected(self, db: Session, user_ids: List[str]):
+        """Per-user expected (cash, assets) reservations as two arrays."""
+        index = {user_id: i for i, user_id in enumerate(user_ids)}
+        rows = (
+            db.query(
+                models.Order.user_id,
+                models.Order.type,
+                models.Order.price,
+                models.Order.remaining_quantity,
+            )
+            .filter(
+                models.Order.user_id.in_(user_ids),
+                models.Order.status.in_(models.OPEN_STATUSES),
+            )
+            .yield_per(10_000)
+        )
+        owner, is_buy, price, remaining = [], [], [], []
+        for row in rows:
+            owner.append(index[row.user_id])
+            is_buy.append(row.type == models.OrderType.buy)
+            price.append(row.price or 0.0)
+            remaining.append(row.remaining_quantity)
+
+        owner = np.asarray(owner, dtype=np.int64)
+        is_buy = np.asarray(is_buy, dtype=bool)
+        price = np.asarray(price, dtype=np.float64)
+        remaining = np.asarray(remaining, dtype=np.float64)
+        n = len(user_ids)
+        cash = np.bincount(
+            owner, weights=np.where(is_buy, price * remaining, 0.0), minlength=n
+        )
+        assets = np.bincount(
+            owner, weights=np.where(is_buy, 0.0, remaining), minlength=n
+        )
+        return cash, assets
+
+    def check_chunk(self, db: Session, user_ids: List[str]) -> List[dict]:
+        expected_cash, expected_assets = self._expected(db, user_ids)
+        states = wallet_service.get_wallet_states(db, user_ids)
+
+        empty = {"reserved_balance": 0.0, "reserved_holdings": 0.0}
+        wallets = [states.get(u, empty) for u in user_ids]
+        has_wallet = np.array([u in states for u in user_ids], dtype=bool)
+        reserved_cash = np.array(
+            [w["reserved_balance"] for w in wallets], dtype=np.float64
+        )
+        reserved_assets = np.array(
+            [w["reserved_holdings"] for w in wallets], dtype=np.float64
+        )
+        cash_drift = reserved_cash - expected_cash
+        asset_drift = reserved_assets - expected_assets
+        bad = has_wallet & (
+            (np.abs(cash_drift) > self.tolerance)
+            | (np.abs(asset_drift) > self.tolerance)
+        )
+
+        return [
+            {
+                "user_id": user_ids[i],
+                "reserved_balance": float(reserved_cash[i]),
+                "expected_reserved_balance": float(expected_cash[i]),
+                "reserved_holdings": float(reserved_assets[i]),
+                "expected_reserved_holdings": float(expected_assets[i]),
+                "cash_drift": float(cash_drift[i]),
+                "asset_drift": float(asset_drift[i]),
+            }
+            for i in np.flatnonzero(bad)
+        ]
+
+    # ---- Run ----
+    def run(self, db: Session, repair: bool = False) -> dict:
+        """Check (and optionally repair) users touched since the last run."""
+        if db.get_bind().dialect.name == "postgresql":
+            # Orders and ledger must be read from the same snapshot
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+
+        upto = db.query(func.max(models.LedgerEntry.id)).scalar() or 0
+        checked = mismatched = repaired = 0
+        reported = []
+        users = self._users(db, upto)
+        while True:
+            chunk = list(islice(users, self.chunk_size))
+            if not chunk:
+                break
+            found = self.check_chunk(db, chunk)
+            checked += len(chunk)
+            mismatched += len(found)
+            reported.extend(found[: MAX_REPORTED - len(reported)])
+            if repair and found:
+                drifts = [
+                    (m["user_id"], m["cash_drift"], m["asset_drift"]) for m in found
+                ]
+                repaired += wallet_service.adjust_reservations(db, drifts)
+
+        self.last_ledger_id = upto
+        self.last_mismatches = reported
+        self.stats["runs"] += 1
+        self.stats["users_checked"] += checked
+        self.stats["mismatches"] += mismatched
+        self.stats["repaired"] += repaired
+        self.stats["last_ledger_id"] = upto
+        return {
+            "checked": checked,
+            "mismatched": mismatched,
+            "repaired": repaired,
+            "mismatches": reported,  # first MAX_REPORTED
+        }
+
+
+reconciler = ReservationReconciler()
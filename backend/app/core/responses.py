@@ -0,0 +1,44 @@
+# app/core/responses.py
+from typing import Any, Mapping, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.core.pagination import NEXT_CURSOR_HEADER
+
+
+class PydanticJSONResponse(Response):
+    """
+    JSON body rendered by a pydantic `TypeAdapter`.
+
+    Returning a Response from a route skips FastAPI's own serialisation
+    (validate the return value, dump it to Python objects, then `json.dumps`).
+    Here validation (straight from ORM rows, `from_attributes`) and encoding
+    both run inside pydantic-core, with no intermediate dicts. Keep
+    `response_model=` on the route for the OpenAPI schema.
+    """
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        adapter: TypeAdapter,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+    ):
+        self.adapter = adapter
+        super().__init__(content, status_code=status_code, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        return self.adapter.dump_json(
+            self.adapter.validate_python(content, from_attributes=True)
+        )
+
+
+def page_response(rows: list, adapter: TypeAdapter, response: Response) -> Response:
+    """A keyset page as a PydanticJSONResponse, keeping its X-Next-Cursor."""
+    headers = {}
+    if NEXT_CURSOR_HEADER in response.headers:
+        headers[NEXT_CURSOR_HEADER] = response.headers[NEXT_CURSOR_HEADER]
+    return PydanticJSONResponse(rows, adapter, headers=headers)
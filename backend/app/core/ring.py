@@ -0,0 +1,297 @@
+# app/core/ring.py
+import math
+import os
+import struct
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from app.db import data_model as models
+from app.core.config import settings
+
+CACHE_LINE = 64
+# head (next slot to write) and tail (next slot to read) on their own lines
+_HEAD, _TAIL = 0, CACHE_LINE // 8
+HEADER = 2 * CACHE_LINE
+# Polls before yielding the CPU; spinning only pays if the peer has a core
+SPIN = 2000 if (os.cpu_count() or 1) > 1 else 0
+
+
+class SpscRing:
+    """
+    Single-producer / single-consumer ring of fixed-size records in shared
+    memory.
+
+    head and tail are monotonic 64-bit counters: only the producer writes
+    head, only the consumer writes tail, so neither side takes a lock. The
+    producer fills a slot and then publishes it by moving head; the
+    consumer reads up to head and then frees the slots by moving tail.
+    Each side caches the other's counter and only re-reads it when the ring
+    looks full (or empty), so the shared lines are touched once per batch,
+    not per record.
+
+    Relies on aligned 8-byte stores being atomic and seen in program order,
+    as on x86-64. Exactly one process may put and one may get.
+    """
+
+    def __init__(
+        self, shm: SharedMemory, record: struct.Struct, capacity: int, owner: bool
+    ):
+        self.shm = shm
+        self.record = record
+        self.capacity = capacity
+        self.owner = owner
+        self._mask = capacity - 1
+        self._slot = math.ceil(record.size / CACHE_LINE) * CACHE_LINE
+        self._buf = shm.buf
+        self._header = shm.buf[:HEADER]
+        self._counters = self._header.cast("Q")
+        self._head = self._counters[_HEAD]  # local copies of our own counter
+        self._tail = self._counters[_TAIL]
+        self._seen_head = self._head  # cached copies of the other side's
+        self._seen_tail = self._tail
+        self.stats = {"put": 0, "got": 0, "full": 0}
+
+    @staticmethod
+    def _size(record: struct.Struct, capacity: int) -> int:
+        if capacity <= 0 or capacity & (capacity - 1):
+            raise ValueError("capacity must be a power of two")
+        return HEADER + capacity * math.ceil(record.size / CACHE_LINE) * CACHE_LINE
+
+    @classmethod
+    def create(cls, name: Optional[str], record: struct.Struct, capacity: int):
+        shm = SharedMemory(name, create=True, size=cls._size(record, capacity))
+        shm.buf[:HEADER] = bytes(HEADER)
+        return cls(shm, record, capacity, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, record: struct.Struct, capacity: int):
+        shm = SharedMemory(name)
+        if shm.size < cls._size(record, capacity):
+            shm.close()
+            raise ValueError(f"Ring {name} is smaller than {capacity} records")
+        # Only the creator unlinks; stop this process's tracker doing it at exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, record, capacity, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def __len__(self) -> int:
+        return self._counters[_HEAD] - self._counters[_TAIL]
+
+    # ---- Producer ----
+    def put(self, *fields) -> bool:
+        """Write one record; False (and nothing written) if the ring is full."""
+        head = self._head
+        if head - self._seen_tail >= self.capacity:
+            self._seen_tail = self._counters[_TAIL]
+            if head - self._seen_tail >= self.capacity:
+                self.stats["full"] += 1
+                return False
+        offset = HEADER + (head & self._mask) * self._slot
+        self.record.pack_into(self._buf, offset, *fields)
+        self._head = head + 1
+        self._counters[_HEAD] = self._head
+        self.stats["put"] += 1
+        return True
+
+    # ---- Consumer ----
+    def available(self) -> int:
+        if self._seen_head == self._tail:
+            self._seen_head = self._counters[_HEAD]
+        return self._seen_head - self._tail
+
+    def drain(self, handler: Callable[[memoryview], None], limit: int = 256) -> int:
+        """
+        Pass up to `limit` waiting records to `handler` as memoryviews of
+        their slots, then free them all with one tail store. The views are
+        only valid inside the handler: the slot is reused once freed.
+        """
+        count = min(self.available(), limit)
+        if not count:
+            return 0
+        tail, slot, buf = self._tail, self._slot, self._buf
+        for i in range(tail, tail + count):
+            offset = HEADER + (i & self._mask) * slot
+            view = buf[offset : offset + slot]
+            try:
+                handler(view)
+            finally:
+                view.release()
+        self._tail = tail + count
+        self._counters[_TAIL] = self._tail
+        self.stats["got"] += count
+        return count
+
+    def get(self) -> Optional[tuple]:
+        """Unpack the next record straight from shared memory, or None."""
+        if not self.available():
+            return None
+        offset = HEADER + (self._tail & self._mask) * self._slot
+        fields = self.record.unpack_from(self._buf, offset)
+        self._tail += 1
+        self._counters[_TAIL] = self._tail
+        self.stats["got"] += 1
+        return fields
+
+    def wait(self, timeout: Optional[float] = None, spin: int = SPIN) -> bool:
+        """Block until a record is waiting: spin briefly, then yield the CPU."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        spins = 0
+        while not self.available():
+            spins += 1
+            if spins > spin:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return False
+                time.sleep(0)
+        return True
+
+    def close(self):
+        self._counters.release()
+        self._header.release()
+        self._buf = None
+        self.shm.close()
+        if self.owner:
+            # An attach in a child shares our tracker and dropped the entry
+            resource_tracker.register(self.shm._name, "shared_memory")
+            self.shm.unlink()
+
+
+# ---- Records ----
+SIDES = (models.OrderType.buy, models.OrderType.sell)
+KINDS = ("limit", "market", "stop", "stop_limit")
+STATUSES = tuple(models.StatusType)
+ACTIONS = ("match", "cancel")
+
+# seq, sent_ns, action, side, kind, price (NaN: market), quantity, order, user
+ORDER_RECORD = struct.Struct("<QQBBB5xdd36s36s")
+# seq, sent_ns, done_ns, status, trades, filled, remaining, order
+EVENT_RECORD = struct.Struct("<QQQB3xIdd36s")
+
+
+class OrderMessage(NamedTuple):
+    seq: int  # per-worker sequence; echoed in the event
+    sent_ns: int  # time.monotonic_ns() at put
+    action: str
+    side: models.OrderType
+    kind: str
+    price: Optional[float]
+    quantity: float
+    order_id: str
+    user_id: str
+
+
+class EventMessage(NamedTuple):
+    seq: int
+    sent_ns: int  # of the order this answers
+    done_ns: int
+    status: models.StatusType
+    trades: int
+    filled: float
+    remaining: float
+    order_id: str
+
+
+def _text(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode()
+
+
+def put_order(
+    ring: SpscRing, seq: int, action: str, order, sent_ns: Optional[int] = None
+) -> bool:
+    """Queue an order (an `Order` or anything with the same fields)."""
+    return ring.put(
+        seq,
+        sent_ns or time.monotonic_ns(),
+        ACTIONS.index(action),
+        SIDES.index(order.type),
+        KINDS.index(order.order_kind or "limit"),
+        math.nan if order.price is None else order.price,
+        order.remaining_quantity,
+        order.id.encode(),
+        order.user_id.encode(),
+    )
+
+
+def decode_order(view) -> OrderMessage:
+    seq, sent, action, side, kind, price, qty, order_id, user_id = (
+        ORDER_RECORD.unpack_from(view)
+    )
+    return OrderMessage(
+        seq,
+        sent,
+        ACTIONS[action],
+        SIDES[side],
+        KINDS[kind],
+        None if math.isnan(price) else price,
+        qty,
+        _text(order_id),
+        _text(user_id),
+    )
+
+
+def put_event(
+    ring: SpscRing,
+    message: OrderMessage,
+    status: models.StatusType,
+    trades: int,
+    filled: float,
+    remaining: float,
+) -> bool:
+    return ring.put(
+        message.seq,
+        message.sent_ns,
+        time.monotonic_ns(),
+        STATUSES.index(status),
+        trades,
+        filled,
+        remaining,
+        message.order_id.encode(),
+    )
+
+
+def decode_event(view) -> EventMessage:
+    seq, sent, done, status, trades, filled, remaining, order_id = (
+        EVENT_RECORD.unpack_from(view)
+    )
+    return EventMessage(
+        seq, sent, done, STATUSES[status], trades, filled, remaining, _text(order_id)
+    )
+
+
+# ---- One pair of rings per API worker ----
+def ring_names(worker: int, prefix: Optional[str] = None) -> Tuple[str, str]:
+    prefix = prefix or settings.ENGINE_RING_PREFIX
+    return f"{prefix}-{worker}-orders", f"{prefix}-{worker}-events"
+
+
+def engine_rings(
+    worker: int, prefix: Optional[str] = None, capacity: Optional[int] = None
+) -> Tuple[SpscRing, SpscRing]:
+    """
+    The engine's side of a worker link: it creates (and owns) the worker's
+    order ring, which it consumes, and event ring, which it produces.
+    A shared results ring would have one producer but many consumers, so
+    each worker gets its own.
+    """
+    capacity = capacity or settings.ENGINE_RING_CAPACITY
+    orders, events = ring_names(worker, prefix)
+    return (
+        SpscRing.create(orders, ORDER_RECORD, capacity),
+        SpscRing.create(events, EVENT_RECORD, capacity),
+    )
+
+
+def worker_rings(
+    worker: int, prefix: Optional[str] = None, capacity: Optional[int] = None
+) -> Tuple[SpscRing, SpscRing]:
+    """A worker's side: produces into its order ring, consumes its events."""
+    capacity = capacity or settings.ENGINE_RING_CAPACITY
+    orders, events = ring_names(worker, prefix)
+    return (
+        SpscRing.attach(orders, ORDER_RECORD, capacity),
+        SpscRing.attach(events, EVENT_RECORD, capacity),
+    )
@@ -0,0 +1,215 @@
+# app/core/risk.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db import data_model as models
+from app.core import wallet_service
+from app.core.config import settings
+from app.core.ticker import ticker
+from app.core.wallet_service import InsufficientFunds, WalletNotFound
+
+
+class RiskRejected(ValueError):
+    pass
+
+
+class Account:
+    """What the risk check needs to know about one user."""
+
+    __slots__ = ("balance", "holdings", "open_orders", "loaded_at")
+
+    def __init__(
+        self, balance: float, holdings: float, open_orders: int, loaded_at: float
+    ):
+        self.balance = balance  # available (unreserved) cash
+        self.holdings = holdings  # available (unreserved) assets
+        self.open_orders = open_orders
+        self.loaded_at = loaded_at
+
+
+class PreTradeRisk:
+    """
+    In-memory admission check for new orders, run before the reservation.
+
+    Static limits (order notional, price band around the last trade) need no
+    state at all. Funds and the open-order count come from a per-user cache
+    that is loaded once from the DB and then kept current write-through:
+    every reservation, release and wallet change made in this process feeds
+    the state it got back from `wallet_service` into the cache.
+
+    The DB stays authoritative: an accepted order still reserves with the
+    guarded UPDATE in the same transaction as the insert. The cache only
+    answers rejects. Changes made by other processes (fills credit funds,
+    other API workers) can leave an entry stale, so a reject on an entry
+    older than `refresh` seconds reloads it and checks again; a user
+    hammering a reject costs at most one load per `refresh`.
+    """
+
+    def __init__(
+        self,
+        max_open_orders: int,
+        max_notional: float,
+        price_band: float,
+        maxsize: int = 100_000,
+        ttl: float = 30.0,
+        refresh: float = 1.0,
+        reference_price: Callable[[], Optional[float]] = lambda: ticker.last_price,
+        clock=time.monotonic,
+    ):
+        self.max_open_orders = max_open_orders
+        self.max_notional = max_notional
+        self.price_band = price_band
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.refresh = refresh
+        self.reference_price = reference_price
+        self._clock = clock
+        self._accounts: "OrderedDict[str, Account]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            "passed": 0,
+            "loads": 0,
+            "rejected": {"notional": 0, "price_band": 0, "open_orders": 0, "funds": 0},
+        }
+
+    # ---- Check ----
+    def check(
+        self,
+        db: Session,
+        user_id: str,
+        side: models.OrderType,
+        price: Optional[float],
+        quantity: float,
+        amount: float,
+    ):
+        """
+        Raise RiskRejected or InsufficientFunds if the order must not be
+        accepted. `amount` is what the order would reserve: cash for a buy,
+        assets for a sell.
+        """
+        if price is not None:
+            notional = price * quantity
+            if self.max_notional and notional > self.max_notional:
+                self._reject(
+                    "notional",
+                    RiskRejected(f"Order notional exceeds {self.max_notional:g}"),
+                )
+            reference = self.reference_price()
+            band = self.price_band * reference if reference else 0
+            if band and abs(price - reference) > band:
+                self._reject(
+                    "price_band",
+                    RiskRejected(
+                        f"Price is more than {self.price_band:.0%} away from "
+                        f"the last trade ({reference:g})"
+                    ),
+                )
+
+        account = self._account(db, user_id)
+        failure = self._failure(account, side, amount)
+        if failure and self._clock() - account.loaded_at >= self.refresh:
+            account = self._load(db, user_id)
+            failure = self._failure(account, side, amount)
+        if failure:
+            self._reject(*failure)
+        with self._lock:
+            self.stats["passed"] += 1
+
+    def _failure(self, account: Account, side, amount: float):
+        if account.open_orders >= self.max_open_orders:
+            return "open_orders", RiskRejected(
+                f"Too many open orders (max {self.max_open_orders})"
+            )
+        if side == models.OrderType.buy:
+            if account.balance < amount:
+                return "funds", InsufficientFunds("Insufficient balance")
+        elif account.holdings < amount:
+            return "funds", InsufficientFunds("Insufficient asset holdings")
+        return None
+
+    def _reject(self, reason: str, error: Exception):
+        with self._lock:
+            self.stats["rejected"][reason] += 1
+        raise error
+
+    # ---- Cache ----
+    def _account(self, db: Session, user_id: str) -> Account:
+        with self._lock:
+            account = self._accounts.get(user_id)
+            if account is not None and self._clock() - account.loaded_at < self.ttl:
+                self._accounts.move_to_end(user_id)
+                return account
+        return self._load(db, user_id)
+
+    def _load(self, db: Session, user_id: str) -> Account:
+        state = wallet_service.get_wallet_state(db, user_id)
+        if state is None:
+            raise WalletNotFound("Wallet not found")
+        open_orders = db.scalar(
+            select(func.count())
+            .select_from(models.Order)
+            .where(
+                models.Order.user_id == user_id,
+                models.Order.status.in_(models.OPEN_STATUSES),
+            )
+        )
+        account = Account(
+            state["balance"], state["holdings"], open_orders, self._clock()
+        )
+        with self._lock:
+            self._accounts[user_id] = account
+            self._accounts.move_to_end(user_id)
+            while len(self._accounts) > self.maxsize:
+                self._accounts.popitem(last=False)
+            self.stats["loads"] += 1
+        return account
+
+    # ---- Write-through (call after the transaction commits) ----
+    def _apply(self, user_id: str, state: dict, open_orders: int):
+        with self._lock:
+            account = self._accounts.get(user_id)
+            if account is None:
+                return
+            account.balance = state["balance"]
+            account.holdings = state["holdings"]
+            account.open_orders = max(0, account.open_orders + open_orders)
+
+    def on_reserved(self, user_id: str, state: dict):
+        """A new order was accepted and reserved; `state` is the wallet after it."""
+        self._apply(user_id, state, +1)
+
+    def on_released(self, user_id: str, state: dict):
+        """An open order went away and its reservation was released."""
+        self._apply(user_id, state, -1)
+
+    def on_wallet(self, user_id: str, state: dict):
+        """Funds changed outside order entry (deposit, withdrawal)."""
+        self._apply(user_id, state, 0)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._accounts.pop(user_id, None)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "passed": self.stats["passed"],
+                "loads": self.stats["loads"],
+                "rejected": dict(self.stats["rejected"]),
+                "accounts": len(self._accounts),
+            }
+
+
+risk = PreTradeRisk(
+    max_open_orders=settings.RISK_MAX_OPEN_ORDERS,
+    max_notional=settings.RISK_MAX_ORDER_NOTIONAL,
+    price_band=settings.RISK_PRICE_BAND_PCT,
+    maxsize=settings.RISK_CACHE_SIZE,
+    ttl=settings.RISK_CACHE_TTL_S,
+    refresh=settings.RISK_REFRESH_S,
+)
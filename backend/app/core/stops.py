@@ -0,0 +1,172 @@
+# app/core/stops.py
+import threading
+from bisect import bisect_right, insort
+from collections import deque
+from typing import Iterable, List, Optional
+
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+from app.db import data_model as models
+from app.core.order_matching import MatchResult, match_orders, order_state
+
+INF = float("inf")
+
+
+class StopBook:
+    """
+    Untriggered stop and stop-limit orders, indexed by trigger price.
+
+    Each side is one sorted list of (key, created_at, order_id) where the
+    key makes "triggered by this price" a prefix of the list:
+
+        buy stops   key =  stop_price   fire when a trade prints >= stop
+        sell stops  key = -stop_price   fire when a trade prints <= stop
+
+    `trigger(high, low)` finds the end of each prefix with one bisect and
+    cuts it off: O(log n + k) for k triggered orders, never a scan of all
+    stops. The prefix is already in firing order (nearest stop first, then
+    time priority). Cancels only drop the id from `_live`; the dead entry is
+    skipped when its price is reached.
+    """
+
+    def __init__(self):
+        self._books = {models.OrderType.buy: [], models.OrderType.sell: []}
+        self._live = {}  # order_id -> side
+        self._lock = threading.Lock()
+        self.stats = {"added": 0, "triggered": 0}
+
+    @staticmethod
+    def _entry(side, stop_price: float, created_at, order_id: str) -> tuple:
+        key = stop_price if side == models.OrderType.buy else -stop_price
+        return (key, created_at.timestamp() if created_at else 0.0, order_id)
+
+    def add(self, order_id: str, side, stop_price: float, created_at=None):
+        with self._lock:
+            if order_id in self._live:
+                return
+            self._live[order_id] = side
+            entry = self._entry(side, stop_price, created_at, order_id)
+            insort(self._books[side], entry)
+            self.stats["added"] += 1
+
+    def discard(self, order_id: str):
+        with self._lock:
+            self._live.pop(order_id, None)
+
+    def load(self, db: Session):
+        """Rebuild from the untriggered orders in the database."""
+        rows = db.query(
+            models.Order.id,
+            models.Order.type,
+            models.Order.stop_price,
+            models.Order.created_at,
+        ).filter(models.Order.status == models.StatusType.untriggered)
+        books = {models.OrderType.buy: [], models.OrderType.sell: []}
+        live = {}
+        for row in rows:
+            books[row.type].append(
+                self._entry(row.type, row.stop_price, row.created_at, row.id)
+            )
+            live[row.id] = row.type
+        for entries in books.values():
+            entries.sort()
+        with self._lock:
+            self._books, self._live = books, live
+
+    def trigger(self, high: Optional[float], low: Optional[float]) -> List[str]:
+        """
+        Pop the orders triggered by trades that printed between `low` and
+        `high`: buy stops first, then sell stops, each in firing order.
+        """
+        fired = []
+        with self._lock:
+            for side, bound in (
+                (models.OrderType.buy, high),
+                (models.OrderType.sell, None if low is None else -low),
+            ):
+                if bound is None:
+                    continue
+                book = self._books[side]
+                end = bisect_right(book, (bound, INF))
+                for _, _, order_id in book[:end]:
+                    if self._live.pop(order_id, None) is not None:
+                        fired.append(order_id)
+                del book[:end]
+            self.stats["triggered"] += len(fired)
+        return fired
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+
+stop_book = StopBook()
+
+
+def activate(db: Session, order_ids: List[str]) -> List[str]:
+    """
+    Turn triggered stops into live orders: stop -> market, stop_limit ->
+    limit. Only rows still untriggered are claimed, so a stop cancelled or
+    triggered elsewhere in the meantime is left alone. Returns the claimed
+    ids in the order given.
+    """
+    if not order_ids:
+        return []
+    Order = models.Order
+    claimed = {
+        row.id
+        for row in db.execute(
+            update(Order)
+            .where(
+                Order.id.in_(order_ids),
+                Order.status == models.StatusType.untriggered,
+            )
+            .values(
+                status=models.StatusType.pending,
+                order_kind=case(
+                    (Order.order_kind == "stop", "market"), else_="limit"
+                ),
+            )
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+    }
+    return [order_id for order_id in order_ids if order_id in claimed]
+
+
+def _price_range(trades: Iterable[models.Trade]):
+    prices = [t.price for t in trades]
+    return (max(prices), min(prices)) if prices else (None, None)
+
+
+def match_with_stops(
+    db: Session, order_id: str, book: StopBook = stop_book
+) -> MatchResult:
+    """`match_orders`, then run the stops its trades trigger."""
+    return run_stops(db, match_orders(db, order_id), book)
+
+
+def run_stops(
+    db: Session, result: MatchResult, book: StopBook = stop_book
+) -> MatchResult:
+    """
+    Feed the range `result`'s trades printed to the stop book. Triggered
+    orders are activated and matched one by one in firing order; their own
+    trades can trigger further stops, which queue up behind them. Their
+    trades and updates are merged into `result`.
+    """
+    queue = deque(book.trigger(*_price_range(result)))
+    while queue:
+        batch = activate(db, list(queue))
+        queue.clear()
+        for order_id in batch:
+            step = match_orders(db, order_id)
+            result.extend(step)
+            result.order_updates.update(step.order_updates)
+            result.wallet_updates.update(step.wallet_updates)
+            order = db.get(models.Order, order_id)
+            result.order_updates.setdefault(
+                order_id, (order.user_id, order_state(order))
+            )
+            queue.extend(book.trigger(*_price_range(step)))
+    return result
@@ -0,0 +1,123 @@
+# app/core/ticker.py
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+
+
+WINDOW_SECONDS = 24 * 60 * 60
+
+
+class RollingTicker:
+    """
+    24h ticker over a ring of per-second buckets.
+
+    Volume and notional are running sums: a fill adds to its bucket, and
+    buckets falling out of the window are subtracted as time advances.
+    High/low use monotonic deques, so every update is amortised O(1).
+    """
+
+    def __init__(self, window: int = WINDOW_SECONDS):
+        self._window = window
+        self._stamp = [-1] * window  # second each slot currently holds
+        self._volume = [0.0] * window
+        self._notional = [0.0] * window
+        self._count = [0] * window
+
+        self._total_volume = 0.0
+        self._total_notional = 0.0
+        self._total_count = 0
+        self._oldest: Optional[int] = None  # oldest second not yet evicted
+        self._latest = 0  # newest second seen
+
+        self._highs: deque = deque()  # (second, price), prices decreasing
+        self._lows: deque = deque()  # (second, price), prices increasing
+
+        self.last_price: Optional[float] = None
+        self.best_bid: Optional[float] = None
+        self.best_ask: Optional[float] = None
+        self._lock = threading.Lock()
+
+    # ---- Feeding ----
+    def add_trade(self, price: float, quantity: float, ts: float):
+        with self._lock:
+            # Late fills are booked into the newest bucket to keep deques ordered
+            sec = max(int(ts), self._latest)
+            self._expire(sec)
+            self._latest = sec
+            if self._oldest is None:
+                self._oldest = sec
+
+            slot = sec % self._window
+            if self._stamp[slot] != sec:
+                self._stamp[slot] = sec
+                self._volume[slot] = 0.0
+                self._notional[slot] = 0.0
+                self._count[slot] = 0
+            self._volume[slot] += quantity
+            self._notional[slot] += price * quantity
+            self._count[slot] += 1
+
+            self._total_volume += quantity
+            self._total_notional += price * quantity
+            self._total_count += 1
+
+            while self._highs and self._highs[-1][1] <= price:
+                self._highs.pop()
+            self._highs.append((sec, price))
+            while self._lows and self._lows[-1][1] >= price:
+                self._lows.pop()
+            self._lows.append((sec, price))
+
+            self.last_price = price
+
+    def update_quotes(self, best_bid: Optional[float], best_ask: Optional[float]):
+        self.best_bid = best_bid
+        self.best_ask = best_ask
+
+    def _expire(self, now: int):
+        if self._oldest is None:
+            return
+        cutoff = now - self._window  # seconds <= cutoff have left the window
+        if cutoff - self._oldest >= self._window:
+            # Idle for longer than the window: nothing survives
+            self._total_volume = 0.0
+            self._total_notional = 0.0
+            self._total_count = 0
+            self._oldest = cutoff + 1
+        while self._oldest <= cutoff:
+            slot = self._oldest % self._window
+            if self._stamp[slot] == self._oldest:
+                self._total_volume -= self._volume[slot]
+                self._total_notional -= self._notional[slot]
+                self._total_count -= self._count[slot]
+                self._stamp[slot] = -1
+            self._oldest += 1
+        if self._total_count == 0:
+            self._total_volume = 0.0
+            self._total_notional = 0.0
+
+        while self._highs and self._highs[0][0] <= cutoff:
+            self._highs.popleft()
+        while self._lows and self._lows[0][0] <= cutoff:
+            self._lows.popleft()
+
+    # ---- Reading ----
+    def snapshot(self, now: Optional[float] = None) -> dict:
+        now = datetime.now(timezone.utc).timestamp() if now is None else now
+        with self._lock:
+            self._expire(max(int(now), self._latest))
+            volume = self._total_volume
+            return {
+                "last_price": self.last_price,
+                "best_bid": self.best_bid,
+                "best_ask": self.best_ask,
+                "volume_24h": volume,
+                "high_24h": self._highs[0][1] if self._highs else None,
+                "low_24h": self._lows[0][1] if self._lows else None,
+                "vwap_24h": self._total_notional / volume if volume > 0 else None,
+                "trade_count_24h": self._total_count,
+            }
+
+
+ticker = RollingTicker()
@@ -0,0 +1,382 @@
+# app/core/wallet_service.py
+"""
+Atomic wallet mutations backed by an append-only ledger.
+
+Every change is written to `ledger_entries`. The `wallets` row is a compacted
+projection of the ledger: the current state is the row plus the deltas of
+entries not yet folded into it (`applied = false`).
+
+- Debits that need a guard (withdrawals, order reservations) update the row
+  with a single conditional `UPDATE ... WHERE x >= :needed` and log an
+  already-applied entry.
+- Everything else (deposits, releases, fills) only appends, so a busy
+  market-maker wallet isn't row-locked by every fill. `compact_ledger` folds
+  those entries into the row periodically.
+
+Unapplied entries only ever add to `balance`/`holdings`, so guarding on the
+row alone never overdraws; when it is too strict the user's entries are
+compacted on the spot and the guard retried once. Nothing here commits;
+callers own the transaction.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, insert, lambda_stmt, select, update
+from sqlalchemy.orm import Session
+
+from app.db import data_model as models
+
+
+class WalletNotFound(LookupError):
+    pass
+
+
+class InsufficientFunds(ValueError):
+    pass
+
+
+W = models.Wallet
+L = models.LedgerEntry
+Kind = models.LedgerKind
+FIELDS = ("balance", "reserved_balance", "holdings", "reserved_holdings")
+
+
+def wallet_state(wallet) -> dict:
+    """Wallet model or projection row -> dict pushed on the wallet channel."""
+    return {
+        "user_id": wallet.user_id,
+        "balance": wallet.balance,
+        "reserved_balance": wallet.reserved_balance,
+        "holdings": wallet.holdings,
+        "reserved_holdings": wallet.reserved_holdings,
+    }
+
+
+def _pending(field: str):
+    """Correlated sum of one column's unapplied deltas for the wallet's user."""
+    return func.coalesce(
+        select(func.sum(getattr(L, "d_" + field)))
+        .where(L.user_id == W.user_id, L.applied.is_(False))
+        .scalar_subquery(),
+        0.0,
+    )
+
+
+# Built once: the correlated sums are the most expensive part to construct
+_PROJECTION = [W.user_id] + [(getattr(W, f) + _pending(f)).label(f) for f in FIELDS]
+
+
+def _entry(user_id: str, kind, deltas: dict, ref_id=None, applied=False) -> dict:
+    entry = {"user_id": user_id, "kind": kind, "ref_id": ref_id, "applied": applied}
+    for f in FIELDS:
+        entry["d_" + f] = deltas.get(f, 0.0)
+    return entry
+
+
+def _append(db: Session, entries: List[dict]):
+    db.execute(insert(L), entries)
+
+
+# ---- Reads ----
+def get_wallet_state(db: Session, user_id: str) -> Optional[dict]:
+    stmt = lambda_stmt(lambda: select(*_PROJECTION).where(W.user_id == user_id))
+    row = db.execute(stmt).first()
+    return wallet_state(row) if row else None
+
+
+def get_wallet_states(db: Session, user_ids: Iterable[str]) -> Dict[str, dict]:
+    """Projected state of several wallets in one query."""
+    ids = list(user_ids)
+    stmt = lambda_stmt(lambda: select(*_PROJECTION).where(W.user_id.in_(ids)))
+    return {row.user_id: wallet_state(row) for row in db.execute(stmt)}
+
+
+def _require(db: Session, user_id: str) -> dict:
+    state = get_wallet_state(db, user_id)
+    if state is None:
+        raise WalletNotFound("Wallet not found")
+    return state
+
+
+# ---- Compaction ----
+_CLAIMED = (
+    L.user_id,
+    L.d_balance,
+    L.d_reserved_balance,
+    L.d_holdings,
+    L.d_reserved_holdings,
+)
+
+
+def _fold(db: Session, rows) -> int:
+    """Add claimed entry deltas to their wallet rows, one UPDATE per user."""
+    totals = defaultdict(lambda: dict.fromkeys(FIELDS, 0.0))
+    count = 0
+    for row in rows:
+        count += 1
+        for f in FIELDS:
+            totals[row.user_id][f] += getattr(row, "d_" + f)
+    for user_id, sums in totals.items():
+        db.execute(
+            update(W)
+            .where(W.user_id == user_id)
+            .values(**{f: getattr(W, f) + sums[f] for f in FIELDS})
+            .execution_options(synchronize_session=False)
+        )
+    return count
+
+
+def compact_user(db: Session, user_id: str) -> int:
+    """Fold one user's unapplied entries into their wallet row."""
+    rows = db.execute(
+        update(L)
+        .where(L.user_id == user_id, L.applied.is_(False))
+        .values(applied=True)
+        .returning(*_CLAIMED)
+        .execution_options(synchronize_session=False)
+    ).all()
+    return _fold(db, rows)
+
+
+def compact_ledger(db: Session, batch_size: int = 5000) -> int:
+    """
+    Fold up to `batch_size` of the oldest unapplied entries into the wallets.
+    Claiming them with `applied = false` in the WHERE keeps two concurrent
+    runs from folding the same entry twice.
+    """
+    oldest = (
+        select(L.id)
+        .where(L.applied.is_(False))
+        .order_by(L.id)
+        .limit(batch_size)
+        .scalar_subquery()
+    )
+    rows = db.execute(
+        update(L)
+        .where(L.id.in_(oldest), L.applied.is_(False))
+        .values(applied=True)
+        .returning(*_CLAIMED)
+        .execution_options(synchronize_session=False)
+    ).all()
+    return _fold(db, rows)
+
+
+# ---- Guarded debits (row UPDATE + applied entry) ----
+def _debit(
+    db: Session,
+    user_id: str,
+    kind,
+    deltas: dict,
+    guard: str,
+    amount: float,
+    message: str,
+    ref_id=None,
+) -> dict:
+    stmt = (
+        update(W)
+        .where(W.user_id == user_id, getattr(W, guard) >= amount)
+        .values(**{f: getattr(W, f) + d for f, d in deltas.items()})
+        .returning(W.user_id)
+        .execution_options(synchronize_session=False)
+    )
+    row = db.execute(stmt).first()
+    if row is None and compact_user(db, user_id):
+        # Funds may be sitting in unapplied credits; fold them and retry once
+        row = db.execute(stmt).first()
+    if row is None:
+        _require(db, user_id)
+        raise InsufficientFunds(message)
+
+    _append(db, [_entry(user_id, kind, deltas, ref_id, applied=True)])
+    return get_wallet_state(db, user_id)
+
+
+def withdraw(db: Session, user_id: str, amount: float) -> dict:
+    return _debit(
+        db,
+        user_id,
+        Kind.withdrawal,
+        {"balance": -amount},
+        guard="balance",
+        amount=amount,
+        message="Insufficient balance",
+    )
+
+
+def withdraw_holdings(db: Session, user_id: str, quantity: float) -> dict:
+    return _debit(
+        db,
+        user_id,
+        Kind.withdrawal,
+        {"holdings": -quantity},
+        guard="holdings",
+        amount=quantity,
+        message="Insufficient Assets",
+    )
+
+
+def reserve_balance(db: Session, user_id: str, amount: float, ref_id=None) -> dict:
+    """Move cash from available to reserved for a buy order."""
+    return _debit(
+        db,
+        user_id,
+        Kind.reserve,
+        {"balance": -amount, "reserved_balance": amount},
+        guard="balance",
+        amount=amount,
+        message="Insufficient balance",
+        ref_id=ref_id,
+    )
+
+
+def reserve_holdings(db: Session, user_id: str, quantity: float, ref_id=None) -> dict:
+    """Move assets from available to reserved for a sell order."""
+    return _debit(
+        db,
+        user_id,
+        Kind.reserve,
+        {"holdings": -quantity, "reserved_holdings": quantity},
+        guard="holdings",
+        amount=quantity,
+        message="Insufficient asset holdings",
+        ref_id=ref_id,
+    )
+
+
+# ---- Append-only changes ----
+def _credit(db: Session, user_id: str, kind, deltas: dict, ref_id=None) -> dict:
+    state = _require(db, user_id)
+    _append(db, [_entry(user_id, kind, deltas, ref_id)])
+    for f, d in deltas.items():
+        state[f] += d
+    return state
+
+
+def deposit(db: Session, user_id: str, amount: float) -> dict:
+    return _credit(db, user_id, Kind.deposit, {"balance": amount})
+
+
+def deposit_holdings(db: Session, user_id: str, quantity: float) -> dict:
+    return _credit(db, user_id, Kind.deposit, {"holdings": quantity})
+
+
+def release_balance(db: Session, user_id: str, amount: float, ref_id=None) -> dict:
+    """Return reserved cash to available (cancel / expiry)."""
+    return _credit(
+        db,
+        user_id,
+        Kind.release,
+        {"balance": amount, "reserved_balance": -amount},
+        ref_id,
+    )
+
+
+def release_holdings(db: Session, user_id: str, quantity: float, ref_id=None) -> dict:
+    return _credit(
+        db,
+        user_id,
+        Kind.release,
+        {"holdings": quantity, "reserved_holdings": -quantity},
+        ref_id,
+    )
+
+
+def release_orders(db: Session, releases: Iterable[tuple]) -> int:
+    """
+    Release the reservations of many orders with one INSERT (expiry).
+    `releases` are (user_id, side, amount, order_id): cash for buys,
+    assets for sells. Read the resulting states with `get_wallet_states`.
+    """
+    entries = []
+    for user_id, side, amount, order_id in releases:
+        if side == models.OrderType.buy:
+            deltas = {"balance": amount, "reserved_balance": -amount}
+        else:
+            deltas = {"holdings": amount, "reserved_holdings": -amount}
+        entries.append(_entry(user_id, Kind.release, deltas, order_id))
+    if entries:
+        _append(db, entries)
+    return len(entries)
+
+
+# ---- Fills ----
+def settle_fill(
+    db: Session,
+    buyer_id: str,
+    seller_id: str,
+    cost: float,
+    quantity: float,
+    ref_id: str = None,
+) -> bool:
+    """
+    Pay for a fill out of both sides' reservations by appending entries; the
+    wallet rows aren't touched. Returns False if either reservation is short.
+    """
+    states = get_wallet_states(db, {buyer_id, seller_id})
+    buyer, seller = states.get(buyer_id), states.get(seller_id)
+    if buyer is None or seller is None:
+        return False
+    if buyer["reserved_balance"] < cost or seller["reserved_holdings"] < quantity:
+        return False
+
+    _append(
+        db,
+        [
+            _entry(buyer_id, Kind.fill_debit, {"reserved_balance": -cost}, ref_id),
+            _entry(buyer_id, Kind.fill_credit, {"holdings": quantity}, ref_id),
+            _entry(
+                seller_id, Kind.fill_debit, {"reserved_holdings": -quantity}, ref_id
+            ),
+            _entry(seller_id, Kind.fill_credit, {"balance": cost}, ref_id),
+        ],
+    )
+    return True
+
+
+def settle_fills(db: Session, fills: Iterable[tuple]) -> int:
+    """
+    Settle many fills with one INSERT: `fills` are (buyer_id, seller_id,
+    cost, quantity, ref_id). Unlike `settle_fill` nothing is checked here;
+    the caller checks the reservations of everyone involved up front.
+    """
+    entries = []
+    for buyer_id, seller_id, cost, quantity, ref_id in fills:
+        entries += [
+            _entry(buyer_id, Kind.fill_debit, {"reserved_balance": -cost}, ref_id),
+            _entry(buyer_id, Kind.fill_credit, {"holdings": quantity}, ref_id),
+            _entry(
+                seller_id, Kind.fill_debit, {"reserved_holdings": -quantity}, ref_id
+            ),
+            _entry(seller_id, Kind.fill_credit, {"balance": cost}, ref_id),
+        ]
+    if entries:
+        _append(db, entries)
+    return len(entries) // 4
+
+
+# ---- Reconciliation ----
+def adjust_reservations(db: Session, drifts: Iterable[tuple]) -> int:
+    """
+    Reset reservations to what the pending orders need. `drifts` holds
+    (user_id, cash_drift, asset_drift) with drift = reserved - expected; the
+    difference moves back to (or out of) the available columns. Applied to
+    the row directly, since it may take from available funds.
+    """
+    entries = []
+    for user_id, cash, assets in drifts:
+        deltas = {
+            "balance": cash,
+            "reserved_balance": -cash,
+            "holdings": assets,
+            "reserved_holdings": -assets,
+        }
+        db.execute(
+            update(W)
+            .where(W.user_id == user_id)
+            .values(**{f: getattr(W, f) + d for f, d in deltas.items()})
+            .execution_options(synchronize_session=False)
+        )
+        entries.append(_entry(user_id, Kind.adjustment, deltas, applied=True))
+    if entries:
+        _append(db, entries)
+    return len(entries)
@@ -0,0 +1,88 @@
+# app/core/worker.py
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.executors.pool import ThreadPoolExecutor
+
+from app.core.cron_jobs import (
+    process_pending_orders_job,
+    persist_candles_job,
+    compact_ledger_job,
+    reconcile_reservations_job,
+    expire_orders_job,
+    matching_progress,
+    candles_progress,
+    ledger_progress,
+    reconcile_progress,
+    expiry_progress,
+)
+from app.core.config import settings
+from app.core.logs import logger
+
+
+class BackgroundWorker:
+    """
+    Runs matching and maintenance jobs on dedicated threads.
+
+    Jobs never touch the event loop: they use their own scheduler thread pool
+    and the worker DB pool, so API latency stays flat during a sweep. Each job
+    has at most one running instance, missed runs are coalesced, and the
+    JobProgress guards skip (and count) any overlap.
+    """
+
+    def __init__(self):
+        self.scheduler = BackgroundScheduler(
+            executors={"default": ThreadPoolExecutor(max_workers=2)},
+            job_defaults={"coalesce": True, "max_instances": 1},
+        )
+
+    def start(self):
+        self.scheduler.add_job(
+            process_pending_orders_job,
+            "interval",
+            seconds=60 * 5,
+            id="process_pending_orders_job",
+        )
+        self.scheduler.add_job(
+            persist_candles_job, "interval", seconds=10, id="persist_candles_job"
+        )
+        self.scheduler.add_job(
+            compact_ledger_job,
+            "interval",
+            seconds=settings.LEDGER_COMPACTION_INTERVAL_S,
+            id="compact_ledger_job",
+        )
+        self.scheduler.add_job(
+            reconcile_reservations_job,
+            "interval",
+            seconds=settings.RECONCILE_INTERVAL_S,
+            id="reconcile_reservations_job",
+        )
+        self.scheduler.add_job(
+            expire_orders_job,
+            "interval",
+            seconds=settings.EXPIRY_TICK_S,
+            id="expire_orders_job",
+        )
+        self.scheduler.start()
+        logger.info(
+            "🚀 Background worker started: process_pending_orders_job (every 300s), "
+            "persist_candles_job (every 10s), compact_ledger_job "
+            f"(every {settings.LEDGER_COMPACTION_INTERVAL_S}s), "
+            f"reconcile_reservations_job (every {settings.RECONCILE_INTERVAL_S}s), "
+            f"expire_orders_job (every {settings.EXPIRY_TICK_S:g}s)"
+        )
+
+    def shutdown(self):
+        self.scheduler.shutdown(wait=True)
+        logger.info("🛑 Background worker stopped.")
+
+    def stats(self) -> dict:
+        return {
+            "process_pending_orders_job": matching_progress.as_dict(),
+            "persist_candles_job": candles_progress.as_dict(),
+            "compact_ledger_job": ledger_progress.as_dict(),
+            "reconcile_reservations_job": reconcile_progress.as_dict(),
+            "expire_orders_job": expiry_progress.as_dict(),
+        }
+
+
+worker = BackgroundWorker()
@@ -1,56 +1,103 @@
 # app/core/ws_manager.py
 from fastapi import WebSocket
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Set
 import asyncio
 
+# Market-wide feeds
+PUBLIC_TOPICS = {"book", "trades", "ticker", "candles"}
+# Per-user feeds; a socket only ever receives its own user's updates
+PRIVATE_TOPICS = {"orders", "wallet"}
+TOPICS = PUBLIC_TOPICS | PRIVATE_TOPICS
+
+# What a freshly connected socket receives until it says otherwise
+DEFAULT_TOPICS = {"book", "trades"}
+
+
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: Dict[int, List[WebSocket]] = {}
+        self.active_connections: Dict[str, List[WebSocket]] = {}  # user_id -> sockets
         self.global_connections: List[WebSocket] = []
-        asyncio.create_task(self._ping_clients())
+        self.subscriptions: Dict[WebSocket, Set[str]] = {}
+        self._ping_task: Optional[asyncio.Task] = None
 
-    async def connect(self, websocket: WebSocket, user_id: int = None):
+    async def connect(self, websocket: WebSocket, user_id: str = None):
         await websocket.accept()
         if user_id:
             self.active_connections.setdefault(user_id, []).append(websocket)
         self.global_connections.append(websocket)
+        self.subscriptions[websocket] = set(DEFAULT_TOPICS)
+        # Started lazily: there is no running loop at import time
+        if self._ping_task is None or self._ping_task.done():
+            self._ping_task = asyncio.create_task(self._ping_clients())
 
-    def disconnect(self, websocket: WebSocket, user_id: int = None):
+    def disconnect(self, websocket: WebSocket, user_id: str = None):
         if user_id and user_id in self.active_connections:
             self.active_connections[user_id] = [
                 ws for ws in self.active_connections[user_id] if ws != websocket
             ]
+            if not self.active_connections[user_id]:
+                del self.active_connections[user_id]
         self.global_connections = [
             ws for ws in self.global_connections if ws != websocket
         ]
+        self.subscriptions.pop(websocket, None)
 
+    # ---- Subscriptions ----
+    def subscribe(self, websocket: WebSocket, topics: Iterable[str]) -> List[str]:
+        """Add topics to a socket; raises ValueError on unknown topics."""
+        topics = set(topics)
+        unknown = topics - TOPICS
+        if unknown:
+            raise ValueError(f"Unknown topics: {sorted(unknown)}")
+        self.subscriptions.setdefault(websocket, set()).update(topics)
+        return sorted(self.subscriptions[websocket])
+
+    def unsubscribe(self, websocket: WebSocket, topics: Iterable[str]) -> List[str]:
+        self.subscriptions.setdefault(websocket, set()).difference_update(topics)
+        return sorted(self.subscriptions[websocket])
+
+    # ---- Sending ----
     async def send_personal_message(self, message: str, websocket: WebSocket):
         try:
             await websocket.send_text(message)
         except Exception:
             pass
 
-    async def send_user_message(self, user_id: int, message: str):
-        for ws in self.active_connections.get(user_id, []):
+    async def send_user_message(self, user_id: str, message: str, topic: str = None):
+        """Send to a user's sockets, optionally only those subscribed to `topic`."""
+        for ws in list(self.active_connections.get(user_id, [])):
+            if topic and topic not in self.subscriptions.get(ws, ()):
+                continue
+            try:
+                await ws.send_text(message)
+            except Exception:
+                pass
+
+    async def publish(self, topic: str, message: str):
+        """Send a market-wide message to every socket subscribed to `topic`."""
+        for ws in list(self.global_connections):
+            if topic not in self.subscriptions.get(ws, ()):
+                continue
             try:
                 await ws.send_text(message)
             except Exception:
                 pass
 
     async def broadcast(self, message: str):
-        for ws in self.global_connections:
+        for ws in list(self.global_connections):
             try:
                 await ws.send_text(message)
             except Exception:
                 pass
 
     async def _ping_clients(self):
-        while True:
+        while self.global_connections:
             await asyncio.sleep(25)
-            for ws in self.global_connections:
+            for ws in list(self.global_connections):
                 try:
                     await ws.send_text("ping")
                 except Exception:
                     pass
 
+
 manager = ConnectionManager()
@@ -0,0 +1,40 @@
+# app/db/backfill.py
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.db import data_model as models
+
+
+def backfill_trade_parties(db: Session) -> int:
+    """
+    Fill `buyer_user_id`, `seller_user_id` and `notional` on trades written
+    before those columns existed, from the two orders. Trade history filters
+    on the party columns only, so until this runs older trades are missing
+    from `/trades/my`.
+
+    Idempotent: only NULL columns are touched, so after the first run each
+    statement updates nothing. Run at startup after `create_all`; the caller
+    commits. Returns the number of trades fixed.
+    """
+    Trade, Order = models.Trade, models.Order
+
+    def owner(order_id):
+        return select(Order.user_id).where(Order.id == order_id).scalar_subquery()
+
+    fixed = set()
+    for statement in (
+        update(Trade)
+        .where(Trade.buyer_user_id.is_(None))
+        .values(buyer_user_id=owner(Trade.buy_order_id)),
+        update(Trade)
+        .where(Trade.seller_user_id.is_(None))
+        .values(seller_user_id=owner(Trade.sell_order_id)),
+        update(Trade)
+        .where(Trade.notional.is_(None))
+        .values(notional=Trade.price * Trade.quantity),
+    ):
+        rows = db.execute(
+            statement.returning(Trade.id).execution_options(synchronize_session=False)
+        )
+        fixed.update(rows.scalars())
+    return len(fixed)
@@ -1,11 +1,16 @@
 # app/db/data_model.py
 from sqlalchemy import (
+    Boolean,
     Column,
     Float,
+    Index,
+    Integer,
     String,
     Enum,
     ForeignKey,
     DateTime,
+    text,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
@@ -25,6 +30,22 @@ class StatusType(str, enum.Enum):
     pending = "pending"
     executed = "executed"
     canceled = "canceled"
+    untriggered = "untriggered"  # stop waiting for its trigger price
+    expired = "expired"  # GTT/GTD/day order past its deadline
+
+
+# Statuses whose orders hold a reservation
+OPEN_STATUSES = (StatusType.pending, StatusType.untriggered)
+
+
+class LedgerKind(str, enum.Enum):
+    deposit = "deposit"
+    withdrawal = "withdrawal"
+    reserve = "reserve"
+    release = "release"
+    fill_debit = "fill_debit"
+    fill_credit = "fill_credit"
+    adjustment = "adjustment"  # reconciliation repair
 
 
 # ---- USER ----
@@ -46,6 +67,9 @@ class User(Base):
     # One-to-many orders
     orders = relationship("Order", back_populates="user", cascade="all, delete-orphan")
 
+    # Keyset pagination (ORDER BY created_at DESC, id DESC)
+    __table_args__ = (Index("ix_users_created_id", "created_at", "id"),)
+
 
 # ---- WALLET ----
 class Wallet(Base):
@@ -73,14 +97,22 @@ class Order(Base):
     user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), index=True)
 
     type = Column(Enum(OrderType), nullable=False)  # buy / sell
-    order_kind = Column(String, default="limit")  # "limit" or "market"
+    order_kind = Column(String, default="limit")  # limit/market/stop/stop_limit
     price = Column(Float, nullable=True)  # nullable for market orders
+    stop_price = Column(Float, nullable=True)  # trigger price of stop orders
     quantity = Column(Float, nullable=False)
     remaining_quantity = Column(Float, nullable=False)  # tracks partial fills
+    display_quantity = Column(Float, nullable=True)  # iceberg slice; NULL = all shown
+    visible_quantity = Column(Float, nullable=True)  # iceberg: unfilled slice
     status = Column(Enum(StatusType), default=StatusType.pending)
+    client_order_id = Column(String, nullable=True)  # idempotency key, unique per user
+    time_in_force = Column(String, default="gtc")  # gtc/gtt/gtd/day
+    expires_at = Column(DateTime, nullable=True)  # UTC deadline; NULL = never
 
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    # Time priority in the book; reset when an iceberg slice is replenished
+    queued_at = Column(DateTime, server_default=func.now())
 
     user = relationship("User", back_populates="orders")
 
@@ -92,6 +124,16 @@ class Order(Base):
         "Trade", foreign_keys="[Trade.sell_order_id]", back_populates="sell_order"
     )
 
+    # Keyset pagination over one user's orders and over all orders
+    __table_args__ = (
+        Index("ix_orders_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_orders_created_id", "created_at", "id"),
+        # Backstop for the in-memory dedupe cache; NULL keys never collide
+        UniqueConstraint(
+            "user_id", "client_order_id", name="uq_orders_user_client_order_id"
+        ),
+    )
+
 
 # ---- TRADE ----
 class Trade(Base):
@@ -105,10 +147,25 @@ class Trade(Base):
         String, ForeignKey("orders.id", ondelete="CASCADE"), index=True
     )
 
+    # Denormalised from the two orders so history never has to join them
+    buyer_user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"))
+    seller_user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"))
+    side = Column(Enum(OrderType))  # aggressor (taker) side
+
     price = Column(Float, nullable=False)
     quantity = Column(Float, nullable=False)
+    notional = Column(Float)  # price * quantity
     created_at = Column(DateTime, server_default=func.now())
 
+    # Fetch created_at in the INSERT (RETURNING) instead of a later SELECT
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index("ix_trades_created_id", "created_at", "id"),
+        # Per-user history, newest first: one index range scan per side
+        Index("ix_trades_buyer_created_id", "buyer_user_id", "created_at", "id"),
+        Index("ix_trades_seller_created_id", "seller_user_id", "created_at", "id"),
+    )
+
     # relationships
     buy_order = relationship(
         "Order", foreign_keys=[buy_order_id], back_populates="buy_trades"
@@ -116,3 +173,54 @@ class Trade(Base):
     sell_order = relationship(
         "Order", foreign_keys=[sell_order_id], back_populates="sell_trades"
     )
+
+
+# ---- CANDLE (OHLCV) ----
+class Candle(Base):
+    __tablename__ = "candles"
+
+    interval = Column(String, primary_key=True)  # "1s", "1m", "5m", "1h", "1d"
+    bucket_start = Column(DateTime, primary_key=True)  # UTC start of the bar
+
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(Float, nullable=False, default=0.0)
+    trade_count = Column(Integer, nullable=False, default=0)
+
+
+# ---- LEDGER (append-only wallet changes) ----
+class LedgerEntry(Base):
+    __tablename__ = "ledger_entries"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)  # append order
+    user_id = Column(String, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(Enum(LedgerKind), nullable=False)
+
+    # Signed deltas against the matching Wallet columns
+    d_balance = Column(Float, nullable=False, default=0.0)
+    d_reserved_balance = Column(Float, nullable=False, default=0.0)
+    d_holdings = Column(Float, nullable=False, default=0.0)
+    d_reserved_holdings = Column(Float, nullable=False, default=0.0)
+
+    ref_id = Column(String, nullable=True)  # order or trade id
+    applied = Column(Boolean, nullable=False, default=False)  # folded into wallets
+    created_at = Column(DateTime, server_default=func.now())
+
+    # Only unapplied entries are read on the hot path
+    __table_args__ = (
+        Index(
+            "ix_ledger_entries_pending_user",
+            "user_id",
+            postgresql_where=text("NOT applied"),
+            sqlite_where=text("NOT applied"),
+        ),
+        Index(
+            "ix_ledger_entries_pending_id",
+            "id",
+            postgresql_where=text("NOT applied"),
+            sqlite_where=text("NOT applied"),
+        ),
+        Index("ix_ledger_entries_user_created", "user_id", "created_at"),
+    )
@@ -1,28 +1,143 @@
 # app/db/session.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 from typing import Generator
 
 from dotenv import load_dotenv
 import os
+import time
+
+from app.core.config import settings
+from app.core.logs import sql_logger
 
 load_dotenv()
 
 # --- Database URL ---
 DATABASE_URL = os.environ.get("DATABASE_URL")
+# Replica for read-only endpoints; defaults to the primary
+READ_DATABASE_URL = os.environ.get("READ_DATABASE_URL") or DATABASE_URL
+
+
+# --- Statement caching ---
+def statement_options(url: str) -> dict:
+    """
+    Compiled-statement cache size, plus server-side prepared statements when
+    the driver supports them (psycopg 3: `postgresql+psycopg://`; psycopg2
+    has no prepare support).
+    """
+    options = {"query_cache_size": settings.SQL_COMPILED_CACHE_SIZE}
+    if make_url(url).get_driver_name() == "psycopg":
+        threshold = settings.SQL_PREPARE_THRESHOLD
+        options["connect_args"] = {"prepare_threshold": threshold}
+    return options
+
 
 # --- SQLAlchemy Engine ---
+# Pool sizes come from Settings (DB_*, WORKER_DB_*, READ_DB_*)
 engine = create_engine(
     DATABASE_URL,
-    pool_size=10,  # default 5
-    max_overflow=20,  # default 10
-    pool_timeout=50,
-    echo=True,
+    **statement_options(DATABASE_URL),
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    echo=False,  # SQL_ECHO routes statements through the async log queue
 )
 
 # --- Session Factory ---
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# --- Separate pool for background matching/maintenance jobs ---
+# Sweeps hold connections for their whole run; keeping them on their own
+# pool means they can never starve request handlers (and vice versa).
+worker_engine = create_engine(
+    DATABASE_URL,
+    **statement_options(DATABASE_URL),
+    pool_size=settings.WORKER_DB_POOL_SIZE,
+    max_overflow=0,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    echo=False,
+)
+WorkerSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,  # avoid re-SELECTing every row after each commit
+    bind=worker_engine,
+)
+
+# --- Read-only pool (replica, or its own pool on the primary) ---
+# List endpoints and feed snapshots wait on this pool, never on the one that
+# order entry and matching write through. A short timeout makes an overloaded
+# read path fail fast instead of queueing.
+read_engine = create_engine(
+    READ_DATABASE_URL,
+    **statement_options(READ_DATABASE_URL),
+    pool_size=settings.READ_DB_POOL_SIZE,
+    max_overflow=settings.READ_DB_MAX_OVERFLOW,
+    pool_timeout=settings.READ_DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    echo=False,
+)
+if read_engine.dialect.name == "postgresql":
+    # Reject accidental writes through the read session
+    read_engine = read_engine.execution_options(postgresql_readonly=True)
+ReadSessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=read_engine,
+)
+
+
+def pool_stats() -> dict:
+    """Checked-out / idle / overflow counts per pool, for /metrics."""
+    pools = {"primary": engine, "worker": worker_engine, "read": read_engine}
+    return {
+        name: {
+            "size": e.pool.size(),
+            "checked_out": e.pool.checkedout(),
+            "idle": e.pool.checkedin(),
+            "overflow": max(e.pool.overflow(), 0),  # negative until the pool fills
+        }
+        for name, e in pools.items()
+    }
+
+
+# --- Opt-in slow-query log ---
+def log_slow_queries(engine: Engine, threshold_ms: int):
+    """Log statements slower than `threshold_ms` to `backend.sql`."""
+    if threshold_ms <= 0:
+        return
+    threshold = threshold_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        if elapsed >= threshold:
+            sql_logger.warning(
+                f"🐢 Slow query ({elapsed * 1000:.1f} ms)",
+                extra={
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "statement": statement[:2000],
+                    "executemany": executemany,
+                },
+            )
+
+
+log_slow_queries(engine, settings.SQL_SLOW_QUERY_MS)
+log_slow_queries(worker_engine, settings.SQL_SLOW_QUERY_MS)
+log_slow_queries(read_engine, settings.SQL_SLOW_QUERY_MS)
+
 
 # --- Dependency for FastAPI ---
 def get_db() -> Generator[Session, None, None]:
@@ -35,3 +150,12 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def get_read_db() -> Generator[Session, None, None]:
+    """Like `get_db`, but on the read-only engine (replica when configured)."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
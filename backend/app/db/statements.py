@@ -0,0 +1,96 @@
+# app/db/statements.py
+"""
+Hot-path statements as lambda statements.
+
+A `lambda_stmt` is built and compiled once per call site: later calls only
+pull the bound values (closure variables) out of the lambda and hit the
+compiled cache, instead of rebuilding the expression tree and computing its
+cache key every time. Keep the lambdas free of branching on runtime values;
+pick a different lambda instead (as the book sides do).
+"""
+from sqlalchemy import asc, desc, lambda_stmt, select
+from sqlalchemy.sql import StatementLambdaElement
+
+from app.db.data_model import Order, OrderType, StatusType, Trade, User
+
+
+# ---- Users ----
+def user_by_username(username: str) -> StatementLambdaElement:
+    return lambda_stmt(lambda: select(User).where(User.username == username))
+
+
+# ---- Matching ----
+# Resting orders are loaded as plain columns (app.core.book.RestingOrder)
+RESTING_COLUMNS = (
+    Order.id,
+    Order.user_id,
+    Order.type,
+    Order.order_kind,
+    Order.price,
+    Order.quantity,
+    Order.remaining_quantity,
+    Order.status,
+    Order.display_quantity,
+    Order.visible_quantity,
+    Order.queued_at,
+    Order.created_at,
+)
+
+
+def lock_order(order_id: str) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(Order)
+        .where(Order.id == order_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+
+
+def opposite_orders(side) -> StatementLambdaElement:
+    """
+    Pending orders on the other side of `side` as `RESTING_COLUMNS`, best
+    price first (FIFO on ties), locked FOR UPDATE SKIP LOCKED.
+    """
+    if side == OrderType.buy:
+        return lambda_stmt(
+            lambda: select(*RESTING_COLUMNS)
+            .where(Order.status == StatusType.pending, Order.type == OrderType.sell)
+            .order_by(asc(Order.price), asc(Order.queued_at))
+            .with_for_update(skip_locked=True)
+        )
+    return lambda_stmt(
+        lambda: select(*RESTING_COLUMNS)
+        .where(Order.status == StatusType.pending, Order.type == OrderType.buy)
+        .order_by(desc(Order.price), asc(Order.queued_at))
+        .with_for_update(skip_locked=True)
+    )
+
+
+# ---- Feed snapshots ----
+def top_of_book(side, depth: int) -> StatementLambdaElement:
+    if side == OrderType.buy:
+        return lambda_stmt(
+            lambda: select(*RESTING_COLUMNS)
+            .where(Order.type == OrderType.buy, Order.status == StatusType.pending)
+            .order_by(Order.price.desc(), Order.queued_at.asc())
+            .limit(depth)
+        )
+    return lambda_stmt(
+        lambda: select(*RESTING_COLUMNS)
+        .where(Order.type == OrderType.sell, Order.status == StatusType.pending)
+        .order_by(Order.price.asc(), Order.queued_at.asc())
+        .limit(depth)
+    )
+
+
+def largest_trades(limit: int) -> StatementLambdaElement:
+    return lambda_stmt(
+        lambda: select(
+            Trade.price,
+            Trade.quantity,
+            (Trade.price * Trade.quantity).label("total_amount"),
+            Trade.created_at,
+        )
+        .order_by(desc("total_amount"))
+        .limit(limit)
+    )
@@ -1,29 +1,57 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from contextlib import asynccontextmanager
-from app.routes import users, orders, trades, auth, wallets
-from app.core.cron_jobs import process_pending_orders_job
+from app.routes import users, orders, trades, auth, wallets, market
+from app.core.worker import worker
+from app.core.candles import candle_aggregator
+from app.core.publisher import publisher
+from app.core.event_bridge import bridge
+from app.core.bus import bus
+from app.core.reconciliation import reconciler
+from app.core.order_dedupe import order_dedupe
+from app.core.rate_limit import limiter
+from app.core.risk import risk
+from app.core.stops import stop_book
+from app.core.auction import auction
+from app.core import expiry
 from app.websocket import router as ws_router
-from app.db.session import engine
+from app.db.session import engine, pool_stats, SessionLocal
 from app.db.data_model import Base
-from app.core.logs import logger
-
-
-scheduler = AsyncIOScheduler()
+from app.db.backfill import backfill_trade_parties
+from app.core.logs import logger, log_stats
+from app.core.gc_tuning import gc_stats, tune_gc
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: create tables
     Base.metadata.create_all(bind=engine)
-    scheduler.add_job(process_pending_orders_job, "interval", seconds=60 * 5)
-    scheduler.start()
-    logger.info("🚀 Scheduler started with job: process_pending_orders_job (every 60s)")
+    db = SessionLocal()
+    try:
+        # Trades from before the denormalised party columns
+        fixed = backfill_trade_parties(db)
+        db.commit()
+        if fixed:
+            logger.info(f"🔧 Backfilled parties on {fixed} trades")
+        candle_aggregator.load(db)
+        stop_book.load(db)
+        expiry.load(db)
+    finally:
+        db.close()
+    tune_gc()
+    await bus.start()
+    publisher.start()
+    # Sync code (routes, scheduler, worker threads) publishes through the bridge
+    bridge.bind(asyncio.get_running_loop(), bus.publish)
+    # Matching and maintenance run on their own threads and DB pool
+    worker.start()
 
     yield
-    scheduler.shutdown()
-    logger.info("🛑 Scheduler stopped.")
+    worker.shutdown()
+    bridge.unbind()
+    await publisher.stop()
+    await bus.stop()
 
 
 app = FastAPI(title="Real-Time Trading Platform", version="1.0", lifespan=lifespan)
@@ -42,6 +70,7 @@ app.include_router(users.router, prefix="/users", tags=["Users"])
 app.include_router(orders.router, prefix="/orders", tags=["Orders"])
 app.include_router(trades.router, prefix="/trades", tags=["Trades"])
 app.include_router(wallets.router, prefix="/wallets", tags=["Wallets"])
+app.include_router(market.router, tags=["Market Data"])
 app.include_router(ws_router, prefix="/ws", tags=["WebSocket"])
 
 
@@ -55,4 +84,29 @@ def root():
 @app.get("/health")
 def health():
     logger.debug("Health check called")
-    return {"status": "ok"} 
+    return {"status": "ok"}
+
+
+# Feed and bridge counters for monitoring
+@app.get("/metrics")
+def metrics():
+    return {
+        "event_bridge": {**bridge.stats, "pending": bridge.pending},
+        "publisher": publisher.stats,
+        "bus": bus.stats,
+        "jobs": worker.stats(),
+        "logging": log_stats(),
+        "gc": gc_stats(),
+        "db_pools": pool_stats(),
+        "rate_limits": limiter.snapshot(),
+        "risk": risk.snapshot(),
+        "auction": auction.snapshot(),
+        "candles": candle_aggregator.stats,
+        "stops": {**stop_book.stats, "resting": len(stop_book)},
+        "expiry": {**expiry.expiry_wheel.stats, "timers": len(expiry.expiry_wheel)},
+        "order_dedupe": {**order_dedupe.stats, "size": len(order_dedupe)},
+        "reconciliation": {
+            **reconciler.stats,
+            "last_mismatches": reconciler.last_mismatches,
+        },
+    }
@@ -15,12 +15,17 @@ from app.core.security import (
     decode_token,
 )
 from app.core.config import settings
+from app.core.rate_limit import rate_limit
 
 router = APIRouter()
 
 
 # ---- Register (signup) ----
-@router.post("/register", response_model=schemas.UserResponse)
+@router.post(
+    "/register",
+    response_model=schemas.UserResponse,
+    dependencies=[Depends(rate_limit("auth"))],
+)
 async def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     if db.query(models.User).filter(models.User.username == user.username).first():
         raise HTTPException(status_code=400, detail="Username already exists")
@@ -46,7 +51,11 @@ async def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
 
 
 # ---- Login ----
-@router.post("/login", response_model=schemas.Token)
+@router.post(
+    "/login",
+    response_model=schemas.Token,
+    dependencies=[Depends(rate_limit("auth"))],
+)
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)
 ):
@@ -77,7 +86,11 @@ async def login(
 
 
 # ---- Refresh token endpoint ----
-@router.post("/refresh-token", response_model=schemas.Token)
+@router.post(
+    "/refresh-token",
+    response_model=schemas.Token,
+    dependencies=[Depends(rate_limit("auth"))],
+)
 async def refresh_token(refresh_token: str = Body(...), db: Session = Depends(get_db)):
     payload = decode_token(refresh_token)
     user_id: str = payload.get("sub")
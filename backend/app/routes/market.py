@@ -0,0 +1,147 @@
+# app/routes/market.py
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.db.session import get_db, get_read_db
+from app.db import data_model as models
+from app.auth import get_current_admin
+from app.schemas.market_schema import CandleResponse, TickerResponse
+from app.core.candles import (
+    INTERVALS,
+    candle_aggregator,
+    candle_to_bar,
+    from_epoch,
+    to_epoch,
+)
+from app.core.ticker import ticker
+from app.core.auction import auction, indicative, uncross
+from app.core.order_matching import MatchResult
+from app.core.stops import run_stops, stop_book
+from app.core.market_data import trade_fills
+from app.core.broadcasts import broadcast_match_updates
+from app.core.publisher import publisher
+from app.core.logs import logger
+from app.core.rate_limit import rate_limit
+
+
+router = APIRouter()
+
+
+# ---- OHLCV candles ----
+@router.get(
+    "/candles",
+    response_model=List[CandleResponse],
+    dependencies=[Depends(rate_limit("reads"))],
+)
+def get_candles(
+    interval: str = Query("1m"),
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = Query(None),
+    limit: int = Query(500, gt=0, le=5000),
+    db: Session = Depends(get_read_db),
+):
+    if interval not in INTERVALS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported interval, expected one of {list(INTERVALS)}",
+        )
+    start = to_epoch(from_) if from_ else None
+    end = to_epoch(to) if to else None
+
+    candles = candle_aggregator.get_candles(interval, start, end, limit)
+
+    # Anything older than the in-memory ring comes from the persisted bars
+    oldest = candle_aggregator.oldest(interval)
+    if start is not None and (oldest is None or start < oldest):
+        query = db.query(models.Candle).filter(
+            models.Candle.interval == interval,
+            models.Candle.bucket_start >= from_epoch(start),
+        )
+        if oldest is not None:
+            query = query.filter(models.Candle.bucket_start < from_epoch(oldest))
+        if end is not None:
+            query = query.filter(models.Candle.bucket_start <= from_epoch(end))
+        rows = query.order_by(models.Candle.bucket_start.asc()).limit(limit).all()
+        candles = [candle_to_bar(r).to_dict(interval) for r in rows] + candles
+
+    return candles[-limit:]
+
+
+# ---- Rolling 24h ticker ----
+@router.get(
+    "/ticker",
+    response_model=TickerResponse,
+    dependencies=[Depends(rate_limit("reads"))],
+)
+def get_ticker():
+    return ticker.snapshot()
+
+
+# ---- Call auction: phase and indicative uncross ----
+@router.get("/auction", dependencies=[Depends(rate_limit("reads"))])
+def get_auction(db: Session = Depends(get_read_db)):
+    state = auction.snapshot()
+    if auction.active:
+        state["indicative"] = indicative(db)._asdict()
+    return state
+
+
+# ---- Start a call auction: orders accumulate, matching pauses (admin only) ----
+@router.post("/auction/start", dependencies=[Depends(rate_limit("orders"))])
+def start_auction(current_admin: models.User = Depends(get_current_admin)):
+    if not auction.start():
+        raise HTTPException(status_code=409, detail="Call auction already running")
+    logger.info(f"🔔 Call auction started by {current_admin.username}")
+    return auction.snapshot()
+
+
+# ---- Uncross the book at one price and resume matching (admin only) ----
+@router.post("/auction/uncross", dependencies=[Depends(rate_limit("orders"))])
+def uncross_auction(
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin),
+):
+    if not auction.active:
+        raise HTTPException(status_code=409, detail="No call auction running")
+    try:
+        clearing, trades = uncross(db)
+        fills = trade_fills(trades)  # created_at came back with the INSERT
+        db.commit()
+    except Exception as e:
+        logger.error(f"❌ Error uncrossing call auction: {e}", exc_info=True)
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+    # ---- Committed: end the auction and publish before anything else ----
+    auction.end(clearing, len(trades))
+    publisher.mark_book_dirty()
+    if trades:
+        publisher.add_fills(fills)
+        broadcast_match_updates(trades)
+    logger.info(
+        f"🔔 Call auction uncrossed at {clearing.price}: {clearing.volume} "
+        f"in {len(trades)} trades"
+    )
+
+    # ---- Back to continuous: run the stops the clearing price reached ----
+    # Own result and transaction: a failure only undoes the stop step
+    stops = MatchResult()
+    stops.extend(trades)
+    try:
+        run_stops(db, stops)
+        triggered = stops[len(trades) :]
+        stop_fills = trade_fills(triggered)
+        db.commit()
+    except Exception as e:
+        logger.error(f"❌ Error running stops after the uncross: {e}", exc_info=True)
+        db.rollback()
+        stop_book.load(db)  # put back the stops this attempt took out
+    else:
+        if stops.order_updates:
+            publisher.mark_book_dirty()
+        if triggered:
+            publisher.add_fills(stop_fills)
+        broadcast_match_updates(stops)
+    return {**clearing._asdict(), "trades": len(trades)}
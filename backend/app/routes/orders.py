@@ -1,72 +1,164 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
 from typing import List
 from decimal import Decimal
 
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.db import data_model as models
 from app.schemas import order_schema as schemas
-from app.auth import get_current_user, get_current_admin
-from app.core.broadcasts import get_order_book_snapshot, broadcast_order_book
+from app.auth import (
+    get_current_admin,
+    get_current_admin_read,
+    get_current_user,
+    get_current_user_read,
+)
+from app.core.broadcasts import (
+    broadcast_order,
+    send_order_update,
+    send_wallet_update,
+)
+from app.core import wallet_service
+from app.core.wallet_service import InsufficientFunds, WalletNotFound
+from app.core.order_matching import order_state
+from app.core.order_dedupe import order_dedupe
+from app.core.risk import RiskRejected, risk
+from app.core.stops import stop_book
+from app.core import expiry
+from app.core.pagination import PageParams, keyset_page, ndjson_export
+from app.core.publisher import publisher
+from app.core.responses import page_response
 from app.core.logs import logger
+from app.core.rate_limit import rate_limit
 
 router = APIRouter()
 
 
+def _order_by_client_id(db: Session, user_id: str, client_order_id):
+    if client_order_id is None:
+        return None
+    return (
+        db.query(models.Order)
+        .filter(
+            models.Order.user_id == user_id,
+            models.Order.client_order_id == client_order_id,
+        )
+        .first()
+    )
+
+
 # ---- Create an order (user only) ----
-@router.post("/", response_model=schemas.OrderResponse)
+@router.post(
+    "/",
+    response_model=schemas.OrderResponse,
+    dependencies=[Depends(rate_limit("orders"))],
+)
 async def create_order(
     order: schemas.OrderCreate,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    wallet = (
-        db.query(models.Wallet).filter(models.Wallet.user_id == current_user.id).first()
-    )
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
+    # ---- Retried submission: answer with the original result ----
+    dedupe_key = None
+    if order.client_order_id is not None:
+        dedupe_key = (current_user.id, order.client_order_id)
+        cached = order_dedupe.get(dedupe_key)
+        if cached is not None:
+            return cached
 
     try:
-        # ---- Buy order ----
         if order.type == models.OrderType.buy:
-            if order.order_kind == schemas.OrderKind.limit:
-                if order.price is None:
-                    raise HTTPException(
-                        status_code=400, detail="Price required for limit buy"
-                    )
-                total_cost = Decimal(order.price) * Decimal(order.quantity)
-                if Decimal(wallet.balance) < total_cost:
-                    raise HTTPException(status_code=400, detail="Insufficient balance")
-                wallet.balance -= float(total_cost)
-                wallet.reserved_balance += float(total_cost)
-            else:
+            if order.order_kind == schemas.OrderKind.stop:
+                raise HTTPException(
+                    status_code=400, detail="Stop buys must be stop_limit orders"
+                )
+            if order.order_kind == schemas.OrderKind.market:
                 raise HTTPException(
                     status_code=400, detail="Market buy not implemented yet"
                 )
-
-        # ---- Sell order ----
-        elif order.type == models.OrderType.sell:
-            if Decimal(wallet.holdings) < Decimal(order.quantity):
+            if order.price is None:
                 raise HTTPException(
-                    status_code=400, detail="Insufficient asset holdings"
+                    status_code=400, detail="Price required for limit buy"
                 )
-            wallet.holdings -= order.quantity
-            wallet.reserved_holdings += order.quantity
+            amount = float(Decimal(order.price) * Decimal(order.quantity))
+        else:
+            amount = order.quantity
 
-        # ---- Save order ----
+        expires_at = expiry.resolve_expiry(order.time_in_force, order.expires_at)
+        if expires_at is not None and expires_at <= expiry.utcnow():
+            raise HTTPException(status_code=400, detail="Expiry time is in the past")
+
+        # ---- Pre-trade risk: limits and funds checked in memory ----
+        risk.check(
+            db, current_user.id, order.type, order.price, order.quantity, amount
+        )
+
+        # ---- Reserve funds: one conditional UPDATE, no read-modify-write ----
+        try:
+            if order.type == models.OrderType.buy:
+                wallet = wallet_service.reserve_balance(db, current_user.id, amount)
+            else:
+                wallet = wallet_service.reserve_holdings(db, current_user.id, amount)
+        except InsufficientFunds:
+            risk.invalidate(current_user.id)  # the cache was optimistic
+            raise
+
+        # ---- Save order (same transaction as the reservation) ----
+        is_stop = order.order_kind in schemas.STOP_KINDS
         db_order = models.Order(
-            **order.model_dump(), remaining_quantity=order.quantity, status="pending"
+            **order.model_dump(exclude={"user_id", "expires_at"}),
+            user_id=current_user.id,
+            expires_at=expires_at,
+            remaining_quantity=order.quantity,
+            visible_quantity=order.display_quantity,
+            status="untriggered" if is_stop else "pending",
         )
         db.add(db_order)
         db.commit()
         db.refresh(db_order)
+        result = schemas.OrderResponse.model_validate(db_order)
+        risk.on_reserved(current_user.id, wallet)
+        if dedupe_key is not None:
+            order_dedupe.put(dedupe_key, result)
+        expiry.schedule(db_order.id, db_order.expires_at)
 
-        # ---- Broadcast updated order book ----
-        order_book = get_order_book_snapshot(db)
-        broadcast_order_book(order_book)
+        if is_stop:
+            # ---- Off the book until a trade reaches the stop price ----
+            stop_book.add(
+                db_order.id, db_order.type, db_order.stop_price, db_order.created_at
+            )
+        else:
+            # ---- Order book changed; published on the next tick ----
+            publisher.mark_book_dirty()
 
-        return db_order
+        # ---- Private updates for the owner ----
+        broadcast_order(db_order)
+        send_wallet_update(current_user.id, wallet)
+
+        return result
+    except HTTPException:
+        db.rollback()
+        raise
+    except IntegrityError as e:
+        # Key already used but not cached (evicted, expired, other worker).
+        # The rollback also undoes this attempt's reservation.
+        db.rollback()
+        existing = _order_by_client_id(db, current_user.id, order.client_order_id)
+        if existing is None:
+            logger.error(f"❌ Error creating order: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+        result = schemas.OrderResponse.model_validate(existing)
+        order_dedupe.put(dedupe_key, result, backstop=True)
+        return result
+    except WalletNotFound as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except (InsufficientFunds, RiskRejected) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Error creating order: {e}", exc_info=True)
         db.rollback()
@@ -74,7 +166,11 @@ async def create_order(
 
 
 # ---- Get a single order (user or admin) ----
-@router.get("order_id/{order_id}", response_model=schemas.OrderResponse)
+@router.get(
+    "order_id/{order_id}",
+    response_model=schemas.OrderResponse,
+    dependencies=[Depends(rate_limit("reads"))],
+)
 def get_order(
     order_id: int,
     db: Session = Depends(get_db),
@@ -89,32 +185,90 @@ def get_order(
     return db_order
 
 
-# ---- List current user's orders ----
-@router.get("/me", response_model=List[schemas.OrderResponse])
+# ---- Lean lists: plain columns, no ORM objects or nested users ----
+ORDER_LIST_COLUMNS = (
+    models.Order.id,
+    models.Order.user_id,
+    models.Order.type,
+    models.Order.order_kind,
+    models.Order.price,
+    models.Order.stop_price,
+    models.Order.quantity,
+    models.Order.display_quantity,
+    models.Order.remaining_quantity,
+    models.Order.status,
+    models.Order.client_order_id,
+    models.Order.time_in_force,
+    models.Order.expires_at,
+    models.Order.created_at,
+    models.Order.updated_at,
+)
+ORDER_LIST = TypeAdapter(List[schemas.OrderListItem])
+ORDER_ADMIN_LIST = TypeAdapter(List[schemas.OrderAdminListItem])
+
+
+# ---- List current user's orders (newest first, keyset-paginated) ----
+@router.get(
+    "/me",
+    response_model=List[schemas.OrderListItem],
+    dependencies=[Depends(rate_limit("reads"))],
+)
 def list_my_orders(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user),
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(get_current_user_read),
 ):
-    return db.query(models.Order).filter(models.Order.user_id == current_user.id).all()
+    query = db.query(*ORDER_LIST_COLUMNS).filter(
+        models.Order.user_id == current_user.id
+    )
+    rows = keyset_page(query, models.Order, page, response)
+    return page_response(rows, ORDER_LIST, response)
 
 
-# ---- List all orders (admin only) ----
-@router.get("/all", response_model=List[schemas.OrderResponse])
+# ---- List all orders (admin only, keyset-paginated) ----
+@router.get(
+    "/all",
+    response_model=List[schemas.OrderAdminListItem],
+    dependencies=[Depends(rate_limit("reads"))],
+)
 def list_all_orders(
-    db: Session = Depends(get_db),
-    current_admin: models.User = Depends(get_current_admin),
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db),
+    current_admin: models.User = Depends(get_current_admin_read),
 ):
-    return db.query(models.Order).all()
+    # Owner's username comes from the same query
+    query = db.query(*ORDER_LIST_COLUMNS, models.User.username).join(
+        models.User, models.Order.user_id == models.User.id
+    )
+    rows = keyset_page(query, models.Order, page, response)
+    return page_response(rows, ORDER_ADMIN_LIST, response)
+
+
+# ---- Export all orders as NDJSON (admin only) ----
+@router.get("/export", dependencies=[Depends(rate_limit("reads"))])
+def export_orders(current_admin: models.User = Depends(get_current_admin)):
+    return ndjson_export(
+        select(models.Order).order_by(models.Order.created_at, models.Order.id),
+        lambda o: schemas.OrderListItem.model_validate(o).model_dump_json(),
+    )
 
 
 # ---- Cancel an order (user/admin) ----
-@router.delete("/{order_id}")
+@router.delete("/{order_id}", dependencies=[Depends(rate_limit("cancels"))])
 async def cancel_order(
     order_id: str,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    db_order = db.query(models.Order).filter(models.Order.id == order_id).first()
+    # Lock the row so a concurrent cancel or match can't release it twice
+    db_order = (
+        db.query(models.Order)
+        .filter(models.Order.id == order_id)
+        .with_for_update()
+        .first()
+    )
     if not db_order:
         raise HTTPException(status_code=404, detail="Order not found")
 
@@ -122,14 +276,6 @@ async def cancel_order(
     if current_user.role != "admin" and db_order.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    wallet = (
-        db.query(models.Wallet)
-        .filter(models.Wallet.user_id == db_order.user_id)
-        .first()
-    )
-    if not wallet:
-        raise HTTPException(status_code=404, detail="Wallet not found")
-
     try:
         # ---- Release reserved balances ----
         if db_order.type == models.OrderType.buy:
@@ -138,22 +284,40 @@ async def cancel_order(
                     status_code=400,
                     detail="Cannot cancel market order with undefined price",
                 )
-            total_cost = db_order.price * db_order.remaining_quantity
-            wallet.balance += total_cost
-            wallet.reserved_balance -= total_cost
-        elif db_order.type == models.OrderType.sell:
-            wallet.holdings += db_order.remaining_quantity
-            wallet.reserved_holdings -= db_order.remaining_quantity
+            wallet = wallet_service.release_balance(
+                db, db_order.user_id, db_order.price * db_order.remaining_quantity
+            )
+        else:
+            wallet = wallet_service.release_holdings(
+                db, db_order.user_id, db_order.remaining_quantity
+            )
+
+        # Capture the final state before the row goes away
+        canceled = order_state(db_order)
+        canceled["status"] = models.StatusType.canceled.value
+        owner_id = db_order.user_id
 
         # ---- Delete the order ----
         db.delete(db_order)
         db.commit()
+        risk.on_released(owner_id, wallet)
+        stop_book.discard(order_id)
+        expiry.expiry_wheel.cancel(order_id)
+
+        # ---- Order book changed; published on the next tick ----
+        publisher.mark_book_dirty()
 
-        # ---- Broadcast updated order book ----
-        order_book = get_order_book_snapshot(db)
-        broadcast_order_book(order_book)
+        # ---- Private updates for the owner ----
+        send_order_update(owner_id, canceled)
+        send_wallet_update(owner_id, wallet)
         return {"message": "Order cancelled successfully"}
 
+    except HTTPException:
+        db.rollback()
+        raise
+    except WalletNotFound as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"❌ Error in cancelling order: {e}", exc_info=True)
         db.rollback()
@@ -1,35 +1,43 @@
 # backend/app/routes/trades.py
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from fastapi import APIRouter, Depends, HTTPException, Response
 from fastapi.responses import JSONResponse
+from sqlalchemy import select, union_all
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from pydantic import TypeAdapter
+from typing import List
+from app.db.session import get_db, get_read_db
 from app.db import data_model as models
-from app.auth import get_current_user
-from app.core.order_matching import match_orders
-from app.core.broadcasts import (
-    broadcast_order_book,
-    broadcast_trade_book,
-    get_order_book_snapshot,
-    get_trade_snapshot,
-)
+from app.schemas.trade_schema import TradeHistoryItem
+from app.auth import get_current_admin, get_current_user_read
+from app.core.stops import match_with_stops
+from app.core.auction import auction
+from app.core.market_data import trade_fills
+from app.core.broadcasts import broadcast_match_updates
+from app.core.publisher import publisher
+from app.core.pagination import PageParams, keyset_filter, ndjson_export, trim_page
+from app.core.responses import page_response
+from app.core.rate_limit import rate_limit
 
 
 router = APIRouter()
 
 
 # ---- Create a trade by executing an existing order against opposite order ----
-@router.post("/")
+@router.post("/", dependencies=[Depends(rate_limit("orders"))])
 async def create_trade(order_id: str, db: Session = Depends(get_db)):
     """
     Execute trades for a given order_id using the centralized match_orders logic.
     This ensures all wallet updates, order status, and trade broadcasting are handled consistently.
     """
+    if auction.active:
+        raise HTTPException(status_code=409, detail="Market is in a call auction")
     db_order = db.query(models.Order).filter(models.Order.id == order_id).first()
     if not db_order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    # Use core order matching logic
-    trades = match_orders(db, db_order)
+    # Use core order matching logic (plus any stops the fills trigger)
+    trades = match_with_stops(db, db_order.id)
 
     # Refresh order after matching
     db.commit()
@@ -37,11 +45,11 @@ async def create_trade(order_id: str, db: Session = Depends(get_db)):
     for t in trades:
         db.refresh(t)
 
-    # Broadcast updated order book after trades
-    order_book = get_order_book_snapshot(db)
-    broadcast_order_book(order_book)
-    trade_book = get_trade_snapshot(db)
-    broadcast_trade_book(trade_book)
+    # Market data after trades is conflated and published on the next tick
+    if trades:
+        publisher.mark_book_dirty()
+        publisher.add_fills(trade_fills(trades))
+        broadcast_match_updates(trades)
 
     return JSONResponse(
         {
@@ -53,43 +61,119 @@ async def create_trade(order_id: str, db: Session = Depends(get_db)):
     )
 
 
-# ---- Get current user's trades ----
-@router.get("/my")
+# ---- Trade history: one indexed query per page ----
+HISTORY_COLUMNS = (
+    models.Trade.id,
+    models.Trade.buyer_user_id,
+    models.Trade.seller_user_id,
+    models.Trade.price,
+    models.Trade.quantity,
+    models.Trade.notional,
+    models.Trade.created_at,
+)
+
+
+def user_trades_page(user_id: str, page: PageParams):
+    """
+    Newest `limit + 1` trades where `user_id` bought or sold.
+
+    Each side is its own range scan over (buyer|seller_user_id, created_at,
+    id), already in order and cut to the page size; the outer query merges
+    the two short lists. This replaces an OR join through orders, which
+    could use neither FK index for the sort.
+    """
+
+    def side(column):
+        branch = select(*HISTORY_COLUMNS).where(column == user_id)
+        if page.after is not None:
+            branch = branch.where(keyset_filter(models.Trade, page))
+        branch = branch.order_by(
+            models.Trade.created_at.desc(), models.Trade.id.desc()
+        ).limit(page.limit + 1)
+        return select(branch.subquery())
+
+    merged = union_all(
+        side(models.Trade.buyer_user_id), side(models.Trade.seller_user_id)
+    ).subquery()
+    return (
+        select(merged)
+        .order_by(merged.c.created_at.desc(), merged.c.id.desc())
+        .limit(page.limit + 1)
+    )
+
+
+# ---- Get current user's trades (newest first, keyset-paginated) ----
+TRADE_HISTORY = TypeAdapter(List[TradeHistoryItem])
+
+
+@router.get(
+    "/my",
+    response_model=List[TradeHistoryItem],
+    dependencies=[Depends(rate_limit("reads"))],
+)
 def get_my_trades(
-    db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    response: Response,
+    page: PageParams = Depends(),
+    db: Session = Depends(get_read_db),
+    current_user=Depends(get_current_user_read),
 ):
-    # Trades where user was buyer or seller
-    trades = (
-        db.query(models.Trade)
-        .join(
-            models.Order,
-            (models.Trade.buy_order_id == models.Order.id)
-            | (models.Trade.sell_order_id == models.Order.id),
+    rows = db.execute(user_trades_page(current_user.id, page)).all()
+    trades = trim_page(rows, page, response)
+
+    # Counterparty usernames for the whole page in one query
+    counterparties = {
+        t.seller_user_id if t.buyer_user_id == current_user.id else t.buyer_user_id
+        for t in trades
+    }
+    names = {}
+    if counterparties:
+        users = select(models.User.id, models.User.username).where(
+            models.User.id.in_(counterparties)
         )
-        .filter(models.Order.user_id == current_user.id)
-        .all()
-    )
+        names = dict(db.execute(users).all())
 
     results = []
     for t in trades:
         # Check if current user was buyer or seller
-        if t.buy_order.user_id == current_user.id:
+        if t.buyer_user_id == current_user.id:
             trade_type = "buy"
-            client_name = t.sell_order.user.username  # other party
+            other = t.seller_user_id
         else:
             trade_type = "sell"
-            client_name = t.buy_order.user.username  # other party
+            other = t.buyer_user_id
 
         results.append(
             {
                 "id": t.id,
-                "client_name": client_name,
+                "client_name": names.get(other),
                 "trade_type": trade_type,
                 "price": t.price,
                 "quantity": t.quantity,
-                "created_at": t.created_at.isoformat(),
+                "notional": t.notional,
+                "created_at": t.created_at,
             }
         )
 
-    return results
+    return page_response(results, TRADE_HISTORY, response)
+
+
+# ---- Export all trades as NDJSON (admin only) ----
+@router.get("/export", dependencies=[Depends(rate_limit("reads"))])
+def export_trades(current_admin: models.User = Depends(get_current_admin)):
+    return ndjson_export(
+        select(models.Trade).order_by(models.Trade.created_at, models.Trade.id),
+        lambda t: json.dumps(
+            {
+                "id": t.id,
+                "buy_order_id": t.buy_order_id,
+                "sell_order_id": t.sell_order_id,
+                "buyer_user_id": t.buyer_user_id,
+                "seller_user_id": t.seller_user_id,
+                "side": getattr(t.side, "value", t.side),
+                "price": t.price,
+                "quantity": t.quantity,
+                "notional": t.notional,
+                "created_at": t.created_at.isoformat(),
+            }
+        ),
+    )
@@ -1,14 +1,19 @@
 # app/api/routes/users.py
 import re
 from fastapi import APIRouter, Depends, HTTPException, status, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
 
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from app.db import data_model as models
 from app.schemas import user_schema as schemas
-from app.auth import get_current_user, get_current_admin
+from app.auth import get_current_user, get_current_admin, get_current_admin_read
 from app.core.security import get_password_hash
 from app.core.logs import logger
+from app.core.pagination import PageParams, keyset_page, ndjson_export
+from app.core.responses import page_response
+from app.core.rate_limit import rate_limit
 
 
 router = APIRouter()
@@ -48,7 +53,11 @@ def validate_password(password: str):
 
 
 # ---- Create user (admin only) ----
-@router.post("/", response_model=schemas.UserResponse)
+@router.post(
+    "/",
+    response_model=schemas.UserResponse,
+    dependencies=[Depends(rate_limit("auth"))],
+)
 async def create_user(
     user: schemas.UserCreate,
     current_admin: models.User = Depends(get_current_admin),
@@ -85,17 +94,40 @@ async def create_user(
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
-# ---- List users (admin only) ----
-@router.get("/", response_model=list[schemas.UserResponse])
+# ---- List users (admin only, keyset-paginated) ----
+USER_LIST = TypeAdapter(list[schemas.UserResponse])
+
+
+@router.get(
+    "/",
+    response_model=list[schemas.UserResponse],
+    dependencies=[Depends(rate_limit("reads"))],
+)
 def list_users(
-    current_admin: models.User = Depends(get_current_admin),
-    db: Session = Depends(get_db),
+    response: Response,
+    page: PageParams = Depends(),
+    current_admin: models.User = Depends(get_current_admin_read),
+    db: Session = Depends(get_read_db),
 ):
-    return db.query(models.User).all()
+    rows = keyset_page(db.query(models.User), models.User, page, response)
+    return page_response(rows, USER_LIST, response)
+
+
+# ---- Export users as NDJSON (admin only) ----
+@router.get("/export", dependencies=[Depends(rate_limit("reads"))])
+def export_users(current_admin: models.User = Depends(get_current_admin)):
+    return ndjson_export(
+        select(models.User).order_by(models.User.created_at, models.User.id),
+        lambda u: schemas.UserResponse.model_validate(u).model_dump_json(),
+    )
 
 
 # ---- Get current user info (auto-refresh) ----
-@router.get("/me", response_model=schemas.UserResponse)
+@router.get(
+    "/me",
+    response_model=schemas.UserResponse,
+    dependencies=[Depends(rate_limit("reads"))],
+)
 def get_me(
     response: Response,
     current_user: models.User = Depends(get_current_user),
@@ -111,7 +143,11 @@ def get_me(
 
 
 # ---- Update current user's own info (auto-refresh) ----
-@router.put("/me", response_model=schemas.UserResponse)
+@router.put(
+    "/me",
+    response_model=schemas.UserResponse,
+    dependencies=[Depends(rate_limit("auth"))],
+)
 async def update_me(
     user_update: schemas.UserSelfUpdate,
     response: Response,
@@ -144,7 +180,11 @@ async def update_me(
 
 
 # ---- Update user (admin only) ----
-@router.put("/update/{user_id}", response_model=schemas.UserResponse)
+@router.put(
+    "/update/{user_id}",
+    response_model=schemas.UserResponse,
+    dependencies=[Depends(rate_limit("auth"))],
+)
 async def update_user(
     user_id: int,
     user: schemas.UserUpdate,
@@ -176,7 +216,7 @@ async def update_user(
 
 
 # ---- Delete user (admin only) ----
-@router.delete("/{user_id}")
+@router.delete("/{user_id}", dependencies=[Depends(rate_limit("auth"))])
 async def delete_user(
     user_id: int,
     current_admin: models.User = Depends(get_current_admin),
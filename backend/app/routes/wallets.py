@@ -7,14 +7,23 @@ from app.db.session import get_db
 from app.db import data_model as models
 from app.schemas.wallet_schema import WalletResponse
 from app.auth import get_current_user
+from app.core.broadcasts import send_wallet_update
+from app.core import wallet_service
+from app.core.wallet_service import InsufficientFunds, WalletNotFound
+from app.core.risk import risk
 from app.core.logs import logger
+from app.core.rate_limit import rate_limit
 
 
 router = APIRouter()
 
 
 # ---- Get current user's wallet info ----
-@router.get("/me", response_model=WalletResponse)
+@router.get(
+    "/me",
+    response_model=WalletResponse,
+    dependencies=[Depends(rate_limit("reads"))],
+)
 def get_my_wallet(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
@@ -25,133 +34,147 @@ def get_my_wallet(
         )
         if not wallet:
             raise HTTPException(status_code=404, detail="Wallet not found")
-        return wallet
+        # The row lags the ledger until compaction; report the projection
+        return {
+            "id": wallet.id,
+            "currency": wallet.currency,
+            "asset_symbol": wallet.asset_symbol,
+            **wallet_service.get_wallet_state(db, current_user.id),
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error creating order: {e}", exc_info=True)
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 # ---- Top-up wallet balance ----
-@router.post("/topup")
+@router.post("/topup", dependencies=[Depends(rate_limit("orders"))])
 async def topup_wallet(
     amount: Decimal,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    try:
-        if amount <= 0:
-            raise HTTPException(status_code=400, detail="Amount must be positive")
-
-        wallet = (
-            db.query(models.Wallet).filter(models.Wallet.user_id == current_user.id).first()
-        )
-        if not wallet:
-            raise HTTPException(status_code=404, detail="Wallet not found")
+    if amount <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be positive")
 
-        wallet.balance += float(amount)
+    try:
+        # Atomic ledger write; no read-modify-write race
+        state = wallet_service.deposit(db, current_user.id, float(amount))
         db.commit()
-        db.refresh(wallet)
+        risk.on_wallet(current_user.id, state)
+        send_wallet_update(current_user.id, state)
 
-        return {"message": f"Wallet topped up by {amount}", "balance": wallet.balance}
+        return {
+            "message": f"Wallet topped up by {amount}",
+            "balance": state["balance"],
+        }
+    except WalletNotFound as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except InsufficientFunds as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"❌ Error creating order: {e}", exc_info=True)
+        logger.error(f"❌ Error updating wallet: {e}", exc_info=True)
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
 # ---- Deduct wallet balance ----
-@router.post("/deduct")
+@router.post("/deduct", dependencies=[Depends(rate_limit("orders"))])
 async def deduct_wallet(
     amount: Decimal,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    try:
-        if amount <= 0:
-            raise HTTPException(status_code=400, detail="Amount must be positive")
-
-        wallet = (
-            db.query(models.Wallet).filter(models.Wallet.user_id == current_user.id).first()
-        )
-        if not wallet:
-            raise HTTPException(status_code=404, detail="Wallet not found")
-        if wallet.balance < float(amount):
-            raise HTTPException(status_code=400, detail="Insufficient balance")
+    if amount <= 0:
+        raise HTTPException(status_code=400, detail="Amount must be positive")
 
-        wallet.balance -= float(amount)
+    try:
+        # Atomic ledger write; no read-modify-write race
+        state = wallet_service.withdraw(db, current_user.id, float(amount))
         db.commit()
-        db.refresh(wallet)
+        risk.on_wallet(current_user.id, state)
+        send_wallet_update(current_user.id, state)
 
-        return {"message": f"Wallet deducted by {amount}", "balance": wallet.balance}
+        return {
+            "message": f"Wallet deducted by {amount}",
+            "balance": state["balance"],
+        }
+    except WalletNotFound as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except InsufficientFunds as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"❌ Error creating order: {e}", exc_info=True)
+        logger.error(f"❌ Error updating wallet: {e}", exc_info=True)
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
 # ---- Add BTC holdings ----
-@router.post("/add_btc")
+@router.post("/add_btc", dependencies=[Depends(rate_limit("orders"))])
 async def add_btc(
     quantity: Decimal,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    try:
-        if quantity <= 0:
-            raise HTTPException(status_code=400, detail="Quantity must be positive")
-
-        wallet = (
-            db.query(models.Wallet)
-            .filter(models.Wallet.user_id == current_user.id)
-            .first()
-        )
-        if not wallet:
-            raise HTTPException(status_code=404, detail="Wallet not found")
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be positive")
 
-        wallet.holdings += float(quantity)
+    try:
+        # Atomic ledger write; no read-modify-write race
+        state = wallet_service.deposit_holdings(db, current_user.id, float(quantity))
         db.commit()
-        db.refresh(wallet)
+        risk.on_wallet(current_user.id, state)
+        send_wallet_update(current_user.id, state)
 
         return {
             "message": f"Added Wallet holdings by {quantity} BTC",
-            "holdings": wallet.holdings,
+            "holdings": state["holdings"],
         }
+    except WalletNotFound as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except InsufficientFunds as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"❌ Error creating order: {e}", exc_info=True)
+        logger.error(f"❌ Error updating wallet: {e}", exc_info=True)
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
 
 # ---- Withdraw BTC holdings ----
-@router.post("/withdraw_btc")
+@router.post("/withdraw_btc", dependencies=[Depends(rate_limit("orders"))])
 async def withdraw_btc(
     quantity: Decimal,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    try:
-        if quantity <= 0:
-            raise HTTPException(status_code=400, detail="Quantity must be positive")
-
-        wallet = (
-            db.query(models.Wallet)
-            .filter(models.Wallet.user_id == current_user.id)
-            .first()
-        )
-        if not wallet:
-            raise HTTPException(status_code=404, detail="Wallet not found")
-        if wallet.holdings < float(quantity):
-            raise HTTPException(status_code=400, detail="Insufficient Assets")
+    if quantity <= 0:
+        raise HTTPException(status_code=400, detail="Quantity must be positive")
 
-        wallet.holdings -= float(quantity)
+    try:
+        # Atomic ledger write; no read-modify-write race
+        state = wallet_service.withdraw_holdings(db, current_user.id, float(quantity))
         db.commit()
-        db.refresh(wallet)
+        risk.on_wallet(current_user.id, state)
+        send_wallet_update(current_user.id, state)
 
         return {
             "message": f"Added Wallet holdings by {quantity} BTC",
-            "holdings": wallet.holdings,
+            "holdings": state["holdings"],
         }
+    except WalletNotFound as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except InsufficientFunds as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"❌ Error creating order: {e}", exc_info=True)
+        logger.error(f"❌ Error updating wallet: {e}", exc_info=True)
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
@@ -11,11 +11,14 @@ from .order_schema import (
     OrderCreate,
     OrderUpdate,
     OrderResponse,
+    OrderListItem,
+    OrderAdminListItem,
 )
 from .trade_schema import (
     TradeBase,
     TradeCreate,
     TradeResponse,
+    TradeHistoryItem,
 )
 
 __all__ = [
@@ -31,8 +34,11 @@ __all__ = [
     "OrderCreate",
     "OrderUpdate",
     "OrderResponse",
+    "OrderListItem",
+    "OrderAdminListItem",
     # Trade
     "TradeBase",
     "TradeCreate",
     "TradeResponse",
+    "TradeHistoryItem",
 ]
@@ -0,0 +1,27 @@
+# app/schemas/market_schema.py
+from pydantic import BaseModel
+from typing import Optional
+
+
+# ---- Candle (OHLCV bar) ----
+class CandleResponse(BaseModel):
+    interval: str
+    start: int  # bar start, epoch seconds (UTC)
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    trade_count: int
+
+
+# ---- Rolling 24h ticker ----
+class TickerResponse(BaseModel):
+    last_price: Optional[float] = None
+    best_bid: Optional[float] = None
+    best_ask: Optional[float] = None
+    volume_24h: float
+    high_24h: Optional[float] = None
+    low_24h: Optional[float] = None
+    vwap_24h: Optional[float] = None
+    trade_count_24h: int
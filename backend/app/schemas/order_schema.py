@@ -7,10 +7,23 @@ from app.db.data_model import OrderType, StatusType
 from app.schemas.user_schema import UserResponse
 
 
-# ---- Order kind (market/limit) ----
+# ---- Order kind ----
 class OrderKind(str, Enum):
     limit = "limit"
     market = "market"
+    stop = "stop"  # market order once the stop price trades
+    stop_limit = "stop_limit"  # limit order once the stop price trades
+
+
+STOP_KINDS = (OrderKind.stop, OrderKind.stop_limit)
+
+
+# ---- Time in force ----
+class TimeInForce(str, Enum):
+    gtc = "gtc"  # good till cancelled
+    gtt = "gtt"  # good till expires_at
+    gtd = "gtd"  # good till the session close on expires_at's date
+    day = "day"  # good till the next session close
 
 
 # ---- Base order schema ----
@@ -18,21 +31,60 @@ class OrderBase(BaseModel):
     type: OrderType  # Enum: buy/sell from DB
     order_kind: OrderKind = OrderKind.limit
     price: Optional[float] = None
+    stop_price: Optional[float] = None
     quantity: float = Field(..., gt=0)  # quantity must be > 0
+    # Iceberg: only this much is shown in the book at a time
+    display_quantity: Optional[float] = None
+    time_in_force: TimeInForce = TimeInForce.gtc
+    expires_at: Optional[datetime] = None
 
     @model_validator(mode="before")
     def check_price_for_limit_orders(cls, values):
         if isinstance(values, dict):
             order_kind = values.get("order_kind")
             price = values.get("price")
-            if order_kind == OrderKind.limit and (price is None or price <= 0):
+            stop_price = values.get("stop_price")
+            if order_kind in (OrderKind.limit, OrderKind.stop_limit) and (
+                price is None or price <= 0
+            ):
                 raise ValueError("Price must be provided and > 0 for limit orders")
+            if order_kind in STOP_KINDS and (stop_price is None or stop_price <= 0):
+                raise ValueError(
+                    "Stop price must be provided and > 0 for stop orders"
+                )
+            if order_kind == OrderKind.stop and price is not None:
+                raise ValueError(
+                    "Stop orders trade at market; use stop_limit for a price"
+                )
+            display_quantity = values.get("display_quantity")
+            if display_quantity is not None:
+                if order_kind in (OrderKind.market, OrderKind.stop):
+                    raise ValueError("Only limit orders can be icebergs")
+                quantity = values.get("quantity")
+                if display_quantity <= 0 or (
+                    isinstance(quantity, (int, float)) and display_quantity >= quantity
+                ):
+                    raise ValueError(
+                        "Display quantity must be > 0 and less than the quantity"
+                    )
+            time_in_force = values.get("time_in_force")
+            expires = values.get("expires_at") is not None
+            if time_in_force in (TimeInForce.gtt, TimeInForce.gtd) and not expires:
+                raise ValueError("expires_at is required for gtt and gtd orders")
+            if time_in_force in (None, TimeInForce.gtc, TimeInForce.day) and expires:
+                raise ValueError("expires_at is only allowed for gtt and gtd orders")
         return values
 
 
 # ---- Create order ----
 class OrderCreate(OrderBase):
-    user_id: str
+    # Orders always belong to the authenticated user; still accepted so older
+    # clients that send it keep working, but the value is ignored
+    user_id: Optional[str] = Field(
+        None, deprecated="Ignored: orders are placed for the authenticated user"
+    )
+    # Idempotency key: resubmitting it returns the original order
+    client_order_id: Optional[str] = Field(None, min_length=1, max_length=64)
 
 
 # ---- Update order ----
@@ -58,6 +110,7 @@ class OrderResponse(OrderBase):
     user_id: str
     status: StatusType
     remaining_quantity: float
+    client_order_id: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
@@ -65,3 +118,29 @@ class OrderResponse(OrderBase):
     user: UserResponse
 
     model_config = {"from_attributes": True}
+
+
+# ---- Lean list items (no nested user) ----
+class OrderListItem(BaseModel):
+    id: str
+    user_id: str
+    type: OrderType
+    order_kind: OrderKind
+    price: Optional[float] = None
+    stop_price: Optional[float] = None
+    quantity: float
+    display_quantity: Optional[float] = None
+    remaining_quantity: float
+    time_in_force: TimeInForce = TimeInForce.gtc
+    expires_at: Optional[datetime] = None
+    status: StatusType
+    client_order_id: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+# ---- Admin list item: the owner's username instead of a nested user ----
+class OrderAdminListItem(OrderListItem):
+    username: str
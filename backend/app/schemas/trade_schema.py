@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 from app.schemas.user_schema import UserBasic
 
 
@@ -28,3 +29,14 @@ class TradeResponse(TradeBase):
 
     model_config = {"from_attributes": True}
 
+
+
+# ---- Trade history item (from the current user's point of view) ----
+class TradeHistoryItem(BaseModel):
+    id: str
+    client_name: Optional[str] = None  # counterparty
+    trade_type: str  # "buy" / "sell"
+    price: float
+    quantity: float
+    notional: Optional[float] = None
+    created_at: datetime
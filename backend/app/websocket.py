@@ -1,72 +1,20 @@
 import asyncio
 import json
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
-from typing import Dict, List
 from jose import jwt, JWTError
 from app.core.config import settings
 from app.core.broadcasts import get_order_book_snapshot, get_trade_snapshot
-from app.db.session import get_db
-from app.db.data_model import User
+from app.core.wallet_service import get_wallet_state
+from app.core.ticker import ticker
+from app.core.ws_manager import manager
+from app.db.session import ReadSessionLocal, SessionLocal
+from app.auth import get_user_by_username
 
 router = APIRouter()
 
 
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[int, List[WebSocket]] = {}
-        self.global_connections: List[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket, user_id: int = None):
-        await websocket.accept()
-        if user_id:
-            self.active_connections.setdefault(user_id, []).append(websocket)
-        self.global_connections.append(websocket)
-
-    def disconnect(self, websocket: WebSocket, user_id: int = None):
-        if user_id and user_id in self.active_connections:
-            self.active_connections[user_id] = [
-                ws for ws in self.active_connections[user_id] if ws != websocket
-            ]
-        self.global_connections = [
-            ws for ws in self.global_connections if ws != websocket
-        ]
-
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        try:
-            await websocket.send_text(message)
-        except Exception:
-            pass
-
-    async def send_user_message(self, user_id: int, message: str):
-        for ws in self.active_connections.get(user_id, []):
-            try:
-                await ws.send_text(message)
-            except Exception:
-                pass
-
-    async def broadcast(self, message: str):
-        for ws in self.global_connections:
-            try:
-                await ws.send_text(message)
-            except Exception:
-                pass
-
-    async def ping_clients(self):
-        """Send ping to all clients every 25 seconds."""
-        while True:
-            await asyncio.sleep(25)
-            for ws in self.global_connections:
-                try:
-                    await ws.send_text("ping")
-                except Exception:
-                    pass
-
-
-manager = ConnectionManager()
-asyncio.create_task(manager.ping_clients())
-
-
 async def verify_token_ws(token: str):
+    """Return the user for a valid access token, else None."""
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
@@ -77,34 +25,99 @@ async def verify_token_ws(token: str):
     except JWTError:
         return None
 
-    db = next(get_db())
-    user = db.query(User).filter(User.username == username).first()
-    if not user:
-        return None
-    return username
+    db = SessionLocal()
+    try:
+        return get_user_by_username(db, username)
+    finally:
+        db.close()
+
+
+async def send_topic_snapshots(websocket: WebSocket, user_id: str, topics):
+    """Send the current state of each topic so a subscriber starts in sync."""
+    db = ReadSessionLocal()
+    try:
+        if "book" in topics:
+            order_book = get_order_book_snapshot(db)
+            await manager.send_personal_message(
+                f"Order Book Update: {json.dumps(order_book)}", websocket
+            )
+        if "trades" in topics:
+            trade_book = get_trade_snapshot(db)
+            await manager.send_personal_message(
+                f"Trade Book Update: {json.dumps(trade_book)}", websocket
+            )
+        if "ticker" in topics:
+            await manager.send_personal_message(
+                f"Ticker Update: {json.dumps(ticker.snapshot())}", websocket
+            )
+    finally:
+        db.close()
+
+    if "wallet" in topics:
+        # Balances come from the primary; a replica may lag the ledger
+        db = SessionLocal()
+        try:
+            wallet = get_wallet_state(db, user_id)
+        finally:
+            db.close()
+        if wallet:
+            await manager.send_personal_message(
+                f"Wallet Update: {json.dumps(wallet)}", websocket
+            )
+
+
+async def handle_command(websocket: WebSocket, user_id: str, data: str):
+    """
+    Client protocol:
+        {"action": "subscribe", "topics": ["book", "ticker", "wallet"]}
+        {"action": "unsubscribe", "topics": ["trades"]}
+    """
+    try:
+        command = json.loads(data)
+        action = command["action"]
+        topics = command.get("topics", [])
+        if isinstance(topics, str):
+            topics = [topics]
+    except (ValueError, KeyError, TypeError):
+        await manager.send_personal_message(f"Error: invalid command {data!r}", websocket)
+        return
+
+    if action == "subscribe":
+        try:
+            current = manager.subscribe(websocket, topics)
+        except ValueError as e:
+            await manager.send_personal_message(f"Error: {e}", websocket)
+            return
+        await manager.send_personal_message(
+            f"Subscribed: {json.dumps(current)}", websocket
+        )
+        await send_topic_snapshots(websocket, user_id, topics)
+    elif action == "unsubscribe":
+        current = manager.unsubscribe(websocket, topics)
+        await manager.send_personal_message(
+            f"Subscribed: {json.dumps(current)}", websocket
+        )
+    else:
+        await manager.send_personal_message(
+            f"Error: unknown action {action!r}", websocket
+        )
 
 
 @router.websocket("/")
 async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
-    user_id = await verify_token_ws(token)
-    if user_id is None:
+    user = await verify_token_ws(token)
+    if user is None:
         await websocket.close(code=1008)  # Policy Violation
         return
+    user_id = user.id
 
     await manager.connect(websocket, user_id)
-    await manager.send_personal_message(f"Connected as user: {user_id}", websocket)
-
-    # Broadcast the current order book to this new client
-    db = next(get_db())
-    order_book = get_order_book_snapshot(db)
     await manager.send_personal_message(
-        f"Order Book Update: {json.dumps(order_book)}", websocket
+        f"Connected as user: {user.username}", websocket
     )
 
-    trade_book = get_trade_snapshot(db)
-    await manager.send_personal_message(
-        f"Trade Book Update: {json.dumps(trade_book)}", websocket
-    )
+    # Bring the new client up to date on its default topics
+    await send_topic_snapshots(websocket, user_id, manager.subscriptions[websocket])
 
     try:
         while True:
@@ -112,11 +125,10 @@ async def websocket_endpoint(websocket: WebSocket, token: str = Query(...)):
                 data = await websocket.receive_text()
                 if data == "pong":
                     continue  # keep-alive response
-                await manager.send_personal_message(f"You said: {data}", websocket)
+                await handle_command(websocket, user_id, data)
             except WebSocketDisconnect:
                 break
             except Exception:
                 await asyncio.sleep(0.1)
     finally:
         manager.disconnect(websocket, user_id)
-        await manager.broadcast(f"User {user_id} disconnected.")
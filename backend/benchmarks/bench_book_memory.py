@@ -0,0 +1,128 @@
+# benchmarks/bench_book_memory.py
+"""
+Memory per resting order: ORM `Order` instances (identity map, instance
+state, attribute history) vs the slotted `RestingOrder` records matching
+loads (app/core/book.py), with a NumPy structured array of the same
+columns as the floor.
+
+Loads N pending orders from in-memory SQLite and measures what stays
+allocated with tracemalloc:
+
+    cd backend && python -m benchmarks.bench_book_memory [orders]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+import numpy as np  # noqa: E402
+from sqlalchemy import create_engine, insert, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.book import load_resting  # noqa: E402
+from app.db import data_model as models  # noqa: E402
+from app.db.statements import RESTING_COLUMNS  # noqa: E402
+
+# Same columns as RESTING_COLUMNS; strings as fixed-width bytes
+RESTING_DTYPE = np.dtype(
+    [
+        ("id", "S36"),
+        ("user_id", "S36"),
+        ("type", "u1"),
+        ("order_kind", "u1"),
+        ("price", "f8"),
+        ("quantity", "f8"),
+        ("remaining_quantity", "f8"),
+        ("status", "u1"),
+        ("display_quantity", "f8"),
+        ("visible_quantity", "f8"),
+        ("queued_at", "M8[us]"),
+        ("created_at", "M8[us]"),
+    ]
+)
+
+
+def setup(n):
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    now = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(models.Order),
+            [
+                dict(
+                    id=str(uuid.uuid4()),
+                    user_id=f"u{i % 100}",
+                    type=models.OrderType.sell,
+                    order_kind="limit",
+                    price=100.0 + i % 500 / 100,
+                    quantity=1.0,
+                    remaining_quantity=1.0,
+                    status=models.StatusType.pending,
+                    queued_at=now,
+                    created_at=now,
+                )
+                for i in range(n)
+            ],
+        )
+    return sessionmaker(bind=engine)()
+
+
+def measure(load):
+    """Bytes still allocated by what `load` returns, and seconds taken."""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = load()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return kept, size, elapsed
+
+
+def load_orm(db):
+    return db.query(models.Order).all()
+
+
+def load_records(db):
+    return load_resting(db, select(*RESTING_COLUMNS))
+
+
+def load_array(db):
+    rows = db.execute(select(*RESTING_COLUMNS)).all()
+    book = np.zeros(len(rows), dtype=RESTING_DTYPE)
+    book["id"] = [r.id for r in rows]
+    book["user_id"] = [r.user_id for r in rows]
+    book["price"] = [r.price for r in rows]
+    book["quantity"] = [r.quantity for r in rows]
+    book["remaining_quantity"] = [r.remaining_quantity for r in rows]
+    book["queued_at"] = [r.queued_at for r in rows]
+    book["created_at"] = [r.created_at for r in rows]
+    del rows
+    return book
+
+
+def main(n: int = 100_000):
+    db = setup(n)
+    print(f"{n:,} resting orders")
+    print(f"{'representation':28} {'bytes/order':>12} {'total MB':>9} {'load ms':>8}")
+    for name, load in (
+        ("ORM Order", load_orm),
+        ("RestingOrder (slots)", load_records),
+        ("NumPy structured array", load_array),
+    ):
+        kept, size, elapsed = measure(lambda: load(db))
+        print(f"{name:28} {size / n:12.0f} {size / 1e6:9.1f} {elapsed * 1000:8.0f}")
+        del kept
+        db.expunge_all()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,162 @@
+# benchmarks/bench_ring.py
+"""
+Hand-off latency between an API worker and a matching process: the
+shared-memory rings in app/core/ring.py vs a multiprocessing.Queue pair
+(pickled dicts through a pipe).
+
+A child process plays the engine and echoes every order back as an
+event. Round trip is measured one message at a time (worker puts, waits
+for the event), then throughput with the worker keeping the ring full:
+
+    cd backend && python -m benchmarks.bench_ring [messages]
+"""
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from app.core import ring  # noqa: E402
+from app.db import data_model as models  # noqa: E402
+
+PREFIX = f"bench-{os.getpid()}"
+STOP = 2**64 - 1  # seq that ends the echo loop
+
+
+class Order:
+    def __init__(self):
+        self.id = str(uuid.uuid4())
+        self.user_id = str(uuid.uuid4())
+        self.type = models.OrderType.buy
+        self.order_kind = "limit"
+        self.price = 100.5
+        self.remaining_quantity = 2.0
+
+
+# ---- Engine side (child process) ----
+def ring_engine():
+    orders, events = ring.worker_rings(0, PREFIX, 1024)
+    running = True
+
+    def echo(view):
+        nonlocal running
+        message = ring.decode_order(view)
+        if message.seq == STOP:
+            running = False
+        while not ring.put_event(
+            events, message, models.StatusType.executed, 1, message.quantity, 0.0
+        ):
+            pass
+
+    while running:
+        orders.wait()
+        orders.drain(echo)
+    orders.close()
+    events.close()
+
+
+def queue_engine(inbox, outbox):
+    while True:
+        message = inbox.get()
+        if message is None:
+            return
+        outbox.put(
+            {
+                **message,
+                "status": "executed",
+                "trades": 1,
+                "done_ns": time.monotonic_ns(),
+            }
+        )
+
+
+# ---- Worker side ----
+def percentiles(samples):
+    samples = sorted(samples)
+    return [samples[int(len(samples) * p)] / 1000 for p in (0.5, 0.99)]
+
+
+def bench_ring(n):
+    context = multiprocessing.get_context("fork")
+    orders, events = ring.engine_rings(0, PREFIX, 1024)
+    child = context.Process(target=ring_engine)
+    child.start()
+    order = Order()
+
+    latencies = []
+    for seq in range(n):
+        ring.put_order(orders, seq, "match", order)
+        events.wait()
+        event = events.get()
+        latencies.append(time.monotonic_ns() - event[1])
+
+    start = time.perf_counter()
+    sent = received = 0
+    while received < n:
+        while sent < n and ring.put_order(orders, sent, "match", order):
+            sent += 1
+        received += events.drain(lambda view: None)
+    throughput = n / (time.perf_counter() - start)
+
+    while not orders.put(STOP, 0, 0, 0, 0, 0.0, 0.0, b"", b""):
+        pass
+    child.join()
+    orders.close()
+    events.close()
+    return percentiles(latencies), throughput
+
+
+def bench_queue(n):
+    context = multiprocessing.get_context("fork")
+    inbox, outbox = context.Queue(), context.Queue()
+    child = context.Process(target=queue_engine, args=(inbox, outbox))
+    child.start()
+    order = Order()
+
+    def message(seq):
+        return {
+            "seq": seq,
+            "sent_ns": time.monotonic_ns(),
+            "action": "match",
+            "side": order.type.value,
+            "kind": order.order_kind,
+            "price": order.price,
+            "quantity": order.remaining_quantity,
+            "order_id": order.id,
+            "user_id": order.user_id,
+        }
+
+    latencies = []
+    for seq in range(n):
+        inbox.put(message(seq))
+        event = outbox.get()
+        latencies.append(time.monotonic_ns() - event["sent_ns"])
+
+    start = time.perf_counter()
+    for seq in range(n):
+        inbox.put(message(seq))
+    for _ in range(n):
+        outbox.get()
+    throughput = n / (time.perf_counter() - start)
+
+    inbox.put(None)
+    child.join()
+    return percentiles(latencies), throughput
+
+
+def main(n: int = 20_000):
+    print(f"{n:,} orders, round trip through a child process")
+    print(f"{'transport':26} {'p50 µs':>8} {'p99 µs':>8} {'msgs/s':>10}")
+    for name, bench in (
+        ("multiprocessing.Queue", bench_queue),
+        ("shared-memory rings", bench_ring),
+    ):
+        (p50, p99), throughput = bench(n)
+        print(f"{name:26} {p50:8.1f} {p99:8.1f} {throughput:10,.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
@@ -0,0 +1,109 @@
+# benchmarks/bench_serialization.py
+"""
+Cost of producing the /orders/all body for 10k orders: the old path
+(ORM objects, nested `UserResponse` lazy-loaded per owner, FastAPI's
+serialise-then-json.dumps) vs the lean one (plain columns plus username in
+one query, validated and encoded by a pydantic TypeAdapter).
+
+Runs against in-memory SQLite, so the numbers are mostly Python-side work:
+
+    cd backend && python -m benchmarks.bench_serialization [orders] [users]
+"""
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+from sqlalchemy import create_engine, event  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core.responses import PydanticJSONResponse  # noqa: E402
+from app.db import data_model as models  # noqa: E402
+from app.routes.orders import ORDER_ADMIN_LIST, ORDER_LIST_COLUMNS  # noqa: E402
+from app.schemas import order_schema as schemas  # noqa: E402
+
+RESPONSE_FIELD = create_model_field("Response", List[schemas.OrderResponse])
+
+
+# ---- Before: ORM rows, lazy nested users, FastAPI serialisation ----
+def legacy_body(db) -> bytes:
+    orders = db.query(models.Order).all()
+    content = asyncio.run(
+        serialize_response(field=RESPONSE_FIELD, response_content=orders)
+    )
+    return JSONResponse(content).body
+
+
+# ---- After ----
+def lean_body(db) -> bytes:
+    rows = (
+        db.query(*ORDER_LIST_COLUMNS, models.User.username)
+        .join(models.User, models.Order.user_id == models.User.id)
+        .all()
+    )
+    return PydanticJSONResponse(rows, ORDER_ADMIN_LIST).body
+
+
+def setup(n_orders: int, n_users: int):
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add_all(
+        models.User(
+            id=f"u{i}", username=f"user{i}", email=f"user{i}@ex.com",
+            hashed_password="x",
+        )
+        for i in range(n_users)
+    )
+    db.add_all(
+        models.Order(
+            user_id=f"u{i % n_users}",
+            type=models.OrderType.buy if i % 2 else models.OrderType.sell,
+            price=100.0 + i % 50,
+            quantity=1.0,
+            remaining_quantity=1.0,
+        )
+        for i in range(n_orders)
+    )
+    db.commit()
+    return engine, sessionmaker(bind=engine)
+
+
+def measure(sessions, engine, build):
+    """One fresh session per run, like a request: (ms, statements, bytes)."""
+    statements = []
+    listener = lambda *args: statements.append(1)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    db = sessions()
+    start = time.perf_counter()
+    body = build(db)
+    elapsed = (time.perf_counter() - start) * 1000
+    db.close()
+    event.remove(engine, "before_cursor_execute", listener)
+    return elapsed, len(statements), len(body)
+
+
+def main(n_orders: int = 10_000, n_users: int = 500, runs: int = 5):
+    engine, sessions = setup(n_orders, n_users)
+    print(f"{n_orders} orders from {n_users} users, best of {runs}")
+    print(f"{'path':10} {'ms':>8} {'queries':>8} {'bytes':>10}")
+    results = {}
+    for name, build in (("before", legacy_body), ("after", lean_body)):
+        runs_ = [measure(sessions, engine, build) for _ in range(runs)]
+        results[name] = min(runs_)
+        ms, queries, size = results[name]
+        print(f"{name:10} {ms:8.1f} {queries:8d} {size:10d}")
+    before, after = results["before"][0], results["after"][0]
+    print(f"speed-up: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,125 @@
+# benchmarks/bench_statements.py
+"""
+Per-call overhead of the hot queries: ORM Query built on every call vs the
+cached lambda statements in app/db/statements.py.
+
+Runs against in-memory SQLite with a tiny book so that statement
+construction, not the database, dominates:
+
+    cd backend && python -m benchmarks.bench_statements [iterations]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench.db")
+
+from sqlalchemy import asc, create_engine, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.auth import get_user_by_username  # noqa: E402
+from app.core import wallet_service  # noqa: E402
+from app.core.book import load_resting  # noqa: E402
+from app.db import data_model as models  # noqa: E402
+from app.db import statements  # noqa: E402
+
+
+# ---- Before: the queries as they were written inline ----
+def legacy_match_queries(db, order_id):
+    new_order = (
+        db.query(models.Order)
+        .filter(models.Order.id == order_id)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+    return (
+        db.query(models.Order)
+        .filter(models.Order.status == models.StatusType.pending)
+        .with_for_update(skip_locked=True)
+        .populate_existing()
+        .filter(models.Order.type == models.OrderType.sell)
+        .order_by(asc(models.Order.price), asc(models.Order.created_at))
+        .all()
+    ), new_order
+
+
+def legacy_user_by_username(db, username):
+    return db.query(models.User).filter(models.User.username == username).first()
+
+
+def legacy_wallet_state(db, user_id):
+    W = models.Wallet
+    columns = [W.user_id] + [
+        (getattr(W, f) + wallet_service._pending(f)).label(f)
+        for f in wallet_service.FIELDS
+    ]
+    return db.execute(select(*columns).where(W.user_id == user_id)).first()
+
+
+# ---- After ----
+def cached_match_queries(db, order_id):
+    new_order = db.execute(statements.lock_order(order_id)).scalar_one()
+    opposite = statements.opposite_orders(models.OrderType.buy)
+    return load_resting(db, opposite), new_order
+
+
+def setup():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    db.add(models.User(id="u1", username="alice", hashed_password="x"))
+    db.add(models.Wallet(user_id="u1", balance=1000.0))
+    buy = models.Order(
+        id="b1", user_id="u1", type=models.OrderType.buy,
+        price=100.0, quantity=1.0, remaining_quantity=1.0,
+    )
+    db.add(buy)
+    for i in range(5):
+        db.add(
+            models.Order(
+                user_id="u2", type=models.OrderType.sell,
+                price=101.0 + i, quantity=1.0, remaining_quantity=1.0,
+            )
+        )
+    db.commit()
+    return db
+
+
+def timeit(fn, iterations):
+    for _ in range(200):  # warm the compiled cache
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main(iterations: int = 5000):
+    db = setup()
+    cases = [
+        (
+            "match_orders (lock + opposite side)",
+            lambda: legacy_match_queries(db, "b1"),
+            lambda: cached_match_queries(db, "b1"),
+        ),
+        (
+            "get_current_user (user by username)",
+            lambda: legacy_user_by_username(db, "alice"),
+            lambda: get_user_by_username(db, "alice"),
+        ),
+        (
+            "wallet projection",
+            lambda: legacy_wallet_state(db, "u1"),
+            lambda: wallet_service.get_wallet_state(db, "u1"),
+        ),
+    ]
+    print(f"{'query':40} {'before µs':>10} {'after µs':>10} {'saved':>8}")
+    for name, before, after in cases:
+        b, a = timeit(before, iterations), timeit(after, iterations)
+        print(f"{name:40} {b:10.1f} {a:10.1f} {(b - a) / b:8.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
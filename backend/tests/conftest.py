@@ -0,0 +1,70 @@
+# tests/conftest.py
+import os
+
+import pytest
+
+# Settings and the engine are created at import time; give them harmless values
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.core import wallet_service  # noqa: E402
+from app.db import data_model as models  # noqa: E402
+
+
+class FakeClock:
+    """Stands in for time.monotonic: tests move `now` by hand."""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+# -----------------------------
+# Setup in-memory DB
+# -----------------------------
+@pytest.fixture
+def wallets():
+    """{user_id: Wallet columns} created by `db_session`; override per module."""
+    return {}
+
+
+@pytest.fixture(scope="function")
+def db_session(wallets):
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    models.Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for user_id, columns in wallets.items():
+        session.add(models.Wallet(user_id=user_id, **columns))
+    session.commit()
+    yield session
+    session.rollback()
+    session.close()
+
+
+def place(session, user_id, type_, price, quantity, **fields):
+    """Reserve funds through the wallet service and rest an order."""
+    if type_ == models.OrderType.buy:
+        wallet_service.reserve_balance(session, user_id, price * quantity)
+    else:
+        wallet_service.reserve_holdings(session, user_id, quantity)
+    order = models.Order(
+        user_id=user_id,
+        type=type_,
+        price=price,
+        quantity=quantity,
+        remaining_quantity=quantity,
+        **fields,
+    )
+    session.add(order)
+    session.commit()
+    return order
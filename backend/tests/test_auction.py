@@ -0,0 +1,148 @@
+# tests/test_auction.py
+from datetime import datetime, timedelta
+
+import pytest
+from app.db import data_model as models
+from app.core import wallet_service
+from app.core.auction import allocate, clearing_price, uncross
+from app.core.reconciliation import ReservationReconciler
+from app.routes import market
+from tests.conftest import place
+
+BUY, SELL = models.OrderType.buy, models.OrderType.sell
+T0 = datetime(2026, 1, 1)
+T1 = T0 + timedelta(seconds=1)
+
+
+@pytest.fixture
+def wallets():
+    return {
+        user_id: dict(balance=10_000.0, holdings=100.0)
+        for user_id in ("u1", "u2", "u3", "u4")
+    }
+
+
+class Resting:
+    def __init__(self, user_id, price, quantity, seconds=0):
+        self.user_id = user_id
+        self.price = price
+        self.remaining_quantity = quantity
+        self.queued_at = T0 + timedelta(seconds=seconds)
+
+
+# -----------------------------
+# Tests for the clearing price
+# -----------------------------
+def test_clearing_price_maximises_volume():
+    # Demand at 99/100/101: 30/20/10; supply: 5/15/30 -> 15 trades at 100
+    clearing = clearing_price([101, 100, 99], [10, 10, 10], [99, 100, 101], [5, 10, 15])
+    assert (clearing.price, clearing.volume, clearing.imbalance) == (100.0, 15.0, 5.0)
+
+
+def test_clearing_price_ties_break_on_imbalance_then_reference():
+    # 10 trades anywhere in 100..102; imbalance is 0 everywhere
+    args = ([102], [10], [100], [10])
+    assert clearing_price(*args).price == 100.0
+    assert clearing_price(*args, reference=101.4).price == 102.0
+    # 98 only adds a level where nothing crosses
+    assert clearing_price([102, 98], [10, 1], [100], [10], reference=97).price == 100
+
+
+def test_uncrossed_book_and_market_orders():
+    assert clearing_price([99], [10], [100], [10]).price is None
+    assert clearing_price([], [], [], []).price is None
+    # A market sell trades against the best bids at their own level
+    clearing = clearing_price([99, 98], [5, 5], [], [], market_ask=7)
+    assert (clearing.price, clearing.volume) == (98.0, 7.0)
+
+
+# -----------------------------
+# Tests for allocation
+# -----------------------------
+def test_allocation_is_price_time_with_a_partial_marginal_order():
+    buys = [
+        Resting("b1", 100, 5, seconds=2),
+        Resting("b2", 101, 5, seconds=3),
+        Resting("b3", 100, 5, seconds=1),
+        Resting("b4", 99, 5),  # below the clearing price
+    ]
+    sells = [Resting("s1", 95, 4), Resting("s2", 100, 20, seconds=1)]
+    fills = allocate(buys, sells, 100.0, 12.0)
+    assert [(b.user_id, s.user_id, float(q)) for b, s, q in fills] == [
+        ("b2", "s1", 4.0),
+        ("b2", "s2", 1.0),
+        ("b3", "s2", 5.0),
+        ("b1", "s2", 2.0),
+    ]
+
+
+def test_allocation_skips_self_trades():
+    buys = [Resting("u1", 100, 5), Resting("u2", 100, 5, seconds=1)]
+    sells = [Resting("u1", 100, 5), Resting("u3", 100, 5, seconds=1)]
+    fills = allocate(buys, sells, 100.0, 10.0)
+    assert [(b.user_id, s.user_id) for b, s, _ in fills] == [("u1", "u3"), ("u2", "u1")]
+
+
+# -----------------------------
+# Tests for the uncross
+# -----------------------------
+def test_uncross_clears_the_book_in_one_pass(db_session):
+    b1 = place(db_session, "u1", BUY, 102.0, 5.0, queued_at=T0)
+    b2 = place(db_session, "u2", BUY, 100.0, 5.0, queued_at=T1)
+    s1 = place(db_session, "u3", SELL, 99.0, 4.0, queued_at=T0)
+    s2 = place(db_session, "u4", SELL, 100.0, 10.0, queued_at=T1)
+
+    clearing, trades = uncross(db_session)
+    db_session.commit()
+
+    assert (clearing.price, clearing.volume) == (100.0, 10.0)
+    assert all(t.price == 100.0 and t.side is None for t in trades)
+    assert sum(t.quantity for t in trades) == 10.0
+    for order in (b1, b2, s1):
+        assert order.status == models.StatusType.executed
+    assert s2.remaining_quantity == 4.0
+    assert s2.id in trades.order_updates
+
+    # The 102 buyer paid 100 and got the difference back
+    assert trades.wallet_updates["u1"]["balance"] == 10_000.0 - 500.0
+    assert trades.wallet_updates["u1"]["reserved_balance"] == 0.0
+    assert trades.wallet_updates["u3"]["balance"] == 10_000.0 + 400.0
+    assert ReservationReconciler().run(db_session)["mismatched"] == 0
+
+
+def test_user_with_a_short_reservation_sits_out(db_session):
+    place(db_session, "u1", BUY, 101.0, 5.0, queued_at=T0)
+    place(db_session, "u2", BUY, 100.0, 5.0, queued_at=T1)
+    place(db_session, "u3", SELL, 100.0, 5.0, queued_at=T0)
+    # u1's reservation drifted below what the fill needs
+    wallet_service.release_balance(db_session, "u1", 300.0)
+    db_session.commit()
+
+    clearing, trades = uncross(db_session)
+    assert clearing.price == 100.0
+    assert [t.buyer_user_id for t in trades] == ["u2"]
+
+
+# -----------------------------
+# Tests for the uncross route
+# -----------------------------
+def test_failed_stop_step_keeps_the_committed_uncross(db_session, monkeypatch):
+    place(db_session, "u1", BUY, 100.0, 5.0, queued_at=T0)
+    place(db_session, "u2", SELL, 100.0, 5.0, queued_at=T0)
+    published, broadcast = [], []
+    monkeypatch.setattr(market.publisher, "add_fills", published.extend)
+    monkeypatch.setattr(market, "broadcast_match_updates", broadcast.append)
+
+    def broken_stops(db, result):
+        raise RuntimeError("stop step failed")
+
+    monkeypatch.setattr(market, "run_stops", broken_stops)
+    market.auction.start()
+    response = market.uncross_auction(db=db_session, current_admin=None)
+
+    assert (response["price"], response["trades"]) == (100.0, 1)
+    assert not market.auction.active
+    assert len(published) == 1  # the auction fill reached the publisher
+    assert len(broadcast) == 1 and len(broadcast[0]) == 1
+    db_session.expire_all()
+    assert db_session.query(models.Trade).count() == 1
@@ -0,0 +1,124 @@
+# tests/test_bus.py
+import asyncio
+import os
+import socket
+from app.core.bus import InProcessBus, UnixSocketBus
+
+
+# -----------------------------
+# Tests for the broadcast bus backends
+# -----------------------------
+def test_in_process_bus_delivers_to_every_handler():
+    bus = InProcessBus()
+    seen = []
+
+    async def handler(event):
+        seen.append(event)
+
+    bus.subscribe(handler)
+    bus.subscribe(handler)
+    asyncio.run(bus.publish({"type": "user", "user_id": "u1"}))
+    assert seen == [{"type": "user", "user_id": "u1"}] * 2
+
+
+def test_unix_socket_bus_fans_out_between_workers(tmp_path):
+    received = {"a": [], "b": []}
+
+    async def scenario():
+        a = UnixSocketBus(str(tmp_path), name="worker-a")
+        b = UnixSocketBus(str(tmp_path), name="worker-b")
+
+        async def on_a(event):
+            received["a"].append(event)
+
+        async def on_b(event):
+            received["b"].append(event)
+
+        a.subscribe(on_a)
+        b.subscribe(on_b)
+        await a.start()
+        await b.start()
+
+        await a.publish({"type": "market", "book": True})
+        await asyncio.sleep(0.05)
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(scenario())
+    assert received["a"] == [{"type": "market", "book": True}]
+    assert received["b"] == [{"type": "market", "book": True}]
+
+
+def test_unix_socket_bus_removes_stale_peers(tmp_path):
+    stale = tmp_path / "worker-999999.sock"
+
+    async def scenario():
+        # A socket file whose owner has exited
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        s.bind(str(stale))
+        s.close()
+
+        bus = UnixSocketBus(str(tmp_path))
+        await bus.start()
+        await bus.publish({"type": "market"})
+        await bus.stop()
+
+    asyncio.run(scenario())
+    assert not stale.exists()
+
+
+def test_unix_socket_bus_delivers_in_order_and_keeps_its_tasks(tmp_path):
+    seen = []
+
+    async def scenario():
+        bus = UnixSocketBus(str(tmp_path), name="worker-a")
+
+        async def slow_then_fast(event):
+            # Earlier events wait longer; concurrent delivery would reorder them
+            await asyncio.sleep(0.01 * (5 - event["n"]))
+            seen.append(event["n"])
+
+        bus.subscribe(slow_then_fast)
+        await bus.start()
+        for n in range(5):
+            await bus.publish({"n": n})
+        await asyncio.sleep(0.3)
+        await bus.stop()
+
+    asyncio.run(scenario())
+    assert seen == [0, 1, 2, 3, 4]
+
+
+def test_unix_socket_bus_caches_peers_until_the_directory_changes(
+    tmp_path, monkeypatch
+):
+    listed = []
+    real_listdir = os.listdir
+    monkeypatch.setattr(
+        "app.core.bus.os.listdir",
+        lambda path: listed.append(path) or real_listdir(path),
+    )
+    received = []
+
+    async def scenario():
+        a = UnixSocketBus(str(tmp_path), name="worker-a")
+        await a.start()
+        await a.publish({"n": 0})
+        await a.publish({"n": 1})
+        assert len(listed) == 1
+
+        b = UnixSocketBus(str(tmp_path), name="worker-b")
+
+        async def on_b(event):
+            received.append(event["n"])
+
+        b.subscribe(on_b)
+        await b.start()
+        await a.publish({"n": 2})
+        assert len(listed) == 2
+        await asyncio.sleep(0.05)
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(scenario())
+    assert received == [2]
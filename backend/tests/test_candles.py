@@ -0,0 +1,108 @@
+# tests/test_candles.py
+from app.core.candles import CandleAggregator
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def bars(agg, interval):
+    return {c["start"]: c for c in agg.get_candles(interval)}
+
+
+# -----------------------------
+# Tests for CandleAggregator
+# -----------------------------
+def test_single_second_bar():
+    agg = CandleAggregator()
+    agg.add_trade(100, 1, 1000.2)
+    agg.add_trade(105, 2, 1000.5)
+    agg.add_trade(95, 1, 1000.9)
+
+    (bar,) = agg.get_candles("1s")
+    assert bar["start"] == 1000
+    assert (bar["open"], bar["high"], bar["low"], bar["close"]) == (100, 105, 95, 95)
+    assert bar["volume"] == 4
+    assert bar["trade_count"] == 3
+
+
+def test_coarser_bars_roll_up_from_finer():
+    agg = CandleAggregator()
+    agg.add_trade(100, 1, 60)  # minute 1
+    agg.add_trade(110, 1, 61)
+    agg.add_trade(90, 1, 119)
+    agg.add_trade(120, 2, 120)  # minute 2 (still open)
+
+    minutes = bars(agg, "1m")
+    assert sorted(minutes) == [60, 120]
+    first = minutes[60]
+    assert (first["open"], first["high"], first["low"], first["close"]) == (
+        100,
+        110,
+        90,
+        90,
+    )
+    assert first["volume"] == 3
+    assert minutes[120]["volume"] == 2
+
+    # 5m and 1d see every fill, including the still-open 1s bar
+    (five,) = agg.get_candles("5m")
+    assert five["start"] == 0
+    assert five["volume"] == 5
+    assert five["high"] == 120 and five["low"] == 90
+    assert five["open"] == 100 and five["close"] == 120
+
+
+def test_range_filter_and_limit():
+    agg = CandleAggregator()
+    for ts in range(0, 10):
+        agg.add_trade(100 + ts, 1, ts)
+
+    assert [c["start"] for c in agg.get_candles("1s", start=3, end=5)] == [3, 4, 5]
+    assert [c["start"] for c in agg.get_candles("1s", limit=2)] == [8, 9]
+
+
+def test_advance_closes_elapsed_bars_for_persistence():
+    agg = CandleAggregator()
+    agg.add_trade(100, 1, 10)
+    assert agg.drain_closed() == []
+
+    agg.advance(now=100)
+    closed = {interval for interval, _ in agg.drain_closed()}
+    assert closed == {"1s", "1m"}
+
+    # Bars are still served from memory once closed
+    assert bars(agg, "1m")[0]["volume"] == 1
+
+
+def test_late_fill_folds_into_the_closed_bar():
+    agg = CandleAggregator()
+    agg.add_fills([(100, 1, 60), (110, 2, 100)])
+    agg.advance(now=121)
+    agg.drain_closed()
+
+    agg.add_fills([(90, 5, 119.5)])  # its minute closed at 120
+    agg.advance(now=200)
+    closed = agg.drain_closed()
+    minutes = [bar for interval, bar in closed if interval == "1m"]
+    assert [bar.start for bar in minutes] == [60]  # re-upserted, not a second bar
+    (minute,) = agg.get_candles("1m")
+    assert (minute["open"], minute["low"], minute["close"]) == (100, 90, 90)
+    assert (minute["volume"], minute["trade_count"]) == (8, 3)
+    # The coarser bars still open see it once
+    assert agg.get_candles("5m")[-1]["volume"] == 8
+    assert agg.stats == {"late_fills": 1, "late_dropped": 0}
+
+
+def test_late_fill_for_a_closed_second_is_merged_there():
+    agg = CandleAggregator()
+    agg.add_trade(100, 1, 10)
+    agg.advance(now=11)
+    agg.add_trade(95, 2, 10.5)
+
+    (second,) = agg.get_candles("1s")
+    assert (second["low"], second["volume"], second["trade_count"]) == (95, 3, 2)
+    # Queued again so the persist job upserts the corrected row
+    interval, bar = agg.drain_closed()[-1]
+    assert (interval, bar.start, bar.volume) == ("1s", 10, 3)
+    assert agg.get_candles("1m")[-1]["volume"] == 3
+    assert agg.stats["late_fills"] == 1
@@ -0,0 +1,102 @@
+# tests/test_cron_jobs.py
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.db import data_model as models
+from app.core import cron_jobs, wallet_service
+from app.core.cron_jobs import JobProgress
+
+
+# -----------------------------
+# Setup in-memory DB for the worker pool
+# -----------------------------
+@pytest.fixture(scope="function")
+def worker_sessions(monkeypatch):
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    models.Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+    monkeypatch.setattr(cron_jobs, "WorkerSessionLocal", Session)
+    yield Session
+
+
+# -----------------------------
+# Tests for JobProgress
+# -----------------------------
+def test_overlapping_run_is_skipped():
+    progress = JobProgress("job")
+    assert progress.begin() is True
+    assert progress.begin() is False
+    assert progress.skipped == 1
+    progress.end()
+    assert progress.running is False
+    assert progress.begin() is True
+
+
+def test_failure_is_recorded_and_lock_released():
+    progress = JobProgress("job")
+    progress.begin()
+    progress.end(RuntimeError("boom"))
+    assert progress.failures == 1
+    assert progress.last_error == "boom"
+    assert progress.running is False
+
+
+# -----------------------------
+# Tests for process_pending_orders_job
+# -----------------------------
+def test_sweep_matches_and_reports_progress(worker_sessions):
+    db = worker_sessions()
+    db.add_all(
+        [
+            models.Wallet(user_id="1", balance=0, reserved_balance=500),
+            models.Wallet(user_id="2", holdings=0, reserved_holdings=5),
+            models.Order(
+                user_id="1",
+                type=models.OrderType.buy,
+                price=100,
+                quantity=5,
+                remaining_quantity=5,
+            ),
+            models.Order(
+                user_id="2",
+                type=models.OrderType.sell,
+                price=90,
+                quantity=5,
+                remaining_quantity=5,
+            ),
+        ]
+    )
+    db.commit()
+
+    cron_jobs.process_pending_orders_job()
+
+    stats = cron_jobs.matching_progress.as_dict()
+    assert stats["total"] == 2
+    assert stats["processed"] == 2
+    assert stats["trades"] == 1
+    assert stats["running"] is False
+
+    statuses = {o.status for o in worker_sessions().query(models.Order)}
+    assert statuses == {models.StatusType.executed}
+
+
+# -----------------------------
+# Tests for compact_ledger_job
+# -----------------------------
+def test_compaction_folds_ledger_into_wallet_rows(worker_sessions):
+    db = worker_sessions()
+    db.add(models.Wallet(user_id="1", balance=100.0))
+    db.commit()
+    wallet_service.deposit(db, "1", 50.0)
+    wallet_service.release_balance(db, "1", 0.0)
+    db.commit()
+    assert db.query(models.Wallet.balance).filter_by(user_id="1").scalar() == 100.0
+
+    cron_jobs.compact_ledger_job()
+
+    db = worker_sessions()
+    assert db.query(models.Wallet.balance).filter_by(user_id="1").scalar() == 150.0
+    assert cron_jobs.ledger_progress.processed == 2
+    pending = db.query(models.LedgerEntry).filter_by(applied=False).count()
+    assert pending == 0
+    assert wallet_service.get_wallet_state(db, "1")["balance"] == 150.0
@@ -0,0 +1,73 @@
+# tests/test_event_bridge.py
+import asyncio
+import threading
+from app.core.event_bridge import EventBridge
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+def run_with_bridge(bridge, publish_fn, settle=0.05):
+    """Bind the bridge to a fresh loop, run `publish_fn`, return delivered events."""
+    delivered = []
+
+    async def handler(event):
+        delivered.append(event)
+
+    async def scenario():
+        bridge.bind(asyncio.get_running_loop(), handler)
+        publish_fn()
+        await asyncio.sleep(settle)
+        bridge.unbind()
+
+    asyncio.run(scenario())
+    return delivered
+
+
+# -----------------------------
+# Tests for EventBridge
+# -----------------------------
+def test_unbound_bridge_drops_without_blocking():
+    bridge = EventBridge()
+    assert bridge.publish({"n": 1}) is False
+    assert bridge.stats["dropped"] == 1
+
+
+def test_events_from_worker_threads_reach_the_loop_in_order():
+    bridge = EventBridge(batch_size=10)
+
+    def from_thread():
+        t = threading.Thread(
+            target=lambda: [bridge.publish({"n": i}) for i in range(25)]
+        )
+        t.start()
+        t.join()
+
+    delivered = run_with_bridge(bridge, from_thread)
+    assert [e["n"] for e in delivered] == list(range(25))
+    assert bridge.stats["batches"] == 3
+
+
+def test_keyed_events_are_conflated_in_place():
+    bridge = EventBridge()
+
+    def publish():
+        bridge.publish({"wallet": 1}, key=("wallet", "u1"))
+        bridge.publish({"other": True})
+        bridge.publish({"wallet": 2}, key=("wallet", "u1"))
+
+    delivered = run_with_bridge(bridge, publish)
+    assert delivered == [{"wallet": 2}, {"other": True}]
+    assert bridge.stats["conflated"] == 1
+
+
+def test_queue_is_bounded():
+    bridge = EventBridge(max_pending=3)
+
+    def publish():
+        for i in range(5):
+            bridge.publish({"n": i})
+
+    delivered = run_with_bridge(bridge, publish)
+    assert len(delivered) == 3
+    assert bridge.stats["dropped"] == 2
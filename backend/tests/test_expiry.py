@@ -0,0 +1,116 @@
+# tests/test_expiry.py
+from datetime import datetime
+
+import pytest
+from app.db import data_model as models
+from app.core import expiry
+from app.core.expiry import TimerWheel, expire_orders, resolve_expiry
+from tests.conftest import place
+
+BUY, SELL = models.OrderType.buy, models.OrderType.sell
+GTT = dict(time_in_force="gtt", expires_at=datetime(2026, 1, 1))
+
+
+@pytest.fixture
+def wallets():
+    return {u: dict(balance=1000.0, holdings=10.0) for u in ("u1", "u2")}
+
+
+def fired_at(wheel, deadline, horizon):
+    """Advance one tick at a time; return the tick the timer fired on."""
+    wheel.schedule("k", deadline)
+    for now in range(1, horizon):
+        if wheel.advance(now) == ["k"]:
+            return now
+    return None
+
+
+# -----------------------------
+# Tests for the timer wheel
+# -----------------------------
+@pytest.mark.parametrize("deadline", [1, 7, 8, 9, 63, 64, 65, 200, 511, 512, 700])
+def test_timer_fires_on_its_tick_at_every_level(deadline):
+    # 8 slots x 3 levels covers 512 ticks; 700 parks in the top wheel once
+    wheel = TimerWheel(tick=1.0, slots=8, levels=3, start=0)
+    assert fired_at(wheel, deadline, 1000) == deadline
+    assert len(wheel) == 0
+
+
+def test_deadlines_round_up_and_past_ones_fire_next_tick():
+    wheel = TimerWheel(tick=1.0, slots=8, levels=3, start=100)
+    wheel.schedule("late", 50)
+    wheel.schedule("fraction", 101.2)
+    assert wheel.advance(101) == ["late"]
+    assert wheel.advance(102) == ["fraction"]
+
+
+def test_cancel_and_reschedule():
+    wheel = TimerWheel(tick=1.0, slots=8, levels=3, start=0)
+    wheel.schedule("a", 20)
+    wheel.schedule("b", 20)
+    wheel.schedule("c", 20)
+    wheel.cancel("a")
+    wheel.schedule("b", 300)
+    assert wheel.advance(299) == ["c"]
+    assert wheel.advance(300) == ["b"]
+    assert wheel.stats["cancelled"] == 1
+
+
+def test_advance_catches_up_in_one_call():
+    wheel = TimerWheel(tick=0.5, slots=8, levels=3, start=0)
+    for i in range(1, 50):
+        wheel.schedule(i, i * 2.5)
+    assert sorted(wheel.advance(60)) == list(range(1, 25))
+
+
+# -----------------------------
+# Tests for deadlines
+# -----------------------------
+def test_resolve_expiry(monkeypatch):
+    monkeypatch.setattr(expiry.settings, "DAY_ORDER_CUTOFF_UTC", "21:00")
+    now = datetime(2026, 3, 2, 22, 0)
+    when = datetime(2026, 3, 5, 9, 30)
+    assert resolve_expiry("gtc", None, now) is None
+    assert resolve_expiry("gtt", when, now) == when
+    assert resolve_expiry("gtd", when, now) == datetime(2026, 3, 5, 21, 0)
+    assert resolve_expiry("day", None, now) == datetime(2026, 3, 3, 21, 0)
+    assert resolve_expiry("day", None, datetime(2026, 3, 2, 8)) == datetime(
+        2026, 3, 2, 21, 0
+    )
+
+
+def test_resolve_expiry_with_the_default_midnight_cutoff(monkeypatch):
+    monkeypatch.setattr(expiry.settings, "DAY_ORDER_CUTOFF_UTC", "00:00")
+    now = datetime(2026, 3, 2, 10, 0)
+    # Good for all of the 3rd, and for the rest of today
+    assert resolve_expiry("gtd", datetime(2026, 3, 3, 15), now) == datetime(2026, 3, 4)
+    assert resolve_expiry("gtd", datetime(2026, 3, 2), now) == datetime(2026, 3, 3)
+    assert resolve_expiry("day", None, now) == datetime(2026, 3, 3)
+    assert resolve_expiry("day", None, datetime(2026, 3, 3)) == datetime(2026, 3, 4)
+
+
+# -----------------------------
+# Tests for expiring orders
+# -----------------------------
+def test_expire_releases_reservations_in_one_batch(db_session):
+    buy = place(db_session, "u1", BUY, 10.0, 5.0, **GTT)
+    sell = place(db_session, "u1", SELL, 20.0, 2.0, **GTT)
+    other = place(db_session, "u2", SELL, 20.0, 3.0, **GTT)
+    filled = place(db_session, "u2", SELL, 20.0, 1.0, **GTT)
+    filled.status = models.StatusType.executed
+    db_session.commit()
+
+    order_updates, wallets = expire_orders(
+        db_session, [buy.id, sell.id, other.id, filled.id]
+    )
+    db_session.commit()
+
+    assert sorted(s["id"] for s in order_updates["u1"]) == sorted([buy.id, sell.id])
+    assert [s["status"] for s in order_updates["u2"]] == ["expired"]
+    assert wallets["u1"]["balance"] == 1000.0
+    assert wallets["u1"]["reserved_balance"] == 0.0
+    assert wallets["u1"]["holdings"] == 10.0
+    # The filled order keeps its reservation (settled by its fill)
+    assert wallets["u2"]["reserved_holdings"] == 1.0
+    db_session.refresh(filled)
+    assert filled.status == models.StatusType.executed
@@ -0,0 +1,42 @@
+# tests/test_gc_tuning.py
+import gc
+
+import pytest
+from app.core import gc_tuning
+from app.core.gc_tuning import gc_monitor, gc_stats, tune_gc
+
+
+# -----------------------------
+# Leave the interpreter as we found it
+# -----------------------------
+@pytest.fixture
+def restore_gc():
+    thresholds = gc.get_threshold()
+    yield
+    gc.set_threshold(*thresholds)
+    gc.unfreeze()
+    if gc_monitor in gc.callbacks:
+        gc.callbacks.remove(gc_monitor)
+
+
+# -----------------------------
+# Tests for GC tuning
+# -----------------------------
+def test_tune_gc_sets_thresholds_and_freezes(restore_gc, monkeypatch):
+    monkeypatch.setattr(gc_tuning.settings, "GC_THRESHOLDS", "40000,15,50")
+    monkeypatch.setattr(gc_tuning.settings, "GC_FREEZE", True)
+    tune_gc()
+    assert gc.get_threshold() == (40000, 15, 50)
+    assert gc_stats()["frozen"] > 0
+
+
+def test_monitor_counts_collections(restore_gc, monkeypatch):
+    monkeypatch.setattr(gc_tuning.settings, "GC_TUNING", False)
+    thresholds = gc.get_threshold()
+    tune_gc()  # only registers the monitor
+    assert gc.get_threshold() == thresholds
+    before = gc_monitor.stats[2]["collections"]
+    gc.collect()
+    stats = gc_stats()["generations"]["2"]
+    assert stats["collections"] == before + 1
+    assert stats["max_ms"] >= 0
@@ -0,0 +1,61 @@
+# tests/test_logs.py
+import json
+import logging
+import queue
+import sys
+from app.core.logs import JsonFormatter, NonBlockingQueueHandler, SamplingFilter
+
+
+def make_record(msg="hello %s", args=("world",), lineno=10, **extra):
+    record = logging.LogRecord("backend", logging.INFO, "app.py", lineno, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+# -----------------------------
+# Tests for SamplingFilter
+# -----------------------------
+def test_sampling_caps_each_call_site_per_window():
+    sampler = SamplingFilter(limit=3, window=60)
+    passed = [sampler.filter(make_record()) for _ in range(10)]
+    assert passed == [True] * 3 + [False] * 7
+    # Another call site has its own budget
+    assert sampler.filter(make_record(lineno=11)) is True
+
+
+def test_sampling_reports_suppressed_count_in_next_window():
+    sampler = SamplingFilter(limit=1, window=60)
+    sampler.filter(make_record())
+    sampler.filter(make_record())
+    sampler.filter(make_record())
+    sampler.window = 0.0  # roll over
+    record = make_record()
+    assert sampler.filter(record) is True
+    assert record.suppressed == 2
+
+
+# -----------------------------
+# Tests for the queue handler and JSON output
+# -----------------------------
+def test_queue_handler_drops_when_full():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.dropped == 1
+
+
+def test_json_formatter_includes_message_extras_and_traceback():
+    handler = NonBlockingQueueHandler(queue.Queue())
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = make_record(duration_ms=12.5)
+        record.exc_info = sys.exc_info()
+    handler.handle(record)
+
+    line = JsonFormatter().format(handler.queue.get_nowait())
+    entry = json.loads(line)
+    assert entry["msg"] == "hello world"
+    assert entry["level"] == "INFO"
+    assert entry["duration_ms"] == 12.5
+    assert "ValueError: boom" in entry["exc"]
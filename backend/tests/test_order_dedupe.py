@@ -0,0 +1,128 @@
+# tests/test_order_dedupe.py
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from app.core import wallet_service
+from app.core.order_dedupe import DedupeCache
+from app.db import data_model as models
+from app.routes import orders
+from app.schemas.order_schema import OrderCreate
+
+
+# -----------------------------
+# Tests for DedupeCache
+# -----------------------------
+def test_hit_returns_original_result():
+    cache = DedupeCache(maxsize=10, ttl=60)
+    assert cache.get(("u1", "a")) is None
+    cache.put(("u1", "a"), "order-1")
+    assert cache.get(("u1", "a")) == "order-1"
+    assert cache.get(("u2", "a")) is None  # keys are per user
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 2
+
+
+def test_least_recently_used_is_evicted():
+    cache = DedupeCache(maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")  # "b" is now the oldest
+    cache.put("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats["evicted"] == 1
+
+
+def test_entries_expire(clock):
+    cache = DedupeCache(maxsize=10, ttl=5, clock=clock)
+    cache.put("a", 1)
+    clock.now = 6
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+# -----------------------------
+# Tests for the DB backstop
+# -----------------------------
+def test_client_order_id_unique_per_user():
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    models.Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+
+    def add(user_id, client_order_id):
+        session.add(
+            models.Order(
+                user_id=user_id,
+                type=models.OrderType.buy,
+                price=1.0,
+                quantity=1.0,
+                remaining_quantity=1.0,
+                client_order_id=client_order_id,
+            )
+        )
+        session.commit()
+
+    add("u1", "a")
+    add("u2", "a")  # other users may reuse a key
+    add("u1", None)
+    add("u1", None)  # orders without a key never collide
+    with pytest.raises(IntegrityError):
+        add("u1", "a")
+    session.rollback()
+    session.close()
+
+
+def test_route_returns_the_existing_order_once_the_cache_forgot_it(monkeypatch):
+    # Another worker, or an evicted entry: only the constraint catches it
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    models.Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    user = models.User(
+        id="u1", username="alice", email="alice@example.com", hashed_password="x"
+    )
+    session.add_all([user, models.Wallet(user_id="u1", balance=1000.0)])
+    session.commit()
+    order = OrderCreate(type="buy", price=10.0, quantity=2.0, client_order_id="k1")
+
+    def submit():
+        # A fresh cache each time: the first result is not remembered
+        monkeypatch.setattr(orders, "order_dedupe", DedupeCache(10, 60))
+        return asyncio.run(
+            orders.create_order(order=order, db=session, current_user=user)
+        )
+
+    first = submit()
+    second = submit()
+    assert second.id == first.id
+    assert orders.order_dedupe.stats["backstop_hits"] == 1
+    assert session.query(models.Order).count() == 1
+    # The retry's reservation was rolled back with it
+    state = wallet_service.get_wallet_state(session, "u1")
+    assert state["reserved_balance"] == 20.0
+    session.close()
+
+
+def test_route_ignores_a_client_supplied_user_id():
+    engine = create_engine("sqlite:///:memory:", echo=False)
+    models.Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    user = models.User(
+        id="u1", username="alice", email="alice@example.com", hashed_password="x"
+    )
+    session.add_all([user, models.Wallet(user_id="u1", balance=1000.0)])
+    session.commit()
+    order = OrderCreate.model_validate(
+        {"user_id": "u2", "type": "buy", "price": 10.0, "quantity": 2.0}
+    )
+
+    created = asyncio.run(
+        orders.create_order(order=order, db=session, current_user=user)
+    )
+
+    assert created.user_id == "u1"
+    assert "user_id" not in OrderCreate.model_json_schema()["required"]
+    session.close()
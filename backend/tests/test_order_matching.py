@@ -1,24 +1,10 @@
 # tests/test_order_matching.py
 import pytest
 from decimal import Decimal
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.dialects import postgresql
 from app.db import data_model as models
-from app.core import order_matching
-
-
-# -----------------------------
-# Setup in-memory DB
-# -----------------------------
-@pytest.fixture(scope="function")
-def db_session():
-    engine = create_engine("sqlite:///:memory:", echo=False)
-    models.Base.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
-    session = Session()
-    yield session
-    session.rollback()
-    session.close()
+from app.core import book, order_matching, wallet_service
+from app.core.broadcasts import get_order_book_snapshot
 
 
 # -----------------------------
@@ -133,24 +119,29 @@ def test_match_orders_basic(db_session):
     buy_order = create_order(db_session, 1, models.OrderType.buy, 100, 5)
     sell_order = create_order(db_session, 2, models.OrderType.sell, 90, 5)
 
-    executed_trades = order_matching.match_orders(db_session, buy_order)
+    executed_trades = order_matching.match_orders(db_session, buy_order.id)
 
     assert len(executed_trades) == 1
     trade = executed_trades[0]
     assert trade.price == 90
     assert trade.quantity == 5
+    # Denormalised for trade history
+    assert (trade.buyer_user_id, trade.seller_user_id) == ("1", "2")
+    assert trade.side == models.OrderType.buy
+    assert trade.notional == 450
 
-    # Wallet updates
-    buyer_wallet = db_session.query(models.Wallet).filter_by(user_id=1).one()
-    seller_wallet = db_session.query(models.Wallet).filter_by(user_id=2).one()
+    # Wallet updates (ledger projection; rows change only on compaction)
+    buyer_wallet = wallet_service.get_wallet_state(db_session, "1")
+    seller_wallet = wallet_service.get_wallet_state(db_session, "2")
 
     # Buyer spent 90*5 = 450
-    assert buyer_wallet.reserved_balance == float(1000 - 450)
-    assert buyer_wallet.holdings == float(5)
+    assert buyer_wallet["reserved_balance"] == float(1000 - 450)
+    assert buyer_wallet["holdings"] == float(5)
 
     # Seller sold 5 units
-    assert seller_wallet.reserved_holdings == float(10 - 5)
-    assert seller_wallet.balance == float(0 + 450)
+    assert seller_wallet["reserved_holdings"] == float(10 - 5)
+    assert seller_wallet["balance"] == float(0 + 450)
+    assert executed_trades.wallet_updates["1"] == buyer_wallet
 
 
 def test_match_orders_partial_fill(db_session):
@@ -162,7 +153,7 @@ def test_match_orders_partial_fill(db_session):
     buy_order = create_order(db_session, 1, models.OrderType.buy, 100, 5)
     sell_order = create_order(db_session, 2, models.OrderType.sell, 90, 2)
 
-    executed_trades = order_matching.match_orders(db_session, buy_order)
+    executed_trades = order_matching.match_orders(db_session, buy_order.id)
     assert len(executed_trades) == 1
     trade = executed_trades[0]
     assert trade.quantity == 2
@@ -177,7 +168,7 @@ def test_match_orders_self_trade_skipped(db_session):
     buy_order = create_order(db_session, 1, models.OrderType.buy, 100, 5)
     sell_order = create_order(db_session, 1, models.OrderType.sell, 90, 5)
 
-    executed_trades = order_matching.match_orders(db_session, buy_order)
+    executed_trades = order_matching.match_orders(db_session, buy_order.id)
     assert len(executed_trades) == 0
 
 
@@ -186,5 +177,49 @@ def test_match_orders_insufficient_funds(db_session):
     create_wallet(db_session, 2, balance=0, holdings=10)
     buy_order = create_order(db_session, 1, models.OrderType.buy, 100, 5)
     sell_order = create_order(db_session, 2, models.OrderType.sell, 90, 5)
-    executed_trades = order_matching.match_orders(db_session, buy_order)
+    executed_trades = order_matching.match_orders(db_session, buy_order.id)
     assert len(executed_trades) == 0
+
+
+# -----------------------------
+# Tests for iceberg orders
+# -----------------------------
+def create_iceberg(session, user_id, type_, price, quantity, display_quantity):
+    order = create_order(session, user_id, type_, price, quantity)
+    order.display_quantity = display_quantity
+    order.visible_quantity = display_quantity
+    session.commit()
+    return order
+
+
+def test_iceberg_refill_goes_to_the_back_of_the_level(db_session):
+    create_wallet(db_session, 1, balance=1000, holdings=0)
+    create_wallet(db_session, 2, balance=0, holdings=10)
+    create_wallet(db_session, 3, balance=0, holdings=10)
+    iceberg = create_iceberg(db_session, 2, models.OrderType.sell, 90, 10, 2)
+    plain = create_order(db_session, 3, models.OrderType.sell, 90, 3)
+
+    buy_order = create_order(db_session, 1, models.OrderType.buy, 100, 6)
+    executed_trades = order_matching.match_orders(db_session, buy_order.id)
+
+    # First slice, then the order queued behind it, then the refilled slice
+    assert [(t.sell_order_id, t.quantity) for t in executed_trades] == [
+        (iceberg.id, 2),
+        (plain.id, 3),
+        (iceberg.id, 1),
+    ]
+    assert iceberg.remaining_quantity == 7
+    assert iceberg.visible_quantity == 1
+    assert order_matching.displayed_quantity(iceberg) == 1
+
+
+def test_refill_queue_time_is_the_clock_at_write_back():
+    # Postgres now() is the transaction start; a refill must not queue early
+    sql = str(book._WRITE_BACK.compile(dialect=postgresql.dialect()))
+    assert "THEN clock_timestamp()" in sql
+
+
+def test_order_book_snapshot_shows_only_the_iceberg_slice(db_session):
+    create_iceberg(db_session, 2, models.OrderType.sell, 90, 10, 2)
+    snapshot = get_order_book_snapshot(db_session)
+    assert [row["remaining_quantity"] for row in snapshot["sell_orders"]] == [2]
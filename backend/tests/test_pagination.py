@@ -0,0 +1,224 @@
+# tests/test_pagination.py
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core import pagination
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER,
+    PageParams,
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+    ndjson_export,
+    trim_page,
+)
+from app.db import data_model as models
+from app.db.backfill import backfill_trade_parties
+from app.db.session import get_db, get_read_db
+from app.routes import market, orders, trades, users
+from app.routes.trades import user_trades_page
+
+
+# -----------------------------
+# Setup in-memory DB
+# -----------------------------
+@pytest.fixture(scope="function")
+def session_factory():
+    # One shared connection: the export generator runs in a worker thread
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    models.Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def db_session(session_factory):
+    session = session_factory()
+    yield session
+    session.rollback()
+    session.close()
+
+
+def create_users(session, n):
+    # Pairs share a timestamp so the id tie-breaker is exercised
+    base = datetime(2024, 1, 1)
+    for i in range(n):
+        session.add(
+            models.User(
+                id=f"u{i:03d}",
+                username=f"user{i}",
+                hashed_password="x",
+                created_at=base + timedelta(seconds=i // 2),
+            )
+        )
+    session.commit()
+
+
+def collect(body_iterator):
+    async def run():
+        return [chunk async for chunk in body_iterator]
+
+    return asyncio.run(run())
+
+
+def page_params(cursor=None, limit=100):
+    return PageParams(cursor=cursor, limit=limit)
+
+
+# -----------------------------
+# Tests for cursors
+# -----------------------------
+def test_cursor_round_trip():
+    ts = datetime(2024, 5, 6, 7, 8, 9, 123456)
+    assert decode_cursor(encode_cursor(ts, "abc")) == (ts, "abc")
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        page_params(cursor="not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+# -----------------------------
+# Tests for keyset_page
+# -----------------------------
+def test_pages_cover_every_row_once_newest_first(db_session):
+    create_users(db_session, 25)
+
+    seen, cursor = [], None
+    while True:
+        response = Response()
+        rows = keyset_page(
+            db_session.query(models.User), models.User, page_params(cursor, 10), response
+        )
+        seen += [u.id for u in rows]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+        assert len(rows) == 10
+
+    assert seen == [f"u{i:03d}" for i in reversed(range(25))]
+
+
+def test_last_full_page_has_no_next_cursor(db_session):
+    create_users(db_session, 10)
+    response = Response()
+    rows = keyset_page(
+        db_session.query(models.User), models.User, page_params(limit=10), response
+    )
+    assert len(rows) == 10
+    assert NEXT_CURSOR_HEADER not in response.headers
+
+
+def test_user_trade_history_merges_both_sides(db_session):
+    base = datetime(2024, 1, 1)
+    for i in range(9):
+        buyer, seller = ("me", "other") if i % 3 else ("other", "me")
+        db_session.add(
+            models.Trade(
+                id=f"t{i}",
+                buyer_user_id=buyer,
+                seller_user_id=seller,
+                price=1.0,
+                quantity=1.0,
+                created_at=base + timedelta(seconds=i),
+            )
+        )
+    db_session.add(
+        models.Trade(
+            id="x", buyer_user_id="a", seller_user_id="b", price=1.0, quantity=1.0,
+            created_at=base,
+        )
+    )
+    db_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        page, response = page_params(cursor, 4), Response()
+        rows = trim_page(
+            db_session.execute(user_trades_page("me", page)).all(), page, response
+        )
+        seen += [t.id for t in rows]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            break
+
+    assert seen == [f"t{i}" for i in reversed(range(9))]
+
+
+def test_backfill_brings_older_trades_into_history(db_session):
+    # A trade written before the party columns existed
+    for order_id, user_id, type_ in (("b", "me", "buy"), ("s", "other", "sell")):
+        db_session.add(
+            models.Order(
+                id=order_id, user_id=user_id, type=type_, price=2.0,
+                quantity=3.0, remaining_quantity=0.0,
+            )
+        )
+    db_session.add(
+        models.Trade(
+            id="old", buy_order_id="b", sell_order_id="s", price=2.0, quantity=3.0
+        )
+    )
+    db_session.commit()
+    page = page_params(None, 10)
+    assert db_session.execute(user_trades_page("me", page)).all() == []
+
+    assert backfill_trade_parties(db_session) == 1
+    db_session.commit()
+    (row,) = db_session.execute(user_trades_page("me", page)).all()
+    assert (row.id, row.seller_user_id, row.notional) == ("old", "other", 6.0)
+    assert backfill_trade_parties(db_session) == 0
+
+
+# -----------------------------
+# Tests for NDJSON export
+# -----------------------------
+def test_ndjson_export_streams_all_rows_in_batches(session_factory, monkeypatch):
+    db = session_factory()
+    create_users(db, 7)
+    db.close()
+    monkeypatch.setattr(pagination, "ReadSessionLocal", session_factory)
+
+    response = ndjson_export(
+        select(models.User).order_by(models.User.created_at, models.User.id),
+        lambda u: json.dumps({"id": u.id}),
+        batch_size=3,
+    )
+    chunks = collect(response.body_iterator)
+
+    assert response.media_type == "application/x-ndjson"
+    assert len(chunks) == 3  # 3 + 3 + 1
+    ids = [json.loads(line)["id"] for line in "".join(chunks).splitlines()]
+    assert ids == [f"u{i:03d}" for i in range(7)]
+
+
+# -----------------------------
+# Tests for read routes
+# -----------------------------
+def dependency_calls(dependant):
+    for sub in dependant.dependencies:
+        yield sub.call
+        yield from dependency_calls(sub)
+
+
+def test_read_routes_never_open_a_primary_session():
+    # Auth included: a read must not hold a primary connection as well
+    checked = 0
+    for router in (market.router, orders.router, trades.router, users.router):
+        for route in router.routes:
+            calls = set(dependency_calls(route.dependant))
+            if get_read_db in calls:
+                assert get_db not in calls, route.path
+                checked += 1
+    assert checked >= 5
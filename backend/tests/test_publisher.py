@@ -0,0 +1,92 @@
+# tests/test_publisher.py
+import asyncio
+from app.core.bus import InProcessBus
+from app.core.publisher import MarketDataPublisher
+
+
+# -----------------------------
+# Helpers
+# -----------------------------
+class FakeLoader:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, book, trades):
+        self.calls.append((book, trades))
+        return ({"buy_orders": [], "sell_orders": []} if book else None), (
+            [] if trades else None
+        )
+
+
+class RecordingBus(InProcessBus):
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    async def publish(self, event):
+        self.events.append(event)
+        await super().publish(event)
+
+
+# -----------------------------
+# Tests for MarketDataPublisher
+# -----------------------------
+def test_burst_of_marks_costs_one_snapshot():
+    loader = FakeLoader()
+    pub = MarketDataPublisher(interval_ms=20, bus=InProcessBus(), loader=loader)
+    for _ in range(50):
+        pub.mark_book_dirty()
+
+    asyncio.run(pub.flush())
+    assert loader.calls == [(True, False)]
+    assert pub.stats["flushes"] == 1
+
+    # Nothing dirty: flushing again is free
+    asyncio.run(pub.flush())
+    assert len(loader.calls) == 1
+
+
+def test_fills_between_ticks_go_out_as_one_event():
+    bus = RecordingBus()
+    pub = MarketDataPublisher(interval_ms=20, bus=bus, loader=FakeLoader())
+    pub.add_fills([(100.0, 1.0, 0.0)])
+    pub.add_fills([(101.0, 2.0, 1.0)])
+
+    asyncio.run(pub.flush())
+    (event,) = bus.events
+    assert event["type"] == "market"
+    assert event["fills"] == [(100.0, 1.0, 0.0), (101.0, 2.0, 1.0)]
+    assert event["trades"] is True
+
+
+def test_remote_events_are_rendered_locally():
+    loader = FakeLoader()
+    pub = MarketDataPublisher(interval_ms=20, bus=InProcessBus(), loader=loader)
+
+    async def scenario():
+        # As if another worker had flushed twice since our last tick
+        for _ in range(2):
+            await pub.receive(
+                {"type": "market", "book": True, "trades": False, "fills": []}
+            )
+        await pub.flush()
+
+    asyncio.run(scenario())
+    assert loader.calls == [(True, False)]
+    assert pub.stats["flushes"] == 0  # nothing of our own to send
+    assert pub.stats["renders"] == 1
+
+
+def test_run_loop_flushes_on_tick():
+    loader = FakeLoader()
+    pub = MarketDataPublisher(interval_ms=10, bus=InProcessBus(), loader=loader)
+
+    async def scenario():
+        pub.start()
+        pub.mark_book_dirty()
+        pub.mark_trades_dirty()
+        await asyncio.sleep(0.05)
+        await pub.stop()
+
+    asyncio.run(scenario())
+    assert loader.calls == [(True, True)]
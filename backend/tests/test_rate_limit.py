@@ -0,0 +1,103 @@
+# tests/test_rate_limit.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core import rate_limit as rl
+from app.core.rate_limit import RateLimiter, parse_limits
+from app.core.security import create_access_token
+
+
+def make_request(token=None, host="10.0.0.1", **extra):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    headers += [(k.replace("_", "-").encode(), v.encode()) for k, v in extra.items()]
+    return Request({"type": "http", "headers": headers, "client": (host, 1234)})
+
+
+# -----------------------------
+# Tests for RateLimiter
+# -----------------------------
+def test_parse_limits():
+    assert parse_limits("orders=10/20, auth=1") == {
+        "orders": (10.0, 20.0),
+        "auth": (1.0, 1.0),
+    }
+
+
+def test_burst_then_refill_at_rate(clock):
+    limiter = RateLimiter({"orders": (2, 3)}, clock=clock)
+    assert [limiter.acquire("orders", "u1") for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("orders", "u1") == pytest.approx(0.5)  # 1 token at 2/s
+
+    clock.now = 0.5
+    assert limiter.acquire("orders", "u1") == 0
+    assert limiter.stats["allowed"]["orders"] == 4
+    assert limiter.stats["limited"]["orders"] == 1
+
+
+def test_buckets_are_per_subject_and_class(clock):
+    limiter = RateLimiter({"orders": (1, 1), "reads": (1, 1)}, clock=clock)
+    assert limiter.acquire("orders", "u1") == 0
+    assert limiter.acquire("orders", "u1") > 0
+    assert limiter.acquire("orders", "u2") == 0
+    assert limiter.acquire("reads", "u1") == 0
+    assert limiter.acquire("unlimited", "u1") == 0
+
+
+def test_idle_and_excess_buckets_are_evicted(clock):
+    limiter = RateLimiter({"reads": (1, 1)}, idle_ttl=10, max_buckets=2, clock=clock)
+    limiter.acquire("reads", "a")
+    clock.now = 5
+    limiter.acquire("reads", "b")
+    limiter.acquire("reads", "c")  # over max_buckets: "a" goes
+    assert limiter.snapshot()["buckets"] == 2
+
+    clock.now = 16  # "b" and "c" idle for over 10s
+    limiter.acquire("reads", "d")
+    assert limiter.snapshot() == {
+        "allowed": {"reads": 4},
+        "limited": {"reads": 0},
+        "evicted": 3,
+        "buckets": 1,
+    }
+
+
+# -----------------------------
+# Tests for the route dependency
+# -----------------------------
+def test_dependency_raises_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(rl, "limiter", RateLimiter({"auth": (0.25, 1)}))
+    check = rl.rate_limit("auth")
+
+    asyncio.run(check(make_request()))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(check(make_request()))
+    assert exc.value.status_code == 429
+    assert exc.value.headers["Retry-After"] == "4"
+
+    # Another client address has its own bucket
+    asyncio.run(check(make_request(host="10.0.0.2")))
+
+
+def test_subject_is_user_from_token_else_client_address():
+    token = create_access_token({"username": "alice"})
+    assert rl._subject(make_request(token)) == "user:alice"
+    assert rl._subject(make_request("garbage")) == "ip:10.0.0.1"
+
+
+
+def test_client_address_only_trusts_headers_from_configured_proxies():
+    proxies = rl.parse_proxies("172.16.0.0/12, 10.0.0.9")
+    behind = make_request(host="172.18.0.3", x_real_ip="203.0.113.7")
+    assert rl.client_address(behind, proxies) == "203.0.113.7"
+    # Nearest untrusted hop wins; what the client itself sent is ignored
+    chain = make_request(
+        host="10.0.0.9", x_forwarded_for="198.51.100.1, 203.0.113.8, 172.18.0.3"
+    )
+    assert rl.client_address(chain, proxies) == "203.0.113.8"
+    # A direct caller can't pick its own bucket
+    forged = make_request(host="203.0.113.9", x_real_ip="1.2.3.4")
+    assert rl.client_address(forged, proxies) == "203.0.113.9"
+    assert rl.client_address(behind, []) == "172.18.0.3"
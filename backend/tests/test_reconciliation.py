@@ -0,0 +1,61 @@
+# tests/test_reconciliation.py
+import pytest
+from app.db import data_model as models
+from app.core import wallet_service
+from app.core.reconciliation import ReservationReconciler
+from tests.conftest import place
+
+
+# -----------------------------
+# Setup in-memory DB
+# -----------------------------
+@pytest.fixture
+def wallets():
+    return {u: dict(balance=1000.0, holdings=10.0) for u in ("1", "2", "3")}
+
+
+@pytest.fixture
+def book(db_session):
+    place(db_session, "1", models.OrderType.buy, 100.0, 2.0)
+    place(db_session, "1", models.OrderType.buy, 50.0, 1.0)
+    place(db_session, "2", models.OrderType.sell, 120.0, 3.0)
+    return db_session
+
+
+# -----------------------------
+# Tests for ReservationReconciler
+# -----------------------------
+def test_consistent_book_has_no_mismatches(book):
+    report = ReservationReconciler(chunk_size=2).run(book)
+    assert report["checked"] == 3
+    assert report["mismatched"] == 0
+
+
+def test_drift_is_reported_and_repaired(book):
+    # Reservation left behind with no order backing it
+    wallet_service.reserve_balance(book, "3", 7.5)
+    book.commit()
+
+    reconciler = ReservationReconciler()
+    report = reconciler.run(book)
+    assert report["mismatched"] == 1
+    mismatch = report["mismatches"][0]
+    assert mismatch["user_id"] == "3"
+    assert mismatch["cash_drift"] == pytest.approx(7.5)
+
+    report = ReservationReconciler().run(book, repair=True)
+    assert report["repaired"] == 1
+    state = wallet_service.get_wallet_state(book, "3")
+    assert state["reserved_balance"] == pytest.approx(0.0)
+    assert state["balance"] == pytest.approx(1000.0)
+    assert ReservationReconciler().run(book)["mismatched"] == 0
+
+
+def test_incremental_run_only_checks_touched_users(book):
+    reconciler = ReservationReconciler(overlap=0)
+    assert reconciler.run(book)["checked"] == 3
+
+    wallet_service.deposit(book, "2", 1.0)
+    book.commit()
+    report = reconciler.run(book)
+    assert report["checked"] == 1
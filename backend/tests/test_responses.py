@@ -0,0 +1,57 @@
+# tests/test_responses.py
+import json
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import PydanticJSONResponse, page_response
+from app.schemas.order_schema import OrderListItem
+
+ORDER_LIST = TypeAdapter(List[OrderListItem])
+
+
+def order_row(**overrides):
+    row = dict(
+        id="o1",
+        user_id="u1",
+        type="buy",
+        order_kind="limit",
+        price=100.0,
+        quantity=2.0,
+        remaining_quantity=1.0,
+        status="pending",
+        created_at=datetime(2024, 1, 1, 12, 0, 0),
+        updated_at=datetime(2024, 1, 1, 12, 0, 1),
+    )
+    row.update(overrides)
+    return SimpleNamespace(**row)
+
+
+# -----------------------------
+# Tests for PydanticJSONResponse
+# -----------------------------
+def test_renders_attribute_rows_as_json():
+    rows = [order_row(), order_row(id="o2", price=None)]
+    response = PydanticJSONResponse(rows, ORDER_LIST)
+
+    assert response.media_type == "application/json"
+    body = json.loads(response.body)
+    assert [o["id"] for o in body] == ["o1", "o2"]
+    assert body[0]["created_at"] == "2024-01-01T12:00:00"
+    assert body[1]["price"] is None
+    assert "user" not in body[0]
+
+
+def test_page_response_keeps_only_the_cursor_header():
+    sub_response = Response()
+    sub_response.headers[NEXT_CURSOR_HEADER] = "abc"
+
+    response = page_response([order_row()], ORDER_LIST, sub_response)
+    assert response.headers[NEXT_CURSOR_HEADER] == "abc"
+    assert int(response.headers["content-length"]) == len(response.body)
+
+    assert NEXT_CURSOR_HEADER not in page_response([], ORDER_LIST, Response()).headers
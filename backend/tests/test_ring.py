@@ -0,0 +1,154 @@
+# tests/test_ring.py
+import multiprocessing
+import os
+import struct
+
+import pytest
+from app.db import data_model as models
+from app.core import ring
+from app.core.ring import SpscRing
+
+RECORD = struct.Struct("<Qd")
+
+
+class Order:
+    def __init__(self, price=101.25, order_kind="limit"):
+        self.id = "7f0c1c52-4a47-4f7e-9d52-0c6a4d0e9a11"
+        self.user_id = "u1"
+        self.type = models.OrderType.sell
+        self.order_kind = order_kind
+        self.price = price
+        self.remaining_quantity = 3.5
+
+
+# -----------------------------
+# Rings are unlinked after each test
+# -----------------------------
+@pytest.fixture
+def prefix(request):
+    return f"test-{os.getpid()}-{request.node.name[:20]}"
+
+
+@pytest.fixture
+def small_ring():
+    r = SpscRing.create(None, RECORD, 4)
+    yield r
+    r.close()
+
+
+# -----------------------------
+# Tests for the ring
+# -----------------------------
+def test_records_come_out_in_order_across_wraparound(small_ring):
+    received = []
+    for i in range(10):  # 2.5 laps of a 4-slot ring
+        assert small_ring.put(i, i / 2)
+        assert small_ring.put(i + 100, 0.0)
+        received.append(small_ring.get())
+        received.append(small_ring.get())
+    assert [r[0] for r in received[:4]] == [0, 100, 1, 101]
+    assert received[-1] == (109, 0.0)
+    assert small_ring.get() is None
+    assert len(small_ring) == 0
+
+
+def test_full_ring_rejects_until_the_consumer_frees_slots(small_ring):
+    for i in range(4):
+        assert small_ring.put(i, 0.0)
+    assert not small_ring.put(4, 0.0)
+    assert small_ring.stats["full"] == 1
+
+    seen = []
+
+    def read(view):
+        seen.append(RECORD.unpack_from(view)[0])
+
+    assert small_ring.drain(read, 3) == 3
+    assert seen == [0, 1, 2]
+    assert small_ring.put(4, 0.0)
+    assert [small_ring.get()[0], small_ring.get()[0]] == [3, 4]
+
+
+def test_capacity_must_be_a_power_of_two():
+    with pytest.raises(ValueError):
+        SpscRing.create(None, RECORD, 6)
+
+
+def test_wait_times_out_on_an_empty_ring(small_ring):
+    assert small_ring.wait(timeout=0.01) is False
+    small_ring.put(1, 1.0)
+    assert small_ring.wait(timeout=0.01) is True
+
+
+# -----------------------------
+# Tests for order and event records
+# -----------------------------
+def test_order_and_event_records_round_trip(prefix):
+    orders, events = ring.engine_rings(0, prefix, 8)
+    worker_orders, worker_events = ring.worker_rings(0, prefix, 8)
+    try:
+        assert ring.put_order(worker_orders, 1, "match", Order())
+        assert ring.put_order(worker_orders, 2, "cancel", Order(None, "market"))
+
+        messages = []
+        assert orders.drain(lambda view: messages.append(ring.decode_order(view))) == 2
+        first, second = messages
+        assert (first.seq, first.action, first.side, first.kind) == (
+            1, "match", models.OrderType.sell, "limit",
+        )
+        assert (first.price, first.quantity, first.user_id) == (101.25, 3.5, "u1")
+        assert first.order_id == Order().id
+        assert (second.action, second.kind, second.price) == ("cancel", "market", None)
+
+        ring.put_event(events, first, models.StatusType.executed, 2, 3.5, 0.0)
+        got = []
+        worker_events.drain(lambda view: got.append(ring.decode_event(view)))
+        (event,) = got
+        assert (event.seq, event.status, event.trades) == (
+            1, models.StatusType.executed, 2,
+        )
+        assert event.sent_ns == first.sent_ns <= event.done_ns
+        assert event.order_id == first.order_id
+    finally:
+        for r in (worker_orders, worker_events, orders, events):
+            r.close()
+
+
+def _echo(prefix, count):
+    orders, events = ring.worker_rings(0, prefix, 8)
+    done = 0
+
+    def reply(view):
+        message = ring.decode_order(view)
+        while not ring.put_event(
+            events, message, models.StatusType.pending, 0, 0.0, message.quantity
+        ):
+            pass
+
+    while done < count:
+        orders.wait(timeout=5)
+        done += orders.drain(reply)
+    orders.close()
+    events.close()
+
+
+def test_hand_off_between_processes(prefix):
+    # Twice the capacity, so both rings wrap while the other side runs
+    orders, events = ring.engine_rings(0, prefix, 8)
+    context = multiprocessing.get_context("fork")
+    child = context.Process(target=_echo, args=(prefix, 16))
+    child.start()
+    try:
+        received = []
+        sent = 0
+        while len(received) < 16:
+            while sent < 16 and ring.put_order(orders, sent, "match", Order()):
+                sent += 1
+            events.wait(timeout=5)
+            events.drain(lambda view: received.append(ring.decode_event(view).seq))
+        assert received == list(range(16))
+    finally:
+        child.join(timeout=5)
+        orders.close()
+        events.close()
+    assert child.exitcode == 0
@@ -0,0 +1,111 @@
+# tests/test_risk.py
+import pytest
+from sqlalchemy import event
+from app.core.risk import PreTradeRisk, RiskRejected
+from app.core.wallet_service import InsufficientFunds, WalletNotFound
+from app.db import data_model as models
+
+BUY, SELL = models.OrderType.buy, models.OrderType.sell
+
+
+# -----------------------------
+# Setup in-memory DB
+# -----------------------------
+@pytest.fixture
+def wallets():
+    return {"u1": dict(balance=1000.0, holdings=5.0)}
+
+
+@pytest.fixture
+def db_session(db_session):
+    """Plus one open order, and `queries` counting the statements run."""
+    db_session.add(
+        models.Order(
+            user_id="u1", type=BUY, price=1.0, quantity=1.0, remaining_quantity=1.0
+        )
+    )
+    db_session.commit()
+    db_session.queries = []
+    event.listen(
+        db_session.get_bind(),
+        "before_cursor_execute",
+        lambda *args: db_session.queries.append(1),
+    )
+    return db_session
+
+
+def make_risk(clock, last_price=None, **limits):
+    options = dict(max_open_orders=10, max_notional=10_000.0, price_band=0.1)
+    options.update(limits)
+    return PreTradeRisk(
+        **options,
+        reference_price=lambda: last_price,
+        clock=clock,
+    )
+
+
+# -----------------------------
+# Tests for static limits
+# -----------------------------
+def test_notional_and_price_band_rejects_never_touch_the_db(db_session, clock):
+    risk = make_risk(clock, last_price=100.0)
+    with pytest.raises(RiskRejected):
+        risk.check(db_session, "u1", BUY, 100.0, 200.0, 20_000.0)
+    with pytest.raises(RiskRejected):
+        risk.check(db_session, "u1", SELL, 111.0, 1.0, 1.0)
+    assert db_session.queries == []
+    assert risk.stats["rejected"]["notional"] == 1
+    assert risk.stats["rejected"]["price_band"] == 1
+
+    risk.check(db_session, "u1", SELL, 109.0, 1.0, 1.0)  # inside the band
+
+
+# -----------------------------
+# Tests for the account cache
+# -----------------------------
+def test_funds_checked_from_cache_after_first_load(db_session, clock):
+    risk = make_risk(clock)
+    risk.check(db_session, "u1", BUY, 100.0, 5.0, 500.0)
+    loaded = len(db_session.queries)
+    assert loaded > 0
+
+    for _ in range(5):
+        with pytest.raises(InsufficientFunds):
+            risk.check(db_session, "u1", BUY, 100.0, 20.0, 2000.0)
+    with pytest.raises(InsufficientFunds):
+        risk.check(db_session, "u1", SELL, None, 6.0, 6.0)
+    assert len(db_session.queries) == loaded
+    assert risk.stats["rejected"]["funds"] == 6
+
+
+def test_write_through_updates_funds_and_open_orders(db_session, clock):
+    risk = make_risk(clock, max_open_orders=2)
+    risk.check(db_session, "u1", BUY, 100.0, 5.0, 500.0)  # loads: 1 open order
+
+    risk.on_reserved("u1", {"balance": 500.0, "holdings": 5.0})
+    with pytest.raises(RiskRejected):  # 2 open orders now
+        risk.check(db_session, "u1", BUY, 100.0, 1.0, 100.0)
+
+    risk.on_released("u1", {"balance": 1000.0, "holdings": 5.0})
+    risk.on_wallet("u1", {"balance": 50.0, "holdings": 5.0})
+    with pytest.raises(InsufficientFunds):
+        risk.check(db_session, "u1", BUY, 100.0, 1.0, 100.0)
+
+
+def test_stale_reject_reloads_once_per_refresh(db_session, clock):
+    risk = make_risk(clock, refresh=1.0)
+    risk.check(db_session, "u1", BUY, 100.0, 1.0, 100.0)
+    risk.on_wallet("u1", {"balance": 0.0, "holdings": 0.0})  # stale view
+
+    clock.now += 0.5
+    with pytest.raises(InsufficientFunds):  # entry too fresh to reload
+        risk.check(db_session, "u1", BUY, 100.0, 1.0, 100.0)
+
+    clock.now += 1.0
+    risk.check(db_session, "u1", BUY, 100.0, 1.0, 100.0)  # reloaded from the DB
+    assert risk.stats["loads"] == 2
+
+
+def test_missing_wallet(db_session, clock):
+    with pytest.raises(WalletNotFound):
+        make_risk(clock).check(db_session, "nobody", BUY, 1.0, 1.0, 1.0)
@@ -0,0 +1,141 @@
+# tests/test_stops.py
+from datetime import datetime, timedelta
+
+import pytest
+from app.db import data_model as models
+from app.core.stops import StopBook, match_with_stops
+
+BUY, SELL = models.OrderType.buy, models.OrderType.sell
+T0 = datetime(2026, 1, 1)
+
+
+# -----------------------------
+# Setup in-memory DB
+# -----------------------------
+@pytest.fixture
+def wallets():
+    return {
+        user_id: dict(
+            balance=10_000.0,
+            reserved_balance=10_000.0,
+            holdings=100.0,
+            reserved_holdings=100.0,
+        )
+        for user_id in ("u1", "u2", "u3", "u4")
+    }
+
+
+def create_order(session, user_id, type_, price, quantity, **fields):
+    order = models.Order(
+        user_id=user_id,
+        type=type_,
+        price=price,
+        quantity=quantity,
+        remaining_quantity=quantity,
+        status=fields.pop("status", models.StatusType.pending),
+        **fields,
+    )
+    session.add(order)
+    session.commit()
+    session.refresh(order)
+    return order
+
+
+def create_stop(session, book, user_id, type_, stop_price, quantity, price=None):
+    order = create_order(
+        session,
+        user_id,
+        type_,
+        price,
+        quantity,
+        status=models.StatusType.untriggered,
+        order_kind="stop_limit" if price is not None else "stop",
+        stop_price=stop_price,
+    )
+    book.add(order.id, order.type, order.stop_price, order.created_at)
+    return order
+
+
+# -----------------------------
+# Tests for the trigger index
+# -----------------------------
+def test_trigger_pops_only_the_crossed_prefix_in_firing_order():
+    book = StopBook()
+    book.add("b105", BUY, 105.0, T0)
+    book.add("b101-late", BUY, 101.0, T0 + timedelta(seconds=1))
+    book.add("b101", BUY, 101.0, T0)
+    book.add("b110", BUY, 110.0, T0)
+    book.add("s95", SELL, 95.0, T0)
+    book.add("s99", SELL, 99.0, T0)
+
+    assert book.trigger(100.0, 100.0) == []
+    assert book.trigger(105.0, 99.0) == ["b101", "b101-late", "b105", "s99"]
+    assert len(book) == 2
+    assert book.trigger(105.0, 99.0) == []  # already fired
+    assert book.trigger(200.0, 1.0) == ["b110", "s95"]
+
+
+def test_discarded_stops_never_fire():
+    book = StopBook()
+    book.add("a", SELL, 90.0, T0)
+    book.add("b", SELL, 90.0, T0 + timedelta(seconds=1))
+    book.discard("a")
+    assert book.trigger(None, 80.0) == ["b"]
+    assert book.stats == {"added": 2, "triggered": 1}
+
+
+def test_load_rebuilds_from_untriggered_rows(db_session):
+    book = StopBook()
+    create_stop(db_session, book, "u1", SELL, 95.0, 1.0)
+    create_order(db_session, "u2", SELL, 101.0, 1.0)
+
+    fresh = StopBook()
+    fresh.load(db_session)
+    assert len(fresh) == 1
+    assert fresh.trigger(None, 95.0) != []
+
+
+# -----------------------------
+# Tests for the matching cascade
+# -----------------------------
+def test_fill_triggers_stop_which_triggers_the_next(db_session):
+    book = StopBook()
+    # Bids the stop-loss sells will hit
+    create_order(db_session, "u3", BUY, 99.0, 1.0)
+    create_order(db_session, "u3", BUY, 97.0, 1.0)
+    # Fires at 99 (first fill), its own fill at 97 fires the next one
+    first = create_stop(db_session, book, "u1", SELL, 99.0, 1.0)
+    second = create_stop(db_session, book, "u2", SELL, 98.0, 1.0, price=90.0)
+    untouched = create_stop(db_session, book, "u2", SELL, 50.0, 1.0, price=50.0)
+
+    incoming = create_order(db_session, "u4", SELL, 99.0, 0.5)
+    trades = match_with_stops(db_session, incoming.id, book)
+    db_session.commit()
+
+    assert [t.price for t in trades] == [99.0, 99.0, 97.0, 97.0]
+    for order in (first, second, untouched):
+        db_session.refresh(order)
+    assert (first.status, first.order_kind, first.price) == (
+        models.StatusType.executed,
+        "market",
+        None,
+    )
+    assert (second.status, second.order_kind) == (models.StatusType.pending, "limit")
+    assert second.remaining_quantity == pytest.approx(0.5)
+    assert untouched.status == models.StatusType.untriggered
+    # Activated orders are reported even when they did not fully fill
+    assert second.id in trades.order_updates
+    assert len(book) == 1
+
+
+def test_cancelled_stop_is_not_activated(db_session):
+    book = StopBook()
+    create_order(db_session, "u3", BUY, 99.0, 1.0)
+    stop = create_stop(db_session, book, "u1", SELL, 99.0, 1.0)
+    db_session.delete(stop)  # cancelled by another process, book not told
+    db_session.commit()
+
+    incoming = create_order(db_session, "u4", SELL, 99.0, 0.5)
+    trades = match_with_stops(db_session, incoming.id, book)
+    assert len(trades) == 1
+    assert len(book) == 0
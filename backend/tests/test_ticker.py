@@ -0,0 +1,53 @@
+# tests/test_ticker.py
+import pytest
+from app.core.ticker import RollingTicker
+
+
+# -----------------------------
+# Tests for RollingTicker
+# -----------------------------
+def test_empty_ticker():
+    stats = RollingTicker(window=60).snapshot(now=0)
+    assert stats["last_price"] is None
+    assert stats["volume_24h"] == 0
+    assert stats["vwap_24h"] is None
+
+
+def test_volume_high_low_vwap():
+    t = RollingTicker(window=60)
+    t.add_trade(100, 1, 10)
+    t.add_trade(110, 3, 11)
+    t.add_trade(90, 1, 12)
+
+    stats = t.snapshot(now=12)
+    assert stats["last_price"] == 90
+    assert stats["volume_24h"] == 5
+    assert stats["high_24h"] == 110
+    assert stats["low_24h"] == 90
+    assert stats["vwap_24h"] == pytest.approx((100 + 330 + 90) / 5)
+    assert stats["trade_count_24h"] == 3
+
+
+def test_buckets_slide_out_of_window():
+    t = RollingTicker(window=60)
+    t.add_trade(200, 1, 0)  # high, expires first
+    t.add_trade(100, 2, 30)
+
+    assert t.snapshot(now=59)["high_24h"] == 200
+    stats = t.snapshot(now=60)
+    assert stats["high_24h"] == 100
+    assert stats["volume_24h"] == 2
+    assert stats["trade_count_24h"] == 1
+
+    # Idle longer than the window clears everything but the last price
+    stats = t.snapshot(now=1000)
+    assert stats["volume_24h"] == 0
+    assert stats["high_24h"] is None
+    assert stats["last_price"] == 100
+
+
+def test_quotes():
+    t = RollingTicker(window=60)
+    t.update_quotes(99.5, 100.5)
+    stats = t.snapshot(now=0)
+    assert (stats["best_bid"], stats["best_ask"]) == (99.5, 100.5)
@@ -0,0 +1,115 @@
+# tests/test_wallet_service.py
+import pytest
+from app.db import data_model as models
+from app.core import wallet_service
+from app.core.wallet_service import InsufficientFunds, WalletNotFound
+
+Kind = models.LedgerKind
+
+
+def create_wallet(session, user_id, balance=1000.0, holdings=10.0):
+    wallet = models.Wallet(user_id=user_id, balance=balance, holdings=holdings)
+    session.add(wallet)
+    session.commit()
+    return wallet
+
+
+# -----------------------------
+# Tests for conditional updates
+# -----------------------------
+def test_withdraw_is_guarded(db_session):
+    create_wallet(db_session, "u1", balance=100.0)
+
+    state = wallet_service.withdraw(db_session, "u1", 60.0)
+    assert state["balance"] == 40.0
+
+    with pytest.raises(InsufficientFunds):
+        wallet_service.withdraw(db_session, "u1", 60.0)
+    assert wallet_service.get_wallet_state(db_session, "u1")["balance"] == 40.0
+
+
+def test_missing_wallet_raises_not_found(db_session):
+    with pytest.raises(WalletNotFound):
+        wallet_service.deposit(db_session, "nobody", 1.0)
+
+
+def test_reserve_and_release_round_trip(db_session):
+    create_wallet(db_session, "u1", balance=100.0, holdings=5.0)
+
+    state = wallet_service.reserve_balance(db_session, "u1", 30.0)
+    assert (state["balance"], state["reserved_balance"]) == (70.0, 30.0)
+    state = wallet_service.reserve_holdings(db_session, "u1", 2.0)
+    assert (state["holdings"], state["reserved_holdings"]) == (3.0, 2.0)
+
+    with pytest.raises(InsufficientFunds):
+        wallet_service.reserve_holdings(db_session, "u1", 4.0)
+
+    wallet_service.release_balance(db_session, "u1", 30.0)
+    state = wallet_service.release_holdings(db_session, "u1", 2.0)
+    assert state == {
+        "user_id": "u1",
+        "balance": 100.0,
+        "reserved_balance": 0.0,
+        "holdings": 5.0,
+        "reserved_holdings": 0.0,
+    }
+
+
+def test_settle_fill_appends_without_touching_wallet_rows(db_session):
+    create_wallet(db_session, "buyer", balance=1000.0, holdings=0.0)
+    create_wallet(db_session, "seller", balance=0.0, holdings=10.0)
+    wallet_service.reserve_balance(db_session, "buyer", 500.0)
+    wallet_service.reserve_holdings(db_session, "seller", 5.0)
+
+    assert wallet_service.settle_fill(db_session, "buyer", "seller", 450.0, 5.0, "t1")
+
+    row = db_session.query(models.Wallet).filter_by(user_id="buyer").one()
+    assert (row.reserved_balance, row.holdings) == (500.0, 0.0)
+    states = wallet_service.get_wallet_states(db_session, ["buyer", "seller"])
+    buyer, seller = states["buyer"], states["seller"]
+    assert (buyer["reserved_balance"], buyer["holdings"]) == (50.0, 5.0)
+    assert (seller["reserved_holdings"], seller["balance"]) == (0.0, 450.0)
+
+    kinds = [
+        e.kind
+        for e in db_session.query(models.LedgerEntry).filter_by(ref_id="t1")
+    ]
+    assert kinds == [Kind.fill_debit, Kind.fill_credit] * 2
+
+
+def test_settle_fill_writes_nothing_when_a_reservation_is_short(db_session):
+    create_wallet(db_session, "buyer", balance=1000.0, holdings=0.0)
+    create_wallet(db_session, "seller", balance=0.0, holdings=10.0)
+    wallet_service.reserve_balance(db_session, "buyer", 500.0)
+    wallet_service.reserve_holdings(db_session, "seller", 1.0)
+
+    assert not wallet_service.settle_fill(db_session, "buyer", "seller", 450.0, 5.0)
+    assert db_session.query(models.LedgerEntry).filter_by(applied=False).count() == 0
+
+
+# -----------------------------
+# Tests for compaction
+# -----------------------------
+def test_debit_compacts_pending_credits_before_failing(db_session):
+    create_wallet(db_session, "u1", balance=10.0)
+    wallet_service.deposit(db_session, "u1", 90.0)  # appended, row still 10
+
+    state = wallet_service.withdraw(db_session, "u1", 80.0)
+    assert state["balance"] == 20.0
+    row = db_session.query(models.Wallet).filter_by(user_id="u1").one()
+    assert row.balance == 20.0
+
+
+def test_compact_ledger_is_idempotent(db_session):
+    create_wallet(db_session, "u1", balance=0.0)
+    create_wallet(db_session, "u2", balance=0.0)
+    for _ in range(3):
+        wallet_service.deposit(db_session, "u1", 1.0)
+    wallet_service.deposit(db_session, "u2", 5.0)
+
+    assert wallet_service.compact_ledger(db_session, batch_size=2) == 2
+    assert wallet_service.compact_ledger(db_session) == 2
+    assert wallet_service.compact_ledger(db_session) == 0
+    states = wallet_service.get_wallet_states(db_session, ["u1", "u2"])
+    assert states["u1"]["balance"] == 3.0
+    assert states["u2"]["balance"] == 5.0
@@ -22,7 +22,7 @@ export default function Dashboard() {
     const [errorMsg, setErrorMsg] = useState("");
     const [activeTab, setActiveTab] = useState("wallet");
 
-    const [newOrder, setNewOrder] = useState({ user_id: null, order_kind: "limit", type: "buy", price: 0, quantity: 0 });
+    const [newOrder, setNewOrder] = useState({ order_kind: "limit", type: "buy", price: 0, quantity: 0 });
     const [topupAmount, setTopupAmount] = useState(0);
     const [deductAmount, setDeductAmount] = useState(0);
     const [addAsset, setAssetAddition] = useState(0);
@@ -90,7 +90,6 @@ export default function Dashboard() {
             setWallet(walletData || null);
             setTrades(tradesData || []);
             setUser(currentUser);
-            setNewOrder((prev) => ({ ...prev, user_id: currentUser.id }));
             localStorage.setItem("user", JSON.stringify(currentUser));
             setErrorMsg("");
         } catch (err) {